@@ -0,0 +1,54 @@
+"""
+Memory used by 100k listed objects, regular vs CompactMixin representation.
+
+Usage (from the repository root): python -m benchmarks.bench_compact [number of objects]
+"""
+import sys
+import time
+import tracemalloc
+
+from rest_api_lib_creator.compact import CompactMixin
+from rest_api_lib_creator.core import ViewsetRestApiLib
+
+FIELDS = ('id', 'name', 'email', 'is_active', 'created_at', 'updated_at', 'score', 'country')
+
+
+class User(ViewsetRestApiLib):
+    fields = FIELDS
+
+
+class CompactUser(CompactMixin, ViewsetRestApiLib):
+    fields = FIELDS
+
+
+def build_payload(count):
+    return [{
+        'id': i, 'name': 'User {}'.format(i), 'email': 'user{}@super.cool'.format(i), 'is_active': bool(i % 2),
+        'created_at': '2020-01-01T00:00:00Z', 'updated_at': '2020-01-02T00:00:00Z', 'score': i * 1.5, 'country': 'BR',
+    } for i in range(count)]
+
+
+def measure(lib_class, payload):
+    tracemalloc.start()
+    start = time.perf_counter()
+    objects = [lib_class.init_existing_object(**obj) for obj in payload]
+    elapsed = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    assert len(objects) == len(payload)
+    return size, elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    payload = build_payload(count)
+
+    for lib_class in (User, CompactUser):
+        size, elapsed = measure(lib_class, payload)
+        print('{:<12} {:>10.1f} MiB {:>8.0f} bytes/object {:>10.0f} objects/s'.format(
+            lib_class.__name__, size / 2 ** 20, size / count, count / elapsed,
+        ))
+
+
+if __name__ == '__main__':
+    main()
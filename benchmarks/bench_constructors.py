@@ -0,0 +1,66 @@
+"""
+Objects built per second by the regular __init__ vs the constructor compiled from the declared `fields` schema, both one by
+one (init_existing_object) and from a list page (prepare_response).
+
+Usage (from the repository root): python -m benchmarks.bench_constructors [objects per page] [repetitions]
+"""
+import sys
+import time
+
+import mock
+
+from rest_api_lib_creator.core import RestApiLib
+
+
+class Address(RestApiLib):
+    fields = ('street', 'city', 'country')
+
+
+class User(RestApiLib):
+    fields = ('id', 'name', 'email', 'is_active', 'created_at', 'score', 'tags', 'address')
+    nested_objects = {'address': Address}
+
+
+class RegularAddress(Address):
+    compile_constructors = False
+
+
+class RegularUser(User):
+    compile_constructors = False
+    nested_objects = {'address': RegularAddress}
+
+
+def build_payload(count):
+    return [{
+        'id': i, 'name': 'User {}'.format(i), 'email': 'user{}@super.cool'.format(i), 'is_active': bool(i % 2),
+        'created_at': '2020-01-01T00:00:00Z', 'score': i * 1.5, 'tags': ['tag1', 'tag2', 'tag3'],
+        'address': {'street': 'Some street, {}'.format(i), 'city': 'Curitiba', 'country': 'BR'},
+    } for i in range(count)]
+
+
+def best_of(func, repetitions):
+    timings = []
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    repetitions = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    payload = build_payload(count)
+    response = mock.Mock(status_code=200, json=mock.Mock(return_value={'count': count, 'next': None, 'results': payload}))
+
+    print('{:<12} {:>24} {:>24}'.format('', 'init_existing_object', 'prepare_response'))
+    for lib_class in (RegularUser, User):
+        init_elapsed = best_of(lambda: [lib_class.init_existing_object(**obj) for obj in payload], repetitions)
+        page_elapsed = best_of(lambda: lib_class.prepare_response(response, lib_class, many=True), repetitions)
+        print('{:<12} {:>15.0f} objects/s {:>15.0f} objects/s'.format(
+            lib_class.__name__, count / init_elapsed, count / page_elapsed,
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Decoding throughput of the installed JSON codecs on large DRF-like list pages, both raw (codec.loads) and end to end
+(RestApiLib.prepare_response building the instances).
+
+Usage (from the repository root): python -m benchmarks.bench_json_codecs [objects per page] [repetitions]
+"""
+import json
+import sys
+import time
+
+import mock
+import requests
+
+from rest_api_lib_creator.core import RestApiLib
+from rest_api_lib_creator.json_codecs import get_available_json_codecs
+
+
+def build_page(count):
+    return json.dumps({
+        'count': count, 'next': None, 'previous': None,
+        'results': [{
+            'id': i, 'name': 'User {}'.format(i), 'email': 'user{}@super.cool'.format(i), 'is_active': bool(i % 2),
+            'created_at': '2020-01-01T00:00:00Z', 'score': i * 1.5, 'tags': ['tag1', 'tag2', 'tag3'],
+            'address': {'street': 'Some street, {}'.format(i), 'city': 'Curitiba', 'country': 'BR'},
+        } for i in range(count)],
+    }).encode('utf-8')
+
+
+def build_response(content):
+    response = requests.Response()
+    response._content = content
+    response.status_code = 200
+    response.request = mock.Mock()
+    return response
+
+
+def timeit(func, repetitions):
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        func()
+    return (time.perf_counter() - start) / repetitions
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    repetitions = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    content = build_page(count)
+    response = build_response(content)
+    size_mb = len(content) / 2 ** 20
+
+    print('page: {} objects, {:.1f} MiB'.format(count, size_mb))
+    print('{:<10} {:>12} {:>16}'.format('codec', 'loads MiB/s', 'list objects/s'))
+    for codec in get_available_json_codecs():
+        class User(RestApiLib):
+            json_codec = codec
+
+        loads_elapsed = timeit(lambda: codec.loads(content), repetitions)
+        list_elapsed = timeit(lambda: User.prepare_response(response, User, many=True), repetitions)
+        print('{:<10} {:>12.1f} {:>16.0f}'.format(codec.name, size_mb / loads_elapsed, count / list_elapsed))
+
+
+if __name__ == '__main__':
+    main()
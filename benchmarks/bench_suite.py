@@ -0,0 +1,210 @@
+"""
+End to end benchmark suite: the lib talking to a local stand-in DRF API (see benchmarks/stand_in_server.py), so the
+library overhead (and its regressions) can be measured without any external service.
+
+For every scenario: throughput (operations/s), latency percentiles (ms) and memory (peak of one operation, MiB).
+Results are printed as a table and (optionally) written as JSON, to be compared across versions.
+
+Usage (from the repository root):
+    python -m benchmarks.bench_suite [--operations 200] [--page-size 100] [--scenarios list_flat,retrieve] [--output results.json]
+    python -m benchmarks.bench_suite --compare results.json  # throughput ratios against a previous run
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from rest_api_lib_creator.core import ViewsetRestApiLib
+
+from .stand_in_server import start_server
+
+PERCENTILES = (50, 90, 99)
+
+
+def get_lib_version():
+    try:
+        from importlib.metadata import version
+        return version('rest-api-lib-creator')
+    except Exception:
+        return None
+
+
+def build_libs(api_url):
+    class Address(ViewsetRestApiLib):
+        pass
+
+    class Owner(ViewsetRestApiLib):
+        base_api_url = api_url + '/owners'
+        nested_objects = {'address': Address}
+
+    class Toy(ViewsetRestApiLib):
+        pass
+
+    class Pet(ViewsetRestApiLib):
+        base_api_url = api_url + '/pets'
+        nested_objects = {'owner': Owner, 'toys': Toy}
+
+    class LazyPet(Pet):
+        lazy_nested_objects = True
+
+    class FlatPet(ViewsetRestApiLib):
+        base_api_url = api_url + '/pets'
+
+    class Large(ViewsetRestApiLib):
+        base_api_url = api_url + '/large'
+
+    return {'Owner': Owner, 'Pet': Pet, 'LazyPet': LazyPet, 'FlatPet': FlatPet, 'Large': Large}
+
+
+def get_percentile(sorted_values, percentile):
+    index = min(len(sorted_values) - 1, int(round(percentile / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(func, inputs):
+    # Calls func(input) for every input. The first call is traced by tracemalloc (peak memory of a single operation) and
+    # left out of the timings, which are not slowed down by tracing.
+    tracemalloc.start()
+    func(inputs[0])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies = []
+    start = time.perf_counter()
+    for item in inputs[1:]:
+        call_start = time.perf_counter()
+        func(item)
+        latencies.append(time.perf_counter() - call_start)
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    stats = {
+        'operations': len(latencies),
+        'seconds': elapsed,
+        'operations_per_second': len(latencies) / elapsed,
+        'peak_memory_mib': peak / 2 ** 20,
+    }
+    stats.update(('p{}_ms'.format(percentile), get_percentile(latencies, percentile) * 1000) for percentile in PERCENTILES)
+    return stats
+
+
+def build_scenarios(libs, operations, page_size):
+    Pet, LazyPet, FlatPet, Large, Owner = libs['Pet'], libs['LazyPet'], libs['FlatPet'], libs['Large'], libs['Owner']
+    pages = range(1, operations + 1)
+    identifiers = [i % 1000 + 1 for i in range(operations)]
+    created = []
+
+    def list_page(lib_class):
+        return lambda page: lib_class.list(page=page % 10 + 1, page_size=page_size)
+
+    def create(i):
+        created.append(Owner.create(first_name='Created', last_name=str(i), email='created{}@super.cool'.format(i)))
+
+    def save(owner):
+        owner.last_name = 'Saved'
+        owner.save()
+
+    def touch_nested(pet):
+        return pet.owner.address, pet.toys
+
+    def nested_casting(page):
+        for pet in LazyPet.list(page=page % 10 + 1, page_size=page_size):
+            touch_nested(pet)
+
+    # (name, func, inputs factory): inputs are built right before running, so scenarios can depend on previous ones
+    return [
+        ('list_flat', list_page(FlatPet), lambda: pages),
+        ('list_nested', list_page(Pet), lambda: pages),
+        ('list_nested_lazy', list_page(LazyPet), lambda: pages),
+        ('list_nested_lazy_accessed', nested_casting, lambda: pages),
+        ('list_large', list_page(Large), lambda: range(1, max(3, operations // 10))),
+        ('retrieve', Pet.retrieve, lambda: identifiers),
+        ('retrieve_large', Large.retrieve, lambda: identifiers),
+        ('create', create, lambda: range(operations)),
+        ('update', lambda owner: Owner.update(owner.id, first_name='Updated'), lambda: created),
+        ('save', save, lambda: created),
+        ('delete', lambda owner: owner.destroy(), lambda: created),
+    ]
+
+
+def run(operations=200, page_size=100, scenarios=None):
+    server_process, base_api_url = start_server(size=max(1000, page_size * 10))
+    libs = build_libs(base_api_url)
+    try:
+        results = {}
+        for name, func, build_inputs in build_scenarios(libs, operations, page_size):
+            if scenarios and name not in scenarios:
+                continue
+            inputs = list(build_inputs())
+            if len(inputs) < 2:
+                print('Skipping {}: nothing to run it on (update, save and delete need create)'.format(name), file=sys.stderr)
+                continue
+            libs['Pet'].retrieve(1)  # Warms the (pooled) connection up
+            results[name] = measure(func, inputs)
+    finally:
+        server_process.terminate()
+        for lib_class in libs.values():
+            lib_class.close_session()
+
+    return {
+        'metadata': {
+            'version': get_lib_version(),
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'date': datetime.utcnow().isoformat() + 'Z',
+            'operations': operations,
+            'page_size': page_size,
+        },
+        'results': results,
+    }
+
+
+def print_table(report, file=sys.stdout):
+    columns = ['operations_per_second'] + ['p{}_ms'.format(percentile) for percentile in PERCENTILES] + ['peak_memory_mib']
+    print('{:<28}'.format('scenario') + ''.join('{:>24}'.format(column) for column in columns), file=file)
+    for name, stats in report['results'].items():
+        print('{:<28}'.format(name) + ''.join('{:>24.2f}'.format(stats[column]) for column in columns), file=file)
+
+
+def print_comparison(report, baseline, file=sys.stdout):
+    # Throughput ratio of every scenario against a previous JSON report (< 1 means slower than the baseline)
+    print('{:<28}{:>24}{:>24}{:>12}'.format('scenario', 'baseline ops/s', 'current ops/s', 'ratio'), file=file)
+    for name, stats in report['results'].items():
+        baseline_stats = baseline['results'].get(name)
+        if baseline_stats is None:
+            continue
+        before, after = baseline_stats['operations_per_second'], stats['operations_per_second']
+        print('{:<28}{:>24.2f}{:>24.2f}{:>12.2f}'.format(name, before, after, after / before), file=file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='End to end benchmarks against a local stand-in DRF API.')
+    parser.add_argument('--operations', type=int, default=200, help='operations per scenario')
+    parser.add_argument('--page-size', type=int, default=100, help='objects per listed page')
+    parser.add_argument('--scenarios', help='comma separated scenarios to run (default: all)')
+    parser.add_argument('--output', help='write the JSON report to this file ("-" for stdout)')
+    parser.add_argument('--compare', help='a previous JSON report to compare the throughput with')
+    args = parser.parse_args(argv)
+
+    scenarios = args.scenarios.split(',') if args.scenarios else None
+    report = run(operations=args.operations, page_size=args.page_size, scenarios=scenarios)
+
+    if args.output == '-':
+        json.dump(report, sys.stdout, indent=2)
+        return
+    print_table(report)
+    if args.compare:
+        with open(args.compare) as f:
+            print()
+            print_comparison(report, json.load(f))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+"""
+Local stand-in for a Django REST framework API, used by the benchmark suite (no network, no external service).
+
+Resources (in memory, pre-populated with `size` objects each):
+- /api/owners[/<id>]
+- /api/pets[/<id>]: every pet has a nested owner (with a nested address) and a list of nested toys
+- /api/large[/<id>]: wide objects with a long text field
+
+Collections are paginated as DRF PageNumberPagination does (?page=, ?page_size=) and support GET, POST, PATCH, PUT, DELETE.
+
+Usage (from the repository root): python -m benchmarks.stand_in_server [port] [size]
+"""
+import json
+import multiprocessing
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 10000
+
+
+def build_owner(i):
+    return {
+        'id': i, 'first_name': 'Owner', 'last_name': str(i), 'email': 'owner{}@super.cool'.format(i),
+        'address': {'street': 'Some street, {}'.format(i), 'city': 'Curitiba', 'country': 'BR'},
+    }
+
+
+def build_pet(i):
+    return {
+        'id': i, 'name': 'Pet {}'.format(i), 'species': 'dog' if i % 2 else 'cat', 'birth_date': '2015-10-21',
+        'is_vaccinated': bool(i % 3), 'weight': 10 + i % 30 / 3, 'owner': build_owner(i % 100),
+        'toys': [{'id': j, 'name': 'Toy {}'.format(j)} for j in range(3)],
+    }
+
+
+def build_large(i):
+    data = {'id': i, 'description': 'Lorem ipsum dolor sit amet. ' * 200}
+    data.update(('field_{}'.format(j), j * i) for j in range(100))
+    return data
+
+
+BUILDERS = {'owners': build_owner, 'pets': build_pet, 'large': build_large}
+
+
+class Database(object):
+    def __init__(self, size):
+        self.lock = threading.Lock()
+        self.tables = {name: {i: builder(i) for i in range(1, size + 1)} for name, builder in BUILDERS.items()}
+        self.next_ids = {name: size + 1 for name in BUILDERS}
+
+    def create(self, table, data):
+        with self.lock:
+            data = dict(data, id=self.next_ids[table])
+            self.next_ids[table] += 1
+            self.tables[table][data['id']] = data
+            return data
+
+
+class StandInRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # Keep-alive, as a real API behind a web server would do
+    disable_nagle_algorithm = True  # Headers and body are written separately: no delayed ACK stalls
+    database = None  # set by create_server
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status_code, data=None):
+        body = b'' if data is None else json.dumps(data).encode('utf-8')
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def read_payload(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if self.headers.get('Content-Type', '').startswith('application/json'):
+            return json.loads(body.decode('utf-8') or '{}')
+        return dict(parse_qsl(body.decode('utf-8')))
+
+    def resolve(self):
+        url = urlparse(self.path)
+        parts = [part for part in url.path.split('/') if part]
+        if len(parts) < 2 or parts[0] != 'api' or parts[1] not in BUILDERS or len(parts) > 3:
+            return None, None, url
+        identifier = int(parts[2]) if len(parts) == 3 and parts[2].isdigit() else None
+        return parts[1], identifier, url
+
+    def list(self, table, url):
+        query = dict(parse_qsl(url.query))
+        page = int(query.get('page', 1))
+        page_size = min(int(query.get('page_size', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        objects = list(self.database.tables[table].values())
+        start = (page - 1) * page_size
+
+        def page_url(number):
+            return 'http://{}:{}{}?{}'.format(*self.server.server_address, url.path, urlencode(dict(query, page=number)))
+
+        self.send_json(200, {
+            'count': len(objects),
+            'next': page_url(page + 1) if start + page_size < len(objects) else None,
+            'previous': page_url(page - 1) if page > 1 else None,
+            'results': objects[start:start + page_size],
+        })
+
+    def do_GET(self):
+        table, identifier, url = self.resolve()
+        if table is None:
+            return self.send_json(404, {'detail': 'Not found.'})
+        if identifier is None:
+            return self.list(table, url)
+        obj = self.database.tables[table].get(identifier)
+        if obj is None:
+            return self.send_json(404, {'detail': 'Not found.'})
+        self.send_json(200, obj)
+
+    def do_POST(self):
+        table, identifier, url = self.resolve()
+        if table is None or identifier is not None:
+            return self.send_json(404, {'detail': 'Not found.'})
+        self.send_json(201, self.database.create(table, self.read_payload()))
+
+    def do_PATCH(self):
+        table, identifier, url = self.resolve()
+        payload = self.read_payload()
+        obj = self.database.tables[table].get(identifier) if table else None
+        if obj is None:
+            return self.send_json(404, {'detail': 'Not found.'})
+        with self.database.lock:
+            obj.update(payload)
+        self.send_json(200, obj)
+
+    do_PUT = do_PATCH
+
+    def do_DELETE(self):
+        table, identifier, url = self.resolve()
+        with self.database.lock:
+            obj = self.database.tables[table].pop(identifier, None) if table else None
+        if obj is None:
+            return self.send_json(404, {'detail': 'Not found.'})
+        self.send_json(204)
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+def create_server(port=0, size=1000):
+    handler_class = type('StandInRequestHandler', (StandInRequestHandler, ), {'database': Database(size)})
+    return ThreadingHTTPServer(('127.0.0.1', port), handler_class)
+
+
+def serve(port, size, addresses):
+    server = create_server(port, size)
+    addresses.put(server.server_address)
+    server.serve_forever()
+
+
+def start_server(port=0, size=1000):
+    # Serves from another process (so the server neither competes for the GIL nor shows up in memory measurements).
+    # Returns the process (process.terminate() stops it) and the API base url.
+    addresses = multiprocessing.Queue()
+    process = multiprocessing.Process(target=serve, args=(port, size, addresses), daemon=True)
+    process.start()
+    return process, 'http://{}:{}/api'.format(*addresses.get(timeout=30))
+
+
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    server = create_server(port, size)
+    print('Serving at http://{}:{}/api (Ctrl+C to stop)'.format(*server.server_address))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from .core import RestApiLib
+from .datastructures import BatchItem, BatchResult
+from .iterators import AsyncListIterator
+from .mixins import CreateMixin, DeleteMixin, ListMixin, RetrieveMixin, UpdateMixin
+from .sessions import get_method_name
+from .utils import chunked
+
+
+class AsyncTransport(object):
+    # send() takes the place of lib_class.send_request: conditional requests, coalescing, retries, rate limiting and circuit
+    # breaking only apply if the transport goes through it (as ExecutorTransport does).
+    async def send(self, lib_class, method, url, **kwargs):
+        raise NotImplementedError('Async transports must implement send().')
+
+    def close(self):
+        pass
+
+
+class ExecutorTransport(AsyncTransport):
+    # Runs the (pooled, session-based) sync request path in a thread pool, so the event loop is never blocked.
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers
+        self._executor = None
+
+    def get_executor(self):
+        if self._executor is None and self.max_workers:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        return self._executor  # None means the event loop default executor
+
+    async def send(self, lib_class, method, url, **kwargs):
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(self.get_executor(), functools.partial(lib_class.send_request, method, url, **kwargs))
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+class AsyncRestApiLib(RestApiLib):
+    async_transport = ExecutorTransport()  # any AsyncTransport instance
+
+    @classmethod
+    def get_async_transport(cls):
+        return cls.async_transport
+
+    @classmethod
+    async def request(cls, method, url, **kwargs):
+        with cls.instrument('request', method=get_method_name(method), url=url) as span:
+            with cls.instrument('prepare_requests_call'):
+                kwargs = cls.prepare_requests_call(**kwargs)
+
+            try:
+                response = await cls.get_async_transport().send(cls, method, url, **kwargs)
+                if span is not None:
+                    span.data.update(status_code=response.status_code, response_bytes=cls.get_response_size(response))
+                response.raise_for_status()
+                return response
+            except Exception as e:
+                return cls.handle_request_exception(e, method, url, request_kwargs=kwargs)
+
+    def load_projected_out_fields(self):
+        # Attribute access can not be awaited: fields left out by only()/defer() are never lazily loaded by async libs
+        raise AttributeError('projection_lazy_load is not available on async libs: retrieve the object instead.')
+
+    @classmethod
+    async def cached_request(cls, method, url, cache_scope, **kwargs):
+        if cls.cache_backend is None:
+            return await cls.request(method, url, **kwargs)
+
+        cache_key = cls.get_cache_key(method, url, cache_scope)
+        response = cls.cache_backend.fetch(cache_key)
+        if response is None:
+            response = await cls.request(method, url, **kwargs)
+            if 200 <= response.status_code < 300:
+                cls.cache_backend.set(cache_key, response, ttl=cls.cache_ttl)
+        return response
+
+    @classmethod
+    async def run_batch(cls, func, items, max_concurrency=None, lazy=False):
+        # Awaits func(item) for every item, max_concurrency at a time (workers pull items lazily, so generators are fine).
+        # Every result is matched with its input, in input order. Results are always gathered in a BatchResult (no lazy).
+        if lazy:
+            raise NotImplementedError('Async batches can not be lazy: await them to get a BatchResult.')
+        items = enumerate(items)
+        batch_items = {}
+
+        async def worker():
+            for index, item in items:  # Shared by the workers: each one takes the next input
+                try:
+                    result = await func(item)
+                except Exception as e:
+                    result = e
+                batch_items[index] = BatchItem(item, result)
+
+        await asyncio.gather(*[worker() for _ in range(max_concurrency or cls.max_concurrency)])
+        return BatchResult(batch_items[index] for index in range(len(batch_items)))
+
+    @classmethod
+    async def run_bulk_batch(cls, func, items, max_concurrency=None, lazy=False):
+        cls.check_bulk_payload_mode()
+        chunk_items = await cls.run_batch(func, chunked(items, cls.bulk_chunk_size), max_concurrency=max_concurrency, lazy=lazy)
+        return BatchResult(cls.split_bulk_results(chunk_items))
+
+    @classmethod
+    def download(cls, method, url, **kwargs):
+        raise NotImplementedError('Downloads (download, stream=True, destination=...) are not available on async libs.')
+
+    @classmethod
+    async def call_endpoint(cls, method, url, **outer_kwargs):
+        if outer_kwargs.get('stream') or outer_kwargs.get('destination') is not None:
+            return cls.download(method, url, **outer_kwargs)
+        instance_class = outer_kwargs.pop('instance_class', None)
+        many = outer_kwargs.pop('many', False)
+
+        with cls.instrument('call_endpoint', method=get_method_name(method), url=url):
+            response = await cls.request(method, url, **outer_kwargs)
+            if instance_class:
+                return cls.prepare_response(response, instance_class, many=many)
+            return response
+
+
+class AsyncListMixin(ListMixin):
+    list_iterator_class = AsyncListIterator  # async for obj in Lib.iter_all()
+
+    @classmethod
+    def iter_stream(cls, **kwargs):
+        raise NotImplementedError('iter_stream is not available on async libs: use iter_all (async for) instead.')
+
+    @classmethod
+    async def list(cls, **kwargs):
+        url = cls.build_list_url(**kwargs)
+        response = await cls.cached_request(requests.get, url, 'list')
+        return cls.process_list_response(response)
+
+
+class AsyncCreateMixin(CreateMixin):
+    @classmethod
+    async def create(cls, **kwargs):
+        outer_kwargs = {cls.create_payload_mode: kwargs}
+        response = await cls.request(requests.post, cls.get_create_url(), **outer_kwargs)
+        cls.invalidate_cache()
+        return cls.process_create_response(response)
+
+    @classmethod
+    async def bulk_create(cls, objects):
+        outer_kwargs = cls.get_bulk_payload_kwargs(cls.get_bulk_create_payload(objects))
+        response = await cls.request(requests.post, cls.get_bulk_create_url(), **outer_kwargs)
+        cls.invalidate_cache()
+        return cls.process_bulk_create_response(response)
+
+    async def save(self):
+        if not(self._existing_instance):
+            return await self.create(**self._changed_data)
+        return await self.update(self.get_identifier(), **self._changed_data)
+
+
+class AsyncRetrieveMixin(RetrieveMixin):
+    @classmethod
+    async def retrieve(cls, identifier):
+        response = await cls.cached_request(requests.get, cls.build_retrieve_url(identifier), 'object:{}'.format(identifier))
+        return cls.process_retrieve_response(response)
+
+    @classmethod
+    async def retrieve_many(cls, identifiers, max_concurrency=None):
+        semaphore = asyncio.Semaphore(max_concurrency or cls.max_concurrency)
+
+        async def retrieve(identifier):
+            async with semaphore:
+                try:
+                    return await cls.retrieve(identifier)
+                except Exception as e:
+                    return e
+
+        return await asyncio.gather(*[retrieve(identifier) for identifier in identifiers])
+
+
+class AsyncUpdateMixin(UpdateMixin):
+    @classmethod
+    async def update(cls, identifier, **kwargs):
+        outer_kwargs = {cls.update_payload_mode: kwargs}
+        response = await cls.request(requests.patch, cls.get_update_url(identifier), **outer_kwargs)
+        cls.invalidate_cache(identifier)
+        return cls.process_update_response(response)
+
+    @classmethod
+    async def bulk_update(cls, objects):
+        objects = list(objects)
+        outer_kwargs = cls.get_bulk_payload_kwargs(cls.get_bulk_update_payload(objects))
+        response = await cls.request(requests.patch, cls.get_bulk_update_url(), **outer_kwargs)
+        for identifier, _ in objects:
+            cls.invalidate_cache(identifier)
+        return cls.process_bulk_update_response(response)
+
+    async def save(self):
+        if not(self._existing_instance):
+            return await self.create(**self._changed_data)
+        return await self.update(self.get_identifier(), **self._changed_data)
+
+
+class AsyncDeleteMixin(DeleteMixin):
+    @classmethod
+    async def delete(cls, identifier):
+        response = await cls.request(requests.delete, cls.get_delete_url(identifier))
+        cls.invalidate_cache(identifier)
+        return cls.process_delete_response(response)
+
+    async def destroy(self):
+        return await self.delete(self.get_identifier())
+
+
+class AsyncViewsetRestApiLib(AsyncListMixin, AsyncCreateMixin, AsyncRetrieveMixin, AsyncUpdateMixin, AsyncDeleteMixin,
+                             AsyncRestApiLib):
+    pass
@@ -0,0 +1,180 @@
+"""
+Micro-benchmarks of the pure python hot paths (no network at all): instances creation (__init__/init_existing_object),
+change tracking (__setattr__), payload rewriting (prepare_requests_call), add_querystring_to_url and get_pretty_identifier,
+fed with synthetic response shapes (wide, deep and long lists).
+
+Usage: python -m rest_api_lib_creator.bench [-k init] [--min-time 0.5] [--json] [--profile DIR] [--tracemalloc DIR]
+"""
+import argparse
+import cProfile
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections import OrderedDict
+
+from .core import RestApiLib
+from .utils import add_querystring_to_url
+
+
+class Item(RestApiLib):
+    pretty_identifier = '{name} ({id})'
+
+
+class Node(RestApiLib):
+    pass
+
+
+Node.nested_objects = {'child': Node}
+
+
+class Wide(RestApiLib):
+    pretty_identifier = '{field_0} {field_1} {field_2} ({id})'
+
+
+class WithList(RestApiLib):
+    nested_objects = {'items': Item}
+
+
+def build_wide(width=200):
+    data = {'id': 1}
+    data.update(('field_{}'.format(i), 'value {}'.format(i)) for i in range(width))
+    return data
+
+
+def build_deep(depth=20):
+    data = {'id': depth, 'name': 'Node {}'.format(depth)}
+    for level in reversed(range(depth)):
+        data = {'id': level, 'name': 'Node {}'.format(level), 'child': data}
+    return data
+
+
+def build_long_list(length=1000):
+    return {'id': 1, 'items': [{'id': i, 'name': 'Item {}'.format(i), 'price': i * 1.5} for i in range(length)]}
+
+
+SHAPES = OrderedDict([
+    ('wide', (Wide, build_wide)),
+    ('deep', (Node, build_deep)),
+    ('long_list', (WithList, build_long_list)),
+])
+
+
+def build_benchmarks():
+    # name -> callable running one operation (whatever it builds is returned, so retained memory can be measured)
+    benchmarks = OrderedDict()
+
+    for shape, (lib_class, build) in SHAPES.items():
+        data = build()
+        benchmarks['init_existing_object[{}]'.format(shape)] = lambda lib_class=lib_class, data=data: \
+            lib_class.init_existing_object(**data)
+        benchmarks['init_new[{}]'.format(shape)] = lambda lib_class=lib_class, data=data: lib_class(**data)
+
+    wide = Wide.init_existing_object(**build_wide())
+    wide_values = list(build_wide().items())[:50]
+
+    def setattr_tracking():
+        for name, value in wide_values:
+            setattr(wide, name, value)
+        wide._changed_data.clear()
+
+    benchmarks['setattr_tracking[50 fields]'] = setattr_tracking
+
+    owner = Item.init_existing_object(id='owner-id', name='Owner')
+    payload = dict(build_wide(50), owner=owner, friend=owner)
+    bulk_payload = [dict(build_wide(10), owner=owner) for _ in range(100)]
+    benchmarks['prepare_requests_call[data]'] = lambda: RestApiLib.prepare_requests_call(data=dict(payload))
+    benchmarks['prepare_requests_call[json]'] = lambda: RestApiLib.prepare_requests_call(json=dict(payload))
+    benchmarks['prepare_requests_call[bulk 100]'] = lambda: RestApiLib.prepare_requests_call(json=bulk_payload)
+
+    query_params = {'param_{}'.format(i): 'value {}'.format(i) for i in range(10)}
+    benchmarks['add_querystring_to_url[1 param]'] = lambda: add_querystring_to_url('http://super.cool/api/pets', page=2)
+    benchmarks['add_querystring_to_url[10 params]'] = lambda: add_querystring_to_url(
+        'http://super.cool/api/pets?type=dog&page=1', **query_params
+    )
+
+    item = Item.init_existing_object(id=1, name='Item 1')
+    benchmarks['get_pretty_identifier[simple]'] = item.get_pretty_identifier
+    benchmarks['get_pretty_identifier[wide]'] = wide.get_pretty_identifier
+    return benchmarks
+
+
+def run_benchmark(func, min_time=0.2, profile_path=None, tracemalloc_path=None):
+    # ops/s: func is called in batches (doubling its size) until min_time is reached. Memory: a single traced call.
+    tracemalloc.start(25 if tracemalloc_path else 1)
+    result = func()
+    retained, peak = tracemalloc.get_traced_memory()
+    if tracemalloc_path:
+        tracemalloc.take_snapshot().dump(tracemalloc_path)
+    tracemalloc.stop()
+    del result
+
+    profiler = cProfile.Profile() if profile_path else None
+    operations = 0
+    batch = 1
+    elapsed = 0
+    while not(operations) or elapsed < min_time:
+        if profiler:
+            profiler.enable()
+        start = time.perf_counter()
+        for _ in range(batch):
+            func()
+        elapsed += time.perf_counter() - start
+        if profiler:
+            profiler.disable()
+        operations += batch
+        batch *= 2
+
+    if profiler:
+        profiler.dump_stats(profile_path)
+
+    return OrderedDict([
+        ('operations', operations),
+        ('ops_per_second', operations / elapsed),
+        ('us_per_op', elapsed / operations * 1e6),
+        ('peak_bytes_per_op', peak),
+        ('retained_bytes_per_op', retained),
+    ])
+
+
+def get_dump_path(directory, name, extension):
+    if not(directory):
+        return None
+    os.makedirs(directory, exist_ok=True)
+    filename = ''.join(char if char.isalnum() or char in '_-' else '_' for char in name).strip('_')
+    return os.path.join(directory, '{}.{}'.format(filename, extension))
+
+
+def main(argv=None, file=None):
+    file = file or sys.stdout
+    parser = argparse.ArgumentParser(prog='python -m rest_api_lib_creator.bench', description=__doc__.strip().split('\n\n')[0])
+    parser.add_argument('-k', '--keyword', help='only run benchmarks whose name contains this')
+    parser.add_argument('--min-time', type=float, default=0.2, help='minimum seconds spent on each benchmark')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    parser.add_argument('--profile', metavar='DIR', help='dump cProfile stats (<benchmark>.prof) into this directory')
+    parser.add_argument('--tracemalloc', metavar='DIR', help='dump tracemalloc snapshots (<benchmark>.tracemalloc) into this dir')
+    args = parser.parse_args(argv)
+
+    results = OrderedDict()
+    if not(args.json):
+        print('{:<36}{:>14}{:>12}{:>14}{:>16}'.format('benchmark', 'ops/s', 'us/op', 'peak B/op', 'retained B/op'), file=file)
+
+    for name, func in build_benchmarks().items():
+        if args.keyword and args.keyword not in name:
+            continue
+        stats = results[name] = run_benchmark(
+            func, args.min_time, get_dump_path(args.profile, name, 'prof'), get_dump_path(args.tracemalloc, name, 'tracemalloc'),
+        )
+        if not(args.json):
+            print('{:<36}{:>14.0f}{:>12.2f}{:>14}{:>16}'.format(
+                name, stats['ops_per_second'], stats['us_per_op'], stats['peak_bytes_per_op'], stats['retained_bytes_per_op'],
+            ), file=file)
+
+    if args.json:
+        json.dump(results, file, indent=2)
+    return results
+
+
+if __name__ == '__main__':
+    main()
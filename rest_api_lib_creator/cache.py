@@ -0,0 +1,88 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class CacheBackend(object):
+    # Interface for response caches: get() returns None on a miss. Any store able to keep (picklable) responses around
+    # (a local file, redis, memcached...) can implement it.
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def get(self, key):
+        raise NotImplementedError('Cache backends must implement get().')
+
+    def set(self, key, value, ttl=None):
+        raise NotImplementedError('Cache backends must implement set().')
+
+    def delete(self, key):
+        raise NotImplementedError('Cache backends must implement delete().')
+
+    def clear(self):
+        raise NotImplementedError('Cache backends must implement clear().')
+
+    def fetch(self, key):
+        # get() + hit/miss accounting
+        value = self.get(key)
+        with self._stats_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def get_stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+class InMemoryCache(CacheBackend):
+    def __init__(self, max_size=1024, ttl=None):
+        super(InMemoryCache, self).__init__()
+        self.max_size = max_size  # least recently used entries are evicted past this size
+        self.ttl = ttl  # default ttl in seconds (None means entries only go away by eviction)
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = None if ttl is None else time.monotonic() + ttl
+
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        stats = super(InMemoryCache, self).get_stats()
+        stats.update({'size': len(self._entries), 'evictions': self.evictions})
+        return stats
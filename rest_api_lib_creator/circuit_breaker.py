@@ -0,0 +1,129 @@
+import threading
+import time
+
+from requests.exceptions import ConnectionError, RequestException, Timeout
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+class CircuitBreakerOpen(RequestException):
+    pass
+
+
+class CircuitBreaker(object):
+    # closed: calls go through, `failure_threshold` consecutive failures (given status codes / exceptions) open the circuit.
+    # open: calls fail fast (CircuitBreakerOpen) for `recovery_timeout` seconds, then the circuit is half-open.
+    # half-open: up to `half_open_max_calls` trial calls go through; a success closes the circuit, a failure opens it again.
+    def __init__(self, failure_threshold=5, recovery_timeout=30, half_open_max_calls=1, failure_status_codes=(500, 502, 503, 504),
+                 failure_exceptions=(ConnectionError, Timeout), name=None):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.failure_status_codes = frozenset(failure_status_codes)
+        self.failure_exceptions = tuple(failure_exceptions)
+        self.name = name
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._half_open_calls = 0
+        self._metrics = {'calls': 0, 'successes': 0, 'failures': 0, 'rejected': 0, 'opened': 0}
+        self._lock = threading.Lock()
+
+    def _get_state(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._state = HALF_OPEN
+            self._half_open_calls = 0
+        return self._state
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._get_state()
+
+    def _open(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._metrics['opened'] += 1
+
+    def before_call(self):
+        with self._lock:
+            state = self._get_state()
+            if state == OPEN or (state == HALF_OPEN and self._half_open_calls >= self.half_open_max_calls):
+                self._metrics['rejected'] += 1
+                raise CircuitBreakerOpen('Circuit breaker {} is {}: failing fast.'.format(self.name or '', state))
+            if state == HALF_OPEN:
+                self._half_open_calls += 1
+            self._metrics['calls'] += 1
+
+    def record_success(self):
+        with self._lock:
+            self._metrics['successes'] += 1
+            if self._state != OPEN:  # Calls started before the circuit was opened do not close it
+                self._failures = 0
+                self._state = CLOSED
+
+    def record_ignored(self):
+        # Neither a success nor a failure: a half-open trial slot is given back
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._half_open_calls = max(0, self._half_open_calls - 1)
+
+    def record_failure(self):
+        with self._lock:
+            self._metrics['failures'] += 1
+            self._failures += 1
+            if self._state == HALF_OPEN or (self._state == CLOSED and self._failures >= self.failure_threshold):
+                self._open()
+
+    def call(self, func, *args, **kwargs):
+        self.before_call()
+        try:
+            response = func(*args, **kwargs)
+        except self.failure_exceptions:
+            self.record_failure()
+            raise
+        except Exception:
+            self.record_ignored()  # Not a backend health issue (an invalid url, for instance)
+            raise
+
+        if response.status_code in self.failure_status_codes:
+            self.record_failure()
+        else:
+            self.record_success()
+        return response
+
+    def get_metrics(self):
+        with self._lock:
+            metrics = dict(self._metrics)
+            metrics.update({'state': self._get_state(), 'consecutive_failures': self._failures})
+            return metrics
+
+
+class CircuitBreakerRegistry(object):
+    def __init__(self):
+        self._circuit_breakers = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._circuit_breakers)
+
+    def get(self, key, factory=CircuitBreaker, **factory_kwargs):
+        with self._lock:
+            circuit_breaker = self._circuit_breakers.get(key)
+            if circuit_breaker is None:
+                circuit_breaker = self._circuit_breakers[key] = factory(**factory_kwargs)
+            return circuit_breaker
+
+    def get_metrics(self):
+        with self._lock:
+            circuit_breakers = list(self._circuit_breakers.values())
+        return {circuit_breaker.name: circuit_breaker.get_metrics() for circuit_breaker in circuit_breakers}
+
+    def clear(self):
+        with self._lock:
+            self._circuit_breakers.clear()
+
+
+circuit_breakers = CircuitBreakerRegistry()
@@ -0,0 +1,124 @@
+_MISSING = object()
+
+
+class FieldDescriptor(object):
+    def __init__(self, name, index):
+        self.name = name
+        self.index = index
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        value = instance._values[self.index]
+        if value is _MISSING:
+            lazy_nested_data = instance.__dict__.get('_lazy_nested_data')
+            if lazy_nested_data and self.name in lazy_nested_data:
+                return instance.materialize_nested_object(self.name)
+            return instance.get_projected_out_field(self.name)
+        return value
+
+    def __set__(self, instance, value):
+        instance._values[self.index] = value
+
+
+class CompactMixin(object):
+    # Opt-in memory saving representation for libs with a declared `fields` schema: values of declared fields are kept
+    # once, in a per-instance list (served by class level descriptors), undeclared fields go to a dict created on demand,
+    # and change tracking storage is only created on the first write.
+    # Usage: class Pet(CompactMixin, ViewsetRestApiLib): fields = ('id', 'name', ...)
+
+    @classmethod
+    def get_field_schema(cls):
+        schema = cls.__dict__.get('_field_schema')
+        if schema is None:
+            if not(cls.fields):
+                raise ValueError('CompactMixin requires the lib class to declare its fields.')
+            schema = {name: index for index, name in enumerate(cls.fields)}
+            for name, index in schema.items():
+                setattr(cls, name, FieldDescriptor(name, index))
+            cls._field_schema = schema
+        return schema
+
+    def __init__(self, **kwargs):
+        schema = self.get_field_schema()
+        set_attribute = object.__setattr__
+        set_attribute(self, '_meta', kwargs.pop('meta', None))
+        set_attribute(self, '_existing_instance', kwargs.pop('_existing_instance', False))
+
+        values = [_MISSING] * len(schema)
+        extra_values = None
+        nested_objects = self.nested_objects or {}
+        lazy_nested_objects = self.lazy_nested_objects and self._existing_instance
+
+        for k, v in kwargs.items():
+            if k in nested_objects and lazy_nested_objects:
+                if '_lazy_nested_data' not in self.__dict__:
+                    set_attribute(self, '_lazy_nested_data', {})
+                self._lazy_nested_data[k] = v
+                continue
+            if k in nested_objects:
+                v = self.cast_nested_object(k, v)
+            index = schema.get(k)
+            if index is None:
+                if extra_values is None:
+                    extra_values = {}
+                extra_values[k] = v
+            else:
+                values[index] = v
+
+        set_attribute(self, '_values', values)
+        set_attribute(self, '_extra_values', extra_values)
+        set_attribute(self, '_compact_changed_data', None if self._existing_instance else dict(self._instance_data))
+
+    def store_value(self, name, value):
+        index = self.get_field_schema().get(name)
+        if index is not None:
+            self._values[index] = value
+        else:
+            if self._extra_values is None:
+                object.__setattr__(self, '_extra_values', {})
+            self._extra_values[name] = value
+
+    def materialize_nested_object(self, name):
+        value = self.cast_nested_object(name, self._lazy_nested_data.pop(name))
+        self.store_value(name, value)
+        return value
+
+    def __getattr__(self, name):
+        # Only called when regular lookup fails, i.e. for undeclared fields (and fields left out by only()/defer())
+        lazy_nested_data = self.__dict__.get('_lazy_nested_data')
+        if lazy_nested_data and name in lazy_nested_data:
+            return self.materialize_nested_object(name)
+
+        extra_values = self.__dict__.get('_extra_values')
+        if extra_values and name in extra_values:
+            return extra_values[name]
+        return self.get_projected_out_field(name)
+
+    def __setattr__(self, name, value):
+        if name.startswith('_'):
+            return object.__setattr__(self, name, value)
+
+        self.store_value(name, value)
+
+        lazy_nested_data = self.__dict__.get('_lazy_nested_data')
+        if lazy_nested_data:
+            lazy_nested_data.pop(name, None)
+
+        if self._compact_changed_data is None:
+            object.__setattr__(self, '_compact_changed_data', {})
+        self._compact_changed_data[name] = value
+
+    @property
+    def _instance_data(self):
+        data = {name: self._values[index] for name, index in self.get_field_schema().items() if self._values[index] is not _MISSING}
+        if self._extra_values:
+            data.update(self._extra_values)
+        data.update(self.__dict__.get('_lazy_nested_data') or {})
+        return data
+
+    @property
+    def _changed_data(self):
+        if self._compact_changed_data is None:
+            return {}
+        return self._compact_changed_data
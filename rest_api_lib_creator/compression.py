@@ -0,0 +1,91 @@
+import gzip
+
+from urllib3.util.request import ACCEPT_ENCODING
+
+
+class CompressionCodec(object):
+    name = None  # the http content-coding (Content-Encoding / Accept-Encoding token)
+    default_level = None
+
+    def compress(self, data, level=None):
+        raise NotImplementedError('Compression codecs must implement compress().')
+
+    def decompress(self, data):
+        raise NotImplementedError('Compression codecs must implement decompress().')
+
+
+class GzipCodec(CompressionCodec):
+    name = 'gzip'
+    default_level = 6  # Way faster than 9 (gzip module default) for nearly the same ratio on JSON
+
+    def compress(self, data, level=None):
+        return gzip.compress(data, compresslevel=self.default_level if level is None else level)
+
+    def decompress(self, data):
+        return gzip.decompress(data)
+
+
+class BrotliCodec(CompressionCodec):
+    name = 'br'
+    default_level = 5  # 11 (brotli default) is meant for static assets compressed once, way too slow per request
+
+    def __init__(self):
+        import brotli
+        self._brotli = brotli
+
+    def compress(self, data, level=None):
+        return self._brotli.compress(data, quality=self.default_level if level is None else level)
+
+    def decompress(self, data):
+        return self._brotli.decompress(data)
+
+
+class ZstdCodec(CompressionCodec):
+    name = 'zstd'
+    default_level = 3
+
+    def __init__(self):
+        import zstandard
+        self._zstandard = zstandard
+
+    def compress(self, data, level=None):
+        return self._zstandard.ZstdCompressor(level=self.default_level if level is None else level).compress(data)
+
+    def decompress(self, data):
+        return self._zstandard.ZstdDecompressor().decompressobj().decompress(data)  # Frames may not carry their size
+
+
+CODEC_CLASSES_BY_PREFERENCE = (ZstdCodec, BrotliCodec, GzipCodec)
+_available_compression_codecs = None
+
+
+def get_available_compression_codecs():
+    # Installed codecs, the best one first (gzip is always there)
+    global _available_compression_codecs
+    if _available_compression_codecs is None:
+        codecs = []
+        for codec_class in CODEC_CLASSES_BY_PREFERENCE:
+            try:
+                codecs.append(codec_class())
+            except ImportError:
+                pass
+        _available_compression_codecs = codecs
+    return _available_compression_codecs
+
+
+def get_compression_codec(codec):
+    # A CompressionCodec instance or the name of an installed one ('gzip', 'br', 'zstd')
+    if isinstance(codec, CompressionCodec):
+        return codec
+    for available_codec in get_available_compression_codecs():
+        if available_codec.name == codec:
+            return available_codec
+    raise ValueError('Unknown or not installed compression codec: {!r} (brotli and zstd need the brotli and zstandard '
+                     'packages).'.format(codec))
+
+
+def get_accept_encoding():
+    # Content-codings responses can be decoded with here (by urllib3, which needs the same optional packages), best first
+    decodable = {name.strip() for name in ACCEPT_ENCODING.split(',')}
+    names = [codec.name for codec in get_available_compression_codecs() if codec.name in decodable]
+    return ', '.join(names + ['deflate'])
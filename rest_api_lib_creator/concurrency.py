@@ -0,0 +1,45 @@
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+def iter_concurrently(func, items, max_workers, read_ahead=None, ordered=True):
+    # Calls func(item) in a thread pool and yields (position, item, future) for every item.
+    # `items` is consumed lazily: never more than `read_ahead` (default: max_workers) futures are pending, which gives
+    # backpressure for huge (or infinite) generators. With ordered=False results are yielded as they complete.
+    read_ahead = max(read_ahead or max_workers, 1)
+    items = enumerate(items)
+    pending = deque()
+
+    def submit_next(executor):
+        for position, item in items:
+            pending.append((position, item, executor.submit(func, item)))
+            return True
+        return False
+
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        while len(pending) < read_ahead and submit_next(executor):
+            pass
+
+        while pending:
+            if ordered:
+                yield pending.popleft()
+            else:
+                wait([future for _, _, future in pending], return_when=FIRST_COMPLETED)
+                for entry in [entry for entry in pending if entry[2].done()]:
+                    pending.remove(entry)
+                    yield entry
+
+            while len(pending) < read_ahead and submit_next(executor):
+                pass
+    finally:
+        for _, _, future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+def map_concurrently(func, items, max_workers, read_ahead=None, ordered=True):
+    # Same as iter_concurrently but yields (item, result): when func(item) raises, the exception itself is the result.
+    for _, item, future in iter_concurrently(func, items, max_workers, read_ahead=read_ahead, ordered=ordered):
+        exception = future.exception()
+        yield item, (exception if exception is not None else future.result())
@@ -0,0 +1,55 @@
+CONSTRUCTOR_TEMPLATE = '''
+def construct(data, meta=None):
+    # `data` must be a dict owned by the new instance (it becomes its _instance_data)
+    if not(reserved_names.isdisjoint(data)):
+        meta = data.pop('meta', meta)
+        return lib_class(_existing_instance=True, meta=meta, **data)
+{nested_casts}
+    instance = new(lib_class)
+    # Same attributes, in the same order, as __init__ sets them (never through instance.__dict__): that keeps the
+    # instances sharing their attribute keys, as regular ones do, instead of each one getting its own full dict
+    set_attribute(instance, '_meta', meta)
+    set_attribute(instance, '_existing_instance', True)
+    set_attribute(instance, '_track_object_changes', True)
+    set_attribute(instance, '_nested_objects', nested_objects)
+    set_attribute(instance, '_instance_data', data)
+    set_attribute(instance, '_changed_data', {{}})
+    for name, value in data.items():
+        set_attribute(instance, name, value)
+    return instance
+'''
+
+NESTED_CAST_TEMPLATE = '''
+    if {name!r} in data:
+        data[{name!r}] = cast({name!r}, data[{name!r}])
+'''
+
+
+def get_data_descriptor_names(lib_class):
+    # Fields shadowed by class level properties (and alike) must go through setattr, so they are never written directly
+    return frozenset(
+        name for klass in lib_class.__mro__ for name, value in vars(klass).items()
+        if not(name.startswith('__')) and hasattr(type(value), '__set__')
+    )
+
+
+def compile_constructor(lib_class, base_class):
+    # Generates (once per lib class) a function building fetched instances straight into their __dict__, with the nested
+    # objects casts unrolled: the very same instance `base_class.__init__(_existing_instance=True, ...)` would build.
+    # Returns None when the class customizes how instances are built, so the regular __init__ must be used.
+    if lib_class.__init__ is not base_class.__init__ or lib_class.__setattr__ is not base_class.__setattr__ or \
+            lib_class.__new__ is not object.__new__ or lib_class.lazy_nested_objects:
+        return None
+
+    nested_objects = lib_class.nested_objects or {}
+    source = CONSTRUCTOR_TEMPLATE.format(nested_casts=''.join(NESTED_CAST_TEMPLATE.format(name=name) for name in nested_objects))
+    namespace = {
+        'lib_class': lib_class,
+        'new': object.__new__,
+        'set_attribute': object.__setattr__,
+        'cast': lib_class.cast_nested_object,
+        'nested_objects': nested_objects,
+        'reserved_names': get_data_descriptor_names(lib_class) | {'meta', '_existing_instance'},
+    }
+    exec(compile(source, '<{} constructor>'.format(lib_class.__name__), 'exec'), namespace)
+    return namespace['construct']
@@ -1,11 +1,30 @@
+import copy
+import hashlib
+import uuid
+from contextlib import contextmanager
 from io import IOBase
+from urllib.parse import urlparse
 
+import requests
 from requests.exceptions import HTTPError
-
-from .datastructures import Meta, metalist
+from requests.models import RequestEncodingMixin
+
+from .cache import InMemoryCache
+from .circuit_breaker import circuit_breakers
+from .compression import get_accept_encoding, get_compression_codec
+from .concurrency import map_concurrently
+from .constructors import compile_constructor
+from .datastructures import BatchItem, BatchResult, Meta, UnhandledResponse, metalist
+from .downloads import Download, get_destination_size, get_range_header, is_already_downloaded
+from .instrumentation import NO_SPAN, Span
+from .json_codecs import StdlibJsonCodec, get_default_json_codec
 from .mixins import CreateMixin, DeleteMixin, ListMixin, RetrieveMixin, UpdateMixin
-from .pagination_classes import DRFPageNumberPagination
-from .utils import should_iterate
+from .multipart import MultipartEncoder
+from .pagination_classes import DRFPageNumberPagination, NoPagination
+from .sessions import get_method_name, session_pool
+from .singleflight import SingleFlight
+from .throttling import rate_limiters
+from .utils import chunked, get_identity, is_utf8_encoding, should_iterate
 
 
 class OnException(object):
@@ -20,15 +39,38 @@ class OnException(object):
         return OnException.reraise(exc)
 
 
+_projection_classes = {}
+
+
 class RestApiLib(object):
     base_api_url = None  # 'https://my.super.service/api/users'...
     instance_url = '{base_api_url}/{identifier}'
 
     nested_objects = None  # dictionary used to parse/cast response raw data into another RestApiLib objects
+    lazy_nested_objects = False  # if True nested objects of fetched instances are only cast when first accessed
+
+    only_fields = None  # set by .only(...): the only fields requested to the API (and kept in the instances)
+    deferred_fields = None  # set by .defer(...): fields not requested to the API (nor kept in the instances)
+    only_query_param = 'fields'  # querystring parameter used to ask the API for some fields only
+    defer_query_param = 'omit'  # querystring parameter used to ask the API to omit some fields
+    projection_lazy_load = False  # if True accessing a field left out by only()/defer() retrieves the whole object once
+    projection_base_class = None  # the lib class only()/defer() were called on
     use_str_in_place_of_repr = False  # if True __repr__ will use __str__ to render output (which sometimes is handy for debugging)
 
     identifier_field = 'id'  # 'id', 'pk', 'uuid'...
     pretty_identifier = '{id}'  # '{id}', '{first_name} {last_name}', 'message from {source} to {target}'...
+    fields = None  # optional declared field schema: ('id', 'name', ...). Required by CompactMixin
+    compile_constructors = True  # if True (and fields are declared) fetched instances are built by a per class compiled constructor
+
+    streaming_uploads = False  # if True files are sent in a streaming multipart body (read in chunks, never fully in memory)
+    streaming_uploads_chunked = False  # if True streaming uploads use Transfer-Encoding: chunked instead of a Content-Length
+    streaming_uploads_chunk_size = 64 * 1024  # bytes read from the files at a time by streaming uploads
+    upload_progress_callback = None  # callable(bytes_sent, total_bytes or None) called as streaming uploads are sent
+    download_chunk_size = 64 * 1024  # bytes read from the socket at a time by streamed call_endpoint/download calls
+
+    request_compression = None  # 'gzip', 'br', 'zstd' (or a CompressionCodec) compressing request bodies; None sends them as is
+    request_compression_threshold = 1024  # bodies smaller than this (in bytes) are not worth compressing
+    request_compression_level = None  # codec specific (e.g. 1-9 for gzip); None means the codec default
 
     request_headers = None  # None is the default for requests library
     request_timeout = None  # None is the default for requests library
@@ -36,19 +78,66 @@ class RestApiLib(object):
 
     on_exception = OnException.reraise  # OnException.reraise or OnException.return_response or any other callable you want
 
+    json_codec = None  # a JsonCodec instance used to encode 'json' payloads and decode responses (None: fastest installed one)
+
     pagination_class = DRFPageNumberPagination
 
+    use_session = True  # if False every call goes through module-level requests functions (a new connection per call)
+    session_pool_key = 'base_api_url'  # 'base_api_url', 'host' or 'class': which libs share the same pooled session
+    session_pool_connections = 10  # number of per-host connection pools kept by the session
+    session_pool_maxsize = 10  # max connections kept alive per host
+    session_pool_block = False  # if True never open more than session_pool_maxsize connections per host
+    session_keep_alive = True  # if False 'Connection: close' is sent and connections are not reused
+    session_persist_cookies = False  # if True cookies set by responses are kept by the (shared) session and sent on later calls
+
+    max_concurrency = 10  # default number of simultaneous requests for batch operations (retrieve_many, create_many...)
+    batch_read_ahead = None  # max inputs pulled from the iterable ahead of the results (defaults to the concurrency)
+
+    bulk_chunk_size = 100  # objects sent per request to bulk endpoints (bulk_create_url, bulk_update_url)
+    bulk_payload_mode = 'json'  # only 'json': requests can not form encode a list of objects
+    bulk_pagination_class = NoPagination  # how objects are read from bulk endpoints responses
+
+    cache_backend = None  # a CacheBackend (e.g. InMemoryCache(max_size=1000, ttl=60)) caching list() and retrieve() responses
+    cache_ttl = None  # ttl (in seconds) of this lib cache entries; None means the backend default
+
+    conditional_requests = False  # if True GET responses with ETag/Last-Modified are kept and revalidated (a 304 reuses them)
+    conditional_requests_backend = InMemoryCache(max_size=1024)  # where revalidable responses are kept (any CacheBackend)
+
+    coalesce_requests = False  # if True concurrent identical GET/HEAD calls share a single request (and parsed response)
+    coalescing_group = SingleFlight()
+
+    instrumentation = None  # an Instrumentation (e.g. HistogramCollector()) receiving the timings of every call phase
+
+    retry_policy = None  # a RetryPolicy (e.g. RetryPolicy(max_attempts=5)) retrying transient failures of idempotent calls
+
+    rate_limit = None  # max requests per second sent to this lib API (a token bucket); None means unlimited
+    rate_limit_burst = None  # requests allowed at once after an idle period (defaults to the rate_limit)
+    max_in_flight_requests = None  # max simultaneous requests to this lib API (threads and async calls alike)
+    rate_limit_adaptive = False  # if True X-RateLimit-Remaining/X-RateLimit-Reset (and 429 Retry-After) headers tune the limiter
+    rate_limiter_key = 'base_api_url'  # 'base_api_url', 'host' or 'class': which libs share the same limiter
+
+    circuit_breaker_failure_threshold = None  # consecutive failures (5xx, connection errors, timeouts) opening the circuit
+    circuit_breaker_recovery_timeout = 30  # seconds calls fail fast (CircuitBreakerOpen, see on_exception) once it is open
+    circuit_breaker_key = 'base_api_url'  # 'base_api_url', 'host' or 'class': which libs share the same circuit breaker
+
     # Just for quick reference, parameters below can be set for the mixins customization:
     # list_expected_status_code
     # list_url
+    # list_prefetch_workers
+    # list_prefetch_read_ahead
+    # list_stream_chunk_size
     # create_payload_mode
     # create_expected_status_code
     # create_url
+    # bulk_create_url
+    # bulk_create_expected_status_code
     # retrieve_expected_status_code
     # retrieve_url
     # update_payload_mode
     # update_expected_status_code
     # update_url
+    # bulk_update_url
+    # bulk_update_expected_status_code
     # delete_expected_status_code
     # delete_url
 
@@ -72,6 +161,46 @@ class RestApiLib(object):
     def delete(cls, *args, **kwargs):
         raise NotImplementedError('Consider inheriting your base lib class from DeleteMixin.')
 
+    @classmethod
+    def only(cls, *fields):
+        return cls.get_projection_class(only_fields=tuple(fields), deferred_fields=cls.deferred_fields)
+
+    @classmethod
+    def defer(cls, *fields):
+        return cls.get_projection_class(only_fields=cls.only_fields, deferred_fields=tuple(fields) + (cls.deferred_fields or ()))
+
+    @classmethod
+    def get_projection_class(cls, only_fields, deferred_fields):
+        # A (cached) subclass with the projection set, so list/retrieve/iter_all... work as usual: Pet.only('id', 'name').list()
+        base_class = cls.projection_base_class or cls
+        key = (base_class, only_fields, deferred_fields)
+        if key not in _projection_classes:
+            attributes = {'only_fields': only_fields, 'deferred_fields': deferred_fields, 'projection_base_class': base_class}
+            _projection_classes[key] = type(base_class.__name__, (base_class, ), attributes)
+        return _projection_classes[key]
+
+    @classmethod
+    def get_projection_query_params(cls):
+        params = {}
+        if cls.only_fields:
+            fields = cls.only_fields
+            if cls.identifier_field not in fields:
+                fields = (cls.identifier_field, ) + fields
+            params[cls.only_query_param] = ','.join(fields)
+        if cls.deferred_fields:
+            params[cls.defer_query_param] = ','.join(cls.deferred_fields)
+        return params
+
+    @classmethod
+    def is_projected_out(cls, name):
+        if cls.only_fields and name not in cls.only_fields and name != cls.identifier_field:
+            return True
+        return bool(cls.deferred_fields) and name in cls.deferred_fields
+
+    @classmethod
+    def project_fields(cls, data):
+        return {k: v for k, v in data.items() if k == 'meta' or not(cls.is_projected_out(k))}
+
     @classmethod
     def get_base_api_url(cls):
         return cls.base_api_url
@@ -92,6 +221,129 @@ class RestApiLib(object):
     def get_request_auth(cls):
         return cls.request_auth
 
+    @classmethod
+    def get_sharing_scope(cls, sharing_key):
+        # sharing_key: 'base_api_url', 'host' or 'class'
+        if sharing_key == 'class':
+            return cls
+        if sharing_key == 'host':
+            url_parts = urlparse(cls.get_base_api_url() or '')
+            return (url_parts.scheme, url_parts.netloc)
+        return cls.get_base_api_url()
+
+    @classmethod
+    def get_session_key(cls):
+        scope = cls.get_sharing_scope(cls.session_pool_key)
+        return (
+            scope, cls.session_pool_connections, cls.session_pool_maxsize, cls.session_pool_block, cls.session_keep_alive,
+            cls.session_persist_cookies,
+        )
+
+    @classmethod
+    def get_session(cls):
+        return session_pool.get(
+            cls.get_session_key(),
+            pool_connections=cls.session_pool_connections,
+            pool_maxsize=cls.session_pool_maxsize,
+            pool_block=cls.session_pool_block,
+            keep_alive=cls.session_keep_alive,
+            persist_cookies=cls.session_persist_cookies,
+        )
+
+    @classmethod
+    def close_session(cls):
+        session_pool.close(cls.get_session_key())
+
+    @classmethod
+    @contextmanager
+    def managed_session(cls):
+        try:
+            yield cls.get_session()
+        finally:
+            cls.close_session()
+
+    @classmethod
+    def get_request_method(cls, method):
+        # Module-level requests functions (requests.get, requests.post...) are routed through the pooled session.
+        # Any other callable is used as is.
+        method_name = get_method_name(method)
+        if cls.use_session and method_name:
+            return getattr(cls.get_session(), method_name)
+        return method
+
+    @classmethod
+    def get_cache_auth_identity(cls):
+        headers = cls.get_request_headers() or {}
+        identity = repr((cls.get_request_auth(), headers.get('Authorization')))
+        return hashlib.sha1(identity.encode()).hexdigest()
+
+    @classmethod
+    def get_request_identity(cls, method, url, request_kwargs, ignored=()):
+        # Digest of everything a request sends (headers, params, body, auth, timeout...), besides the `ignored` arguments
+        identity = [get_method_name(method), url]
+        for name in sorted(request_kwargs):
+            if name not in ignored:
+                identity.append((name, get_identity(request_kwargs[name])))
+        return hashlib.sha1(repr(identity).encode()).hexdigest()
+
+    @classmethod
+    def get_cache_generation_key(cls, cache_scope):
+        return 'generation:{}:{}'.format(cls.get_base_api_url(), cache_scope)
+
+    @classmethod
+    def set_cache_generation(cls, cache_scope):
+        generation = uuid.uuid4().hex
+        cls.cache_backend.set(cls.get_cache_generation_key(cache_scope), generation, ttl=cls.cache_ttl)
+        return generation
+
+    @classmethod
+    def get_cache_generation(cls, cache_scope):
+        # A missing generation (never set, expired or evicted) gets a new one: entries cached under a lost generation are
+        # missed from then on, never served stale. It is read before every entry, so LRU backends evict entries first.
+        generation = cls.cache_backend.get(cls.get_cache_generation_key(cache_scope))
+        if generation is None:
+            generation = cls.set_cache_generation(cache_scope)
+        return generation
+
+    @classmethod
+    def get_cache_key(cls, method, url, cache_scope):
+        # Invalidating a scope means changing its generation, so stale entries are never hit again (and expire on their own).
+        generation = cls.get_cache_generation(cache_scope)
+        return '{}:{}:{}:{}'.format(get_method_name(method), url, cls.get_cache_auth_identity(), generation)
+
+    @classmethod
+    def invalidate_cache(cls, identifier=None):
+        # Lists are always invalidated (any change may affect them), objects only when an identifier is given.
+        if cls.cache_backend is None:
+            return
+        scopes = ['list'] if identifier is None else ['list', 'object:{}'.format(identifier)]
+        for scope in scopes:
+            cls.set_cache_generation(scope)
+
+    @classmethod
+    def get_cache_stats(cls):
+        if cls.cache_backend is None:
+            return None
+        return cls.cache_backend.get_stats()
+
+    @classmethod
+    def get_json_codec(cls):
+        return cls.json_codec or get_default_json_codec()
+
+    @classmethod
+    def encode_json_payload(cls, kwargs):
+        # Encodes the 'json' payload with the lib codec (requests would use the stdlib json module).
+        codec = cls.get_json_codec()
+        if isinstance(codec, StdlibJsonCodec) or kwargs.get('json') is None or kwargs.get('files') or kwargs.get('data'):
+            return kwargs
+
+        kwargs = dict(kwargs)
+        headers = dict(kwargs.get('headers') or {})
+        headers.setdefault('Content-Type', 'application/json')
+        kwargs['headers'] = headers
+        kwargs['data'] = codec.dumps(kwargs.pop('json'))
+        return kwargs
+
     @classmethod
     def handle_request_exception(cls, e, method, url, request_kwargs):
         response = getattr(e, 'response', None)
@@ -101,13 +353,24 @@ class RestApiLib(object):
             exc = e
         return cls.on_exception(exc)
 
+    @classmethod
+    def replace_rich_objects(cls, payload):
+        # Look for rich objects in data and replace them for the identifier.
+        for k, v in payload.items():
+            if isinstance(v, RestApiLib):
+                payload[k] = v.get_identifier()
+        return payload
+
     @classmethod
     def prepare_requests_call(cls, **kwargs):
         request_kwargs = kwargs.pop('_request_kwargs', {})
         files = request_kwargs.pop('request_files', {})
 
         for payload_type in ('data', 'json'):
-            if payload_type in kwargs:
+            if payload_type in kwargs and should_iterate(kwargs[payload_type]):
+                # Bulk payload (a list of objects): only rich objects are replaced, files are not supported here.
+                kwargs[payload_type] = [cls.replace_rich_objects(dict(obj)) for obj in kwargs[payload_type]]
+            elif payload_type in kwargs:
                 # Move files from 'json/data' atribute to 'files' attribute
                 for k, v in kwargs[payload_type].items():
                     if isinstance(v, IOBase):
@@ -115,10 +378,7 @@ class RestApiLib(object):
                 for k in files:
                     kwargs[payload_type].pop(k)
 
-                # Look for rich objects in data and replace them for the identifier.
-                for k, v in kwargs[payload_type].items():
-                    if isinstance(v, RestApiLib):
-                        kwargs[payload_type][k] = v.get_identifier()
+                cls.replace_rich_objects(kwargs[payload_type])
 
         retval = {
             'timeout': request_kwargs.pop('timeout', cls.get_request_timeout()),
@@ -127,46 +387,386 @@ class RestApiLib(object):
             'files': files or None,
         }
         retval.update(kwargs)
+        if files and cls.streaming_uploads:
+            retval = cls.prepare_streaming_upload(retval)
+        elif not(files) and cls.request_compression:
+            retval = cls.prepare_compressed_body(retval)
         return retval
 
+    @classmethod
+    def prepare_streaming_upload(cls, request_kwargs):
+        # Files (and 'data' form fields) go in a streaming multipart body instead of being fully encoded in memory by requests
+        encoder = MultipartEncoder(
+            request_kwargs.get('data'), request_kwargs['files'], chunk_size=cls.streaming_uploads_chunk_size,
+            progress_callback=cls.upload_progress_callback,
+        )
+        headers = dict(request_kwargs.get('headers') or {})
+        headers['Content-Type'] = encoder.content_type
+        chunked = cls.streaming_uploads_chunked or encoder.size is None
+        request_kwargs.update(headers=headers, files=None, data=iter(encoder) if chunked else encoder)
+        return request_kwargs
+
+    @classmethod
+    def get_request_body(cls, request_kwargs):
+        # (body bytes, content type) as requests would send them, or (None, None) for bodies which can not be compressed
+        if request_kwargs.get('json') is not None:
+            return cls.get_json_codec().dumps(request_kwargs['json']), 'application/json'
+        data = request_kwargs.get('data')
+        if isinstance(data, dict):
+            # requests own form encoding (None values are left out, for instance)
+            return RequestEncodingMixin._encode_params(data).encode('utf-8'), 'application/x-www-form-urlencoded'
+        if isinstance(data, (str, bytes)):
+            return (data.encode('utf-8') if isinstance(data, str) else data), None
+        return None, None
+
+    @classmethod
+    def prepare_compressed_body(cls, request_kwargs):
+        # Also advertises the codecs responses can be decoded with (so the API can compress them with the best one).
+        headers = dict(request_kwargs.get('headers') or {})
+        headers.setdefault('Accept-Encoding', get_accept_encoding())
+        request_kwargs['headers'] = headers
+
+        body, content_type = cls.get_request_body(request_kwargs)
+        if body is None or len(body) < cls.request_compression_threshold or 'Content-Encoding' in headers:
+            return request_kwargs
+
+        codec = get_compression_codec(cls.request_compression)
+        with cls.instrument('compress_request', codec=codec.name, request_bytes=len(body)) as span:
+            compressed_body = codec.compress(body, cls.request_compression_level)
+            if span is not None:
+                span.data['compressed_bytes'] = len(compressed_body)
+
+        headers['Content-Encoding'] = codec.name
+        if content_type is not None:
+            headers.setdefault('Content-Type', content_type)
+        request_kwargs.pop('json', None)
+        request_kwargs['data'] = compressed_body
+        return request_kwargs
+
+    @classmethod
+    def instrument(cls, name, **data):
+        # with cls.instrument('phase', ...) as span: `span` is None when there is no instrumentation (nothing is measured)
+        if cls.instrumentation is None:
+            return NO_SPAN
+        return Span(cls.instrumentation, name, cls, data)
+
+    @classmethod
+    def get_response_size(cls, response):
+        # Streamed bodies are not read here: their size is not known upfront
+        if isinstance(response, requests.Response) and response._content_consumed and response._content:
+            return len(response._content)
+        return None
+
     @classmethod
     def request(cls, method, url, **kwargs):
-        kwargs = cls.prepare_requests_call(**kwargs)
+        with cls.instrument('request', method=get_method_name(method), url=url) as span:
+            with cls.instrument('prepare_requests_call'):
+                kwargs = cls.prepare_requests_call(**kwargs)
+
+            try:
+                response = cls.send_request(method, url, **kwargs)
+                if span is not None:
+                    span.data.update(status_code=response.status_code, response_bytes=cls.get_response_size(response))
+                response.raise_for_status()
+                return response
+            except Exception as e:
+                return cls.handle_request_exception(e, method, url, request_kwargs=kwargs)
 
+    @classmethod
+    def cached_request(cls, method, url, cache_scope, **kwargs):
+        # cache_scope: 'list' or 'object:<identifier>' (see invalidate_cache)
+        if cls.cache_backend is None:
+            return cls.request(method, url, **kwargs)
+
+        cache_key = cls.get_cache_key(method, url, cache_scope)
+        response = cls.cache_backend.fetch(cache_key)
+        if response is None:
+            response = cls.request(method, url, **kwargs)
+            if 200 <= response.status_code < 300:
+                cls.cache_backend.set(cache_key, response, ttl=cls.cache_ttl)
+        return response
+
+    @classmethod
+    def call_request_method(cls, method, url, **kwargs):
+        # Payloads are only encoded here for requests functions (custom callables still receive requests-like kwargs)
+        if get_method_name(method) and 'json' in kwargs:
+            kwargs = cls.encode_json_payload(kwargs)
+        if cls.retry_policy is not None:
+            return cls.retry_policy.call(cls.send_attempt, method, url, **kwargs)
+        return cls.send_attempt(method, url, **kwargs)
+
+    @classmethod
+    def get_rate_limiter(cls):
+        if not(cls.rate_limit or cls.max_in_flight_requests or cls.rate_limit_adaptive):
+            return None
+        key = (
+            cls.get_sharing_scope(cls.rate_limiter_key), cls.rate_limit, cls.rate_limit_burst, cls.max_in_flight_requests,
+            cls.rate_limit_adaptive,
+        )
+        return rate_limiters.get(
+            key, rate=cls.rate_limit, burst=cls.rate_limit_burst, max_in_flight=cls.max_in_flight_requests,
+            adaptive=cls.rate_limit_adaptive,
+        )
+
+    @classmethod
+    def get_circuit_breaker(cls):
+        if not(cls.circuit_breaker_failure_threshold):
+            return None
+        scope = cls.get_sharing_scope(cls.circuit_breaker_key)
+        key = (scope, cls.circuit_breaker_failure_threshold, cls.circuit_breaker_recovery_timeout)
+        return circuit_breakers.get(
+            key, failure_threshold=cls.circuit_breaker_failure_threshold, recovery_timeout=cls.circuit_breaker_recovery_timeout,
+            name=str(scope),
+        )
+
+    @classmethod
+    def send_attempt(cls, method, url, **kwargs):
+        # A single round trip to the server (there may be several per call when retry_policy is set)
+        circuit_breaker = cls.get_circuit_breaker()
+        if circuit_breaker is not None:
+            return circuit_breaker.call(cls.send_rate_limited_attempt, method, url, **kwargs)
+        return cls.send_rate_limited_attempt(method, url, **kwargs)
+
+    @classmethod
+    def send_rate_limited_attempt(cls, method, url, **kwargs):
+        rate_limiter = cls.get_rate_limiter()
+        if rate_limiter is None:
+            return cls.get_request_method(method)(url, **kwargs)
+
+        rate_limiter.acquire()
+        response = None
         try:
-            response = method(url, **kwargs)
-            response.raise_for_status()
+            response = cls.get_request_method(method)(url, **kwargs)
             return response
-        except Exception as e:
-            return cls.handle_request_exception(e, method, url, request_kwargs=kwargs)
+        finally:
+            rate_limiter.release(response)
+
+    @classmethod
+    def send_request(cls, method, url, **kwargs):
+        with cls.instrument('send', method=get_method_name(method), url=url):
+            return cls.send_uninstrumented_request(method, url, **kwargs)
+
+    @classmethod
+    def send_uninstrumented_request(cls, method, url, **kwargs):
+        if kwargs.get('stream'):  # A streamed body can be consumed only once: neither shared nor stored
+            return cls.call_request_method(method, url, **kwargs)
+        if cls.coalesce_requests and get_method_name(method) in ('get', 'head'):
+            def send_coalesced_request():
+                response = cls.send_single_request(method, url, **kwargs)
+                response._coalesced = True
+                return response
+
+            # Only requests sending exactly the same thing share a response
+            key = cls.get_request_identity(method, url, kwargs)
+            return cls.coalescing_group.do(key, send_coalesced_request)
+        return cls.send_single_request(method, url, **kwargs)
+
+    @classmethod
+    def send_single_request(cls, method, url, **kwargs):
+        if cls.conditional_requests and get_method_name(method) == 'get':
+            return cls.send_conditional_request(method, url, **kwargs)
+        return cls.call_request_method(method, url, **kwargs)
+
+    @classmethod
+    def send_conditional_request(cls, method, url, **kwargs):
+        backend = cls.conditional_requests_backend
+        # Requests with different headers (Accept, Accept-Language... anything a response may Vary on), params or auth are
+        # revalidated separately: a stored response is only ever reused for the very same request
+        key = 'conditional:{}'.format(cls.get_request_identity(method, url, kwargs, ignored=('timeout',)))
+        stored_response = backend.fetch(key)
+
+        if stored_response is not None:
+            headers = dict(kwargs.get('headers') or {})
+            if stored_response.headers.get('ETag'):
+                headers['If-None-Match'] = stored_response.headers['ETag']
+            if stored_response.headers.get('Last-Modified'):
+                headers['If-Modified-Since'] = stored_response.headers['Last-Modified']
+            kwargs['headers'] = headers
+
+        response = cls.call_request_method(method, url, **kwargs)
+
+        if response.status_code == 304 and stored_response is not None:
+            # Not modified: the stored response (and its body) is reused, so expected status codes checks still pass.
+            revalidated_response = copy.copy(stored_response)
+            revalidated_response._revalidated_by = response
+            revalidated_response._retries = vars(response).get('_retries', 0)
+            return revalidated_response
+
+        if response.status_code == 200 and (response.headers.get('ETag') or response.headers.get('Last-Modified')):
+            backend.set(key, response)
+        return response
+
+    @classmethod
+    def run_batch(cls, func, items, max_concurrency=None, lazy=False):
+        # Calls func(item) concurrently. Items are consumed lazily (so generators are fine) and every result is matched with
+        # its input, in input order. With lazy=True BatchItems are yielded instead of being accumulated in a BatchResult.
+        results = map_concurrently(func, items, max_concurrency or cls.max_concurrency, read_ahead=cls.batch_read_ahead)
+        batch_items = (BatchItem(item, result) for item, result in results)
+        if lazy:
+            return batch_items
+        return BatchResult(batch_items)
+
+    @classmethod
+    def split_bulk_results(cls, chunk_items):
+        # (chunk, result) -> one BatchItem per input. A list result must hold one object per input: when it does not (or for
+        # any other result, e.g. an UnhandledResponse or an exception) every input of the chunk gets the failure.
+        for chunk, result in chunk_items:
+            if isinstance(result, list):
+                if len(result) == len(chunk):
+                    for item, item_result in zip(chunk, result):
+                        yield BatchItem(item, item_result)
+                    continue
+                result = UnhandledResponse(meta=getattr(result, '_meta', None))  # Objects can not be matched with inputs
+            for item in chunk:
+                yield BatchItem(item, result)
+
+    @classmethod
+    def check_bulk_payload_mode(cls):
+        if cls.bulk_payload_mode != 'json':
+            raise ValueError("bulk_payload_mode must be 'json' (got {!r}): requests can not form encode a list of "
+                             "objects.".format(cls.bulk_payload_mode))
+
+    @classmethod
+    def get_bulk_payload_kwargs(cls, payload):
+        cls.check_bulk_payload_mode()
+        return {'json': payload}
+
+    @classmethod
+    def run_bulk_batch(cls, func, items, max_concurrency=None, lazy=False):
+        # Same as run_batch, but func receives chunks of bulk_chunk_size items and must return one result per item (a list)
+        # or a single result shared by the whole chunk (an UnhandledResponse, for instance).
+        cls.check_bulk_payload_mode()  # Fails right away rather than once per chunk
+        chunk_items = cls.run_batch(func, chunked(items, cls.bulk_chunk_size), max_concurrency=max_concurrency, lazy=True)
+        batch_items = cls.split_bulk_results(chunk_items)
+        if lazy:
+            return batch_items
+        return BatchResult(batch_items)
+
+    @classmethod
+    def get_compiled_constructor(cls):
+        # Compiled on first use (and kept per class). None means instances are built by the regular __init__
+        if not(cls.fields) or not(cls.compile_constructors) or cls.only_fields or cls.deferred_fields:
+            return None
+        if '_compiled_constructor' not in cls.__dict__:
+            cls._compiled_constructor = compile_constructor(cls, RestApiLib)
+        return cls._compiled_constructor
 
     @classmethod
     def init_existing_object(cls, **kwargs):
+        if cls.only_fields or cls.deferred_fields:
+            kwargs = cls.project_fields(kwargs)
+        constructor = cls.get_compiled_constructor()
+        if constructor is not None:
+            return constructor(kwargs, kwargs.pop('meta', None))
         return cls(_existing_instance=True, **kwargs)
 
     @classmethod
     def call_endpoint(cls, method, url, **outer_kwargs):
+        # stream=True returns a Download (byte chunks iterator) and destination=<path or file> writes the body there,
+        # both with bounded memory whatever the body size (see download for byte_range and resume).
         instance_class = outer_kwargs.pop('instance_class', None)
         many = outer_kwargs.pop('many', False)
+        destination = outer_kwargs.pop('destination', None)
+        if outer_kwargs.pop('stream', False) or destination is not None:
+            return cls.download(method, url, destination=destination, **outer_kwargs)
+
+        with cls.instrument('call_endpoint', method=get_method_name(method), url=url):
+            response = cls.request(method, url, **outer_kwargs)
+            if instance_class:
+                return cls.prepare_response(response, instance_class, many=many)
+            return response
 
-        response = cls.request(method, url, **outer_kwargs)
-        if instance_class:
-            return cls.prepare_response(response, instance_class, many=many)
-        return response
+    @classmethod
+    def download(cls, method, url, destination=None, byte_range=None, resume=False, **kwargs):
+        # byte_range: (start, end) bytes (end is inclusive, None up to the end) requested with a Range header.
+        # resume: only the bytes missing from destination are requested. Servers ignoring Range send the whole body
+        # (status 200, Download.offset is 0), it then replaces the destination content. A destination already holding the
+        # whole resource gets an empty Download (the server answers 416).
+        resume = resume and destination is not None
+        if resume:
+            byte_range = (get_destination_size(destination), None)
+
+        if byte_range is not None:
+            request_kwargs = dict(kwargs.pop('_request_kwargs', {}))
+            headers = dict(request_kwargs.get('headers', cls.get_request_headers()) or {})
+            headers['Range'] = get_range_header(*byte_range)
+            headers['Accept-Encoding'] = 'identity'  # Ranges and sizes are about the decoded bytes we write
+            request_kwargs['headers'] = headers
+            kwargs['_request_kwargs'] = request_kwargs
+
+        with cls.instrument('call_endpoint', method=get_method_name(method), url=url, stream=True):
+            try:
+                response = cls.request(method, url, stream=True, **kwargs)
+            except HTTPError as e:
+                if not(resume and is_already_downloaded(e.response, byte_range[0])):
+                    raise
+                response = e.response
+
+            already_downloaded = resume and is_already_downloaded(response, byte_range[0])  # on_exception returned it
+            if response.status_code not in (200, 206) and not(already_downloaded):
+                response.close()
+                return UnhandledResponse(meta=Meta(response))
+
+            download = Download(response, chunk_size=cls.download_chunk_size)
+            if destination is not None:
+                download.write_to(destination)
+            return download
 
     @classmethod
     def get_objects_from_payload(cls, json_response):
         return cls.pagination_class().get_results(json_response)
 
     @classmethod
-    def prepare_response(cls, response, instance_class, many=False):
-        json_response = response.json()
+    def decode_response_json(cls, response):
+        if isinstance(response, requests.Response):
+            if response.encoding and not(is_utf8_encoding(response.encoding)):
+                return cls.get_json_codec().loads(response.text)  # A declared non UTF-8 charset (codecs only assume UTF-8)
+            return cls.get_json_codec().loads(response.content)
+        return response.json()  # Duck-typed responses (from custom callables or transports)
+
+    @classmethod
+    def get_response_json(cls, response):
+        # Coalesced responses are shared by several callers: they are parsed only once, but every caller gets its own copy
+        # (instances built from them must not share lists/dicts, even when the response is later served from a cache).
+        with cls.instrument('decode_json') as span:
+            response_vars = vars(response)
+            if '_json' in response_vars:
+                json_response = copy.deepcopy(response_vars['_json'])
+            else:
+                json_response = cls.decode_response_json(response)
+                if response_vars.get('_coalesced'):
+                    response._json = json_response
+                    json_response = copy.deepcopy(json_response)
 
-        if many:
-            objects = cls.get_objects_from_payload(json_response)
-            return metalist([instance_class.init_existing_object(**obj) for obj in objects], meta=Meta(response))
+            if span is not None:
+                span.data['response_bytes'] = cls.get_response_size(response)
+            return json_response
 
-        return instance_class.init_existing_object(meta=Meta(response=response), **json_response)
+    @classmethod
+    def prepare_response(cls, response, instance_class, many=False, pagination_class=None):
+        with cls.instrument('prepare_response', many=many) as span:
+            json_response = cls.get_response_json(response)
+
+            with cls.instrument('init_existing_object') as init_span:
+                if many:
+                    if pagination_class:
+                        objects = pagination_class().get_results(json_response)
+                    else:
+                        objects = cls.get_objects_from_payload(json_response)
+                    constructor = None
+                    if instance_class.init_existing_object.__func__ is RestApiLib.init_existing_object.__func__:
+                        constructor = instance_class.get_compiled_constructor()  # Overridden init_existing_object must run
+                    if constructor is not None:
+                        instances = [constructor(dict(obj)) for obj in objects]
+                    else:
+                        instances = [instance_class.init_existing_object(**obj) for obj in objects]
+                    result = metalist(instances, meta=Meta(response))
+                else:
+                    result = instance_class.init_existing_object(meta=Meta(response=response), **json_response)
+
+                if span is not None:
+                    span.data['objects'] = init_span.data['objects'] = len(result) if many else 1
+            return result
 
     def __init__(self, **kwargs):
         self._meta = kwargs.pop('meta', None)
@@ -176,12 +776,19 @@ class RestApiLib(object):
         self._instance_data = {}
         self._changed_data = {}
 
+        lazy_nested_objects = self.lazy_nested_objects and self._existing_instance
+
         for k, v in kwargs.items():
+            if k in self._nested_objects and lazy_nested_objects:
+                # Kept raw (in _instance_data as well) until first accessed, see __getattr__
+                if '_lazy_nested_data' not in self.__dict__:
+                    self._lazy_nested_data = {}
+                self._lazy_nested_data[k] = v
+                self._instance_data[k] = v
+                continue
+
             if k in self._nested_objects:
-                if should_iterate(v):
-                    set_value = v.__class__([self._nested_objects[k](**v_child) for v_child in v])
-                else:
-                    set_value = self._nested_objects[k](**v)
+                set_value = self.cast_nested_object(k, v)
             else:
                 set_value = v
 
@@ -190,11 +797,68 @@ class RestApiLib(object):
 
         self._track_object_changes = True
 
+    @classmethod
+    def cast_nested_object(cls, name, value):
+        nested_class = cls.nested_objects[name]
+        if should_iterate(value):
+            return value.__class__([nested_class(**v_child) for v_child in value])
+        return nested_class(**value)
+
+    def materialize_nested_object(self, name):
+        value = self.cast_nested_object(name, self._lazy_nested_data.pop(name))
+        super(RestApiLib, self).__setattr__(name, value)
+        self._instance_data[name] = value
+        return value
+
+    def materialize_nested_objects(self):
+        for name in list(self.__dict__.get('_lazy_nested_data') or ()):
+            self.materialize_nested_object(name)
+
+    def load_projected_out_fields(self):
+        # Retrieves the whole object (once) and fills in every field left out by only()/defer()
+        self._projected_out_fields_loaded = True
+        full_instance = self.projection_base_class.retrieve(self.get_identifier())
+        if not(isinstance(full_instance, RestApiLib)):
+            return
+
+        full_instance.materialize_nested_objects()
+
+        for k, v in full_instance._instance_data.items():
+            if k not in self._instance_data:
+                self.store_value(k, v)
+
+    def store_value(self, name, value):
+        # Sets a fetched value: it is not a change
+        super(RestApiLib, self).__setattr__(name, value)
+        self._instance_data[name] = value
+
+    def get_projected_out_field(self, name):
+        # Called for missing fields: with projection_lazy_load, a field left out by only()/defer() loads the whole object
+        if self.projection_lazy_load and not(name.startswith('_')) and self.__dict__.get('_existing_instance') and \
+                self.is_projected_out(name) and not(self.__dict__.get('_projected_out_fields_loaded')) and \
+                self.identifier_field in self._instance_data:
+            self.load_projected_out_fields()
+            if name in self._instance_data:
+                return self._instance_data[name]
+
+        raise AttributeError("'{}' object has no attribute '{}'".format(self.__class__.__name__, name))
+
+    def __getattr__(self, name):
+        # Only called when regular lookup fails: lazy nested objects are cast on first access.
+        lazy_nested_data = self.__dict__.get('_lazy_nested_data')
+        if lazy_nested_data and name in lazy_nested_data:
+            return self.materialize_nested_object(name)
+        return self.get_projected_out_field(name)
+
     def __setattr__(self, name, value):
         if not(name.startswith('_')) and self._track_object_changes:
             self._changed_data[name] = value
             self._instance_data[name] = value
 
+            lazy_nested_data = self.__dict__.get('_lazy_nested_data')
+            if lazy_nested_data:
+                lazy_nested_data.pop(name, None)
+
         return super(RestApiLib, self).__setattr__(name, value)
 
     def __repr__(self):
@@ -209,6 +873,7 @@ class RestApiLib(object):
         return getattr(self, self.identifier_field)
 
     def get_pretty_identifier(self):
+        self.materialize_nested_objects()
         return self.pretty_identifier.format(**self._instance_data)
 
 
@@ -1,8 +1,29 @@
+from collections import namedtuple
+
+
 class Meta(object):
     def __init__(self, response=None):
         self.response = response
         self.request = response.request
 
+    @property
+    def etag(self):
+        return self.response.headers.get('ETag')
+
+    @property
+    def last_modified(self):
+        return self.response.headers.get('Last-Modified')
+
+    @property
+    def revalidated(self):
+        # True when the server answered 304 Not Modified and the previously stored response was reused
+        return '_revalidated_by' in vars(self.response)
+
+    @property
+    def retries(self):
+        # Number of attempts retried (by the lib retry_policy) before this response was got
+        return vars(self.response).get('_retries', 0)
+
     def to_curl(self):
         import curlify
         return curlify.to_curl(self.request)
@@ -27,3 +48,24 @@ class metalist(list):
     def __init__(self, objects, meta):
         super().__init__(objects)
         self._meta = meta
+
+
+BatchItem = namedtuple('BatchItem', ['input', 'result'])  # result is an instance, a DefaultResponseMixin or an exception
+
+
+class BatchResult(list):
+    @staticmethod
+    def is_success(result):
+        return not(isinstance(result, (Exception, UnhandledResponse)))
+
+    @property
+    def results(self):
+        return [item.result for item in self]
+
+    @property
+    def succeeded(self):
+        return [item for item in self if self.is_success(item.result)]
+
+    @property
+    def failed(self):
+        return [item for item in self if not(self.is_success(item.result))]
@@ -0,0 +1,95 @@
+import os
+import re
+
+from .datastructures import Meta
+
+CONTENT_RANGE_REGEX = re.compile(r'bytes\s+(?:(\d+)-(\d+)|\*)/(\d+|\*)')
+
+
+def get_range_header(start=0, end=None):
+    # byte_range (start, end) -> Range header value (end is inclusive, as in http, None means up to the end)
+    return 'bytes={}-{}'.format(start, '' if end is None else end)
+
+
+def parse_content_range(value):
+    # 'bytes 100-199/1000' -> (100, 199, 1000). The total is None when unknown ('*'), everything is None if unparsable.
+    # 416 responses send 'bytes */1000': start and end are None.
+    match = CONTENT_RANGE_REGEX.match(value or '')
+    if match is None:
+        return None, None, None
+    start, end, total = match.groups()
+    return None if start is None else int(start), None if end is None else int(end), None if total == '*' else int(total)
+
+
+def is_already_downloaded(response, size):
+    # A 416 (Range Not Satisfiable) to a resume from `size` bytes, the whole resource being `size` bytes: nothing is missing
+    if response is None or response.status_code != 416:
+        return False
+    return parse_content_range(response.headers.get('Content-Range'))[2] == size
+
+
+def get_destination_size(destination):
+    # Bytes already downloaded into the destination (a path or a seekable file object), what resuming starts from
+    if isinstance(destination, (str, os.PathLike)):
+        return os.path.getsize(destination) if os.path.exists(destination) else 0
+    return destination.seek(0, os.SEEK_END)
+
+
+class Download(object):
+    # A streamed response body: iterating it yields byte chunks (chunk_size at most, the body is never held in memory)
+    # and releases the connection once exhausted. _meta (status code, headers) is available before anything is read.
+    # A 416 response (see is_already_downloaded) is an empty download at the end of the resource.
+    def __init__(self, response, chunk_size=64 * 1024):
+        self._meta = Meta(response)
+        self.response = response
+        self.chunk_size = chunk_size
+        self.bytes_read = 0
+
+        if response.status_code == 206:
+            self.offset, _, self.total_size = parse_content_range(response.headers.get('Content-Range'))
+        elif response.status_code == 416:
+            _, _, self.total_size = parse_content_range(response.headers.get('Content-Range'))
+            self.offset = self.total_size
+        else:  # The server sent the whole body (it may not support Range requests)
+            content_length = response.headers.get('Content-Length')
+            self.offset, self.total_size = 0, int(content_length) if content_length and content_length.isdigit() else None
+        self.offset = self.offset or 0  # position of the first byte in the whole resource
+
+    @property
+    def partial(self):
+        return self.response.status_code == 206
+
+    def __iter__(self):
+        try:
+            if self.response.status_code == 416:  # The body (if any) is an error message, not part of the resource
+                return
+            for chunk in self.response.iter_content(chunk_size=self.chunk_size):
+                self.bytes_read += len(chunk)
+                yield chunk
+        finally:
+            self.close()
+
+    def close(self):
+        self.response.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write_to(self, destination):
+        # Writes the body into a path or a file object at self.offset (so resumed downloads are appended to what was
+        # already there, and a whole body sent by a server ignoring Range replaces it). Returns the bytes written.
+        if isinstance(destination, (str, os.PathLike)):
+            with open(destination, 'r+b' if self.offset and os.path.exists(destination) else 'wb') as f:
+                return self.write_to(f)
+
+        destination.seek(self.offset)
+        destination.truncate()
+        for chunk in self:
+            destination.write(chunk)
+        return self.bytes_read
+
+    def __repr__(self):
+        return '<Download [{}] offset={} total_size={}>'.format(self.response.status_code, self.offset, self.total_size)
@@ -0,0 +1,155 @@
+import threading
+from bisect import bisect_left
+from collections import Counter, namedtuple
+from time import perf_counter
+
+# name: 'request', 'prepare_requests_call', 'compress_request', 'send', 'call_endpoint', 'prepare_response', 'decode_json',
+# 'init_existing_object'...
+# data: whatever is known about the phase (method, url, status_code, response_bytes, compressed_bytes, objects, error...)
+Event = namedtuple('Event', ['name', 'lib_class', 'duration', 'data'])
+
+DEFAULT_BUCKETS = tuple(0.000001 * 2 ** i for i in range(28))  # 1us .. ~134s upper bounds (in seconds)
+
+
+class Instrumentation(object):
+    # Adapter interface: feed events to your own metrics / tracing stack (statsd, prometheus, opentelemetry...)
+    def emit(self, event):
+        raise NotImplementedError('Instrumentations must implement emit().')
+
+
+class CallbackInstrumentation(Instrumentation):
+    def __init__(self, callback):
+        self.callback = callback
+
+    def emit(self, event):
+        self.callback(event)
+
+
+class MultiInstrumentation(Instrumentation):
+    def __init__(self, *instrumentations):
+        self.instrumentations = instrumentations
+
+    def emit(self, event):
+        for instrumentation in self.instrumentations:
+            instrumentation.emit(event)
+
+
+class Histogram(object):
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1)  # The last one counts what is above the last bucket
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+        self.sums = Counter()  # numeric data (response_bytes, objects...)
+        self.status_codes = Counter()
+        self.errors = Counter()
+
+    def add(self, event):
+        duration = event.duration
+        self.bucket_counts[bisect_left(self.buckets, duration)] += 1
+        self.count += 1
+        self.total += duration
+        self.min = duration if self.min is None else min(self.min, duration)
+        self.max = duration if self.max is None else max(self.max, duration)
+
+        for key, value in event.data.items():
+            if key == 'status_code':
+                self.status_codes[value] += 1
+            elif key == 'error':
+                self.errors[value] += 1
+            elif isinstance(value, (int, float)) and not(isinstance(value, bool)):
+                self.sums[key] += value
+
+    def get_percentile(self, percentile):
+        # Upper bound of the bucket the percentile falls in (so an estimate, never above the max seen)
+        if not(self.count):
+            return None
+        threshold = self.count * percentile / 100
+        cumulative = 0
+        for index, bucket_count in enumerate(self.bucket_counts):
+            cumulative += bucket_count
+            if cumulative >= threshold:
+                return min(self.max, self.buckets[index]) if index < len(self.buckets) else self.max
+        return self.max
+
+    def get_stats(self):
+        stats = {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.total / self.count if self.count else None,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.get_percentile(50),
+            'p90': self.get_percentile(90),
+            'p99': self.get_percentile(99),
+        }
+        stats.update(self.sums)
+        if self.status_codes:
+            stats['status_codes'] = dict(self.status_codes)
+        if self.errors:
+            stats['errors'] = dict(self.errors)
+        return stats
+
+
+class HistogramCollector(Instrumentation):
+    # In memory: a histogram of durations (plus sums of byte / object counts) per event name (or per lib class and name)
+    def __init__(self, buckets=DEFAULT_BUCKETS, group_by_class=False):
+        self.buckets = buckets
+        self.group_by_class = group_by_class
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def get_key(self, event):
+        if self.group_by_class:
+            return '{}.{}'.format(event.lib_class.__name__, event.name)
+        return event.name
+
+    def emit(self, event):
+        key = self.get_key(event)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.add(event)
+
+    def get_stats(self):
+        with self._lock:
+            return {key: histogram.get_stats() for key, histogram in self._histograms.items()}
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+
+
+class Span(object):
+    __slots__ = ('instrumentation', 'name', 'lib_class', 'data', 'start')
+
+    def __init__(self, instrumentation, name, lib_class, data):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.lib_class = lib_class
+        self.data = data
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        duration = perf_counter() - self.start
+        if exc_type is not None:
+            self.data['error'] = exc_type.__name__
+        self.instrumentation.emit(Event(self.name, self.lib_class, duration, self.data))
+
+
+class NoSpan(object):
+    # Used when there is no instrumentation: `with` blocks get None (so no data is ever computed)
+    def __enter__(self):
+        return None
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return None
+
+
+NO_SPAN = NoSpan()
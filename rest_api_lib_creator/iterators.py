@@ -0,0 +1,149 @@
+from collections import namedtuple
+from contextlib import closing
+
+import requests
+
+from .concurrency import iter_concurrently
+from .datastructures import Meta, UnhandledResponse
+
+ListCursor = namedtuple('ListCursor', ['url', 'offset'])  # page url + how many items of that page were already yielded
+
+
+class ListIterator(object):
+    def __init__(self, lib_class, url, offset=0, max_items=None, prefetch_workers=None, prefetch_read_ahead=None):
+        self.lib_class = lib_class
+        self.cursor = ListCursor(url, offset)  # None once the collection is exhausted
+        self.max_items = max_items
+        self.prefetch_workers = prefetch_workers
+        self.prefetch_read_ahead = prefetch_read_ahead
+        self.yielded_items = 0
+        self._generator = self._iterate()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._generator)
+
+    def close(self):
+        self._generator.close()
+
+    @property
+    def remaining_items(self):
+        return None if self.max_items is None else self.max_items - self.yielded_items
+
+    def init_existing_object(self, data):
+        # Objects are built one at a time (as they are yielded), each one in its own span
+        with self.lib_class.instrument('init_existing_object', objects=1):
+            return self.lib_class.init_existing_object(**data)
+
+    def fetch_page(self, url):
+        response = self.lib_class.request(requests.get, url)
+        if response.status_code != self.lib_class.list_expected_status_code:
+            return response, None
+        return response, self.lib_class.get_response_json(response)
+
+    def _iter_pages(self, url):
+        pagination = self.lib_class.pagination_class()
+        response, json_response = self.fetch_page(url)
+        yield url, response, json_response
+
+        page_urls = None
+        if json_response is not None and self.prefetch_workers:
+            page_urls = pagination.get_page_urls(json_response, url)
+            page_size = len(self.lib_class.get_objects_from_payload(json_response))
+            if page_urls and self.max_items is not None and page_size:
+                page_urls = page_urls[:-(-self.remaining_items // page_size)]  # Only the pages max_items needs
+
+        if page_urls:
+            # Every page url is known up front: fetch them concurrently (and still yield them in order).
+            pages = iter_concurrently(self.fetch_page, page_urls, self.prefetch_workers, read_ahead=self.prefetch_read_ahead)
+            with closing(pages):
+                for _, url, future in pages:
+                    response, json_response = future.result()
+                    yield url, response, json_response
+                    if json_response is None:
+                        return
+            return
+
+        while json_response is not None:
+            url = pagination.get_next_url(json_response, url)
+            if not url:
+                return
+            response, json_response = self.fetch_page(url)
+            yield url, response, json_response
+
+    def _iterate(self):
+        url, offset = self.cursor
+
+        with closing(self._iter_pages(url)) as pages:
+            for url, response, json_response in pages:
+                if json_response is None:
+                    yield UnhandledResponse(meta=Meta(response))
+                    return
+
+                objects = self.lib_class.get_objects_from_payload(json_response)
+                del json_response
+
+                for position in range(offset, len(objects)):
+                    if self.remaining_items == 0:
+                        return
+                    self.cursor = ListCursor(url, position + 1)
+                    self.yielded_items += 1
+                    yield self.init_existing_object(objects[position])
+                offset = 0
+
+                if self.remaining_items == 0:  # Checked before the next page is requested
+                    return
+
+        self.cursor = None
+
+
+class AsyncListIterator(ListIterator):
+    # async for obj in lib_class.iter_all(): same cursor, max_items and resume_from as ListIterator, but pages are fetched
+    # one at a time with the lib (awaitable) request (prefetch_workers is not used).
+    def __iter__(self):
+        raise TypeError('Async libs iter_all() results must be iterated with "async for".')
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self._generator.__anext__()
+
+    def close(self):
+        raise TypeError('Async libs iter_all() results must be closed with "await iterator.aclose()".')
+
+    async def aclose(self):
+        await self._generator.aclose()
+
+    async def fetch_page(self, url):
+        response = await self.lib_class.request(requests.get, url)
+        if response.status_code != self.lib_class.list_expected_status_code:
+            return response, None
+        return response, self.lib_class.get_response_json(response)
+
+    async def _iterate(self):
+        url, offset = self.cursor
+        pagination = self.lib_class.pagination_class()
+
+        while url:
+            response, json_response = await self.fetch_page(url)
+            if json_response is None:
+                yield UnhandledResponse(meta=Meta(response))
+                return
+
+            objects = self.lib_class.get_objects_from_payload(json_response)
+            for position in range(offset, len(objects)):
+                if self.remaining_items == 0:
+                    return
+                self.cursor = ListCursor(url, position + 1)
+                self.yielded_items += 1
+                yield self.init_existing_object(objects[position])
+            offset = 0
+
+            if self.remaining_items == 0:  # Checked before the next page is requested
+                return
+            url = pagination.get_next_url(json_response, url)
+
+        self.cursor = None
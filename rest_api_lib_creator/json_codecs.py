@@ -0,0 +1,143 @@
+import json
+import math
+
+
+class JsonCodec(object):
+    name = None
+
+    def dumps(self, obj):
+        # Must return bytes (utf-8)
+        raise NotImplementedError('JSON codecs must implement dumps().')
+
+    def loads(self, data):
+        # Must accept bytes (utf-8) and str
+        raise NotImplementedError('JSON codecs must implement loads().')
+
+
+class StdlibJsonCodec(JsonCodec):
+    name = 'json'
+
+    def dumps(self, obj):
+        return json.dumps(obj).encode('utf-8')
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+DIGITS_TABLE = bytes(ord('0') if ord('0') <= i <= ord('9') else ord(' ') for i in range(256))  # digits -> '0', anything else -> ' '
+LONG_NUMBER = b'0' * 19  # numbers this long may not fit in 64 bits
+
+
+def has_long_numbers(data):
+    # Cheap (a C level translate + find) check for numbers fast codecs would turn into lossy floats
+    if isinstance(data, str):
+        data = data.encode('utf-8', 'surrogatepass')
+    return LONG_NUMBER in data.translate(DIGITS_TABLE)
+
+
+def has_non_finite_floats(obj):
+    if isinstance(obj, float):
+        return not(math.isfinite(obj))
+    if isinstance(obj, dict):
+        return any(has_non_finite_floats(value) for value in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return any(has_non_finite_floats(value) for value in obj)
+    return False
+
+
+class FastJsonCodec(JsonCodec):
+    # Third party codecs do not handle everything the stdlib json module does (integers past 64 bits, NaN/Infinity, UTF-16/32
+    # bodies...): whatever they fail on (or would get silently wrong) goes through the stdlib codec instead, so
+    # installing one of them never changes what is sent or parsed.
+    fallback_codec = StdlibJsonCodec()
+    fallback_exceptions = (TypeError, ValueError, OverflowError)
+
+    def fast_dumps(self, obj):
+        raise NotImplementedError('Fast JSON codecs must implement fast_dumps().')
+
+    def fast_loads(self, data):
+        raise NotImplementedError('Fast JSON codecs must implement fast_loads().')
+
+    def dumps(self, obj):
+        try:
+            data = self.fast_dumps(obj)
+        except self.fallback_exceptions:
+            return self.fallback_codec.dumps(obj)
+        if b'null' in data and has_non_finite_floats(obj):  # NaN/Infinity are encoded as null by fast codecs
+            return self.fallback_codec.dumps(obj)
+        return data
+
+    def loads(self, data):
+        if has_long_numbers(data):
+            return self.fallback_codec.loads(data)
+        try:
+            return self.fast_loads(data)
+        except self.fallback_exceptions:
+            return self.fallback_codec.loads(data)
+
+
+class OrjsonCodec(FastJsonCodec):
+    name = 'orjson'
+
+    def __init__(self):
+        import orjson
+        self._orjson = orjson
+        self._options = orjson.OPT_NON_STR_KEYS  # {1: 2} -> {"1": 2}, as the stdlib json module does
+
+    def fast_dumps(self, obj):
+        return self._orjson.dumps(obj, option=self._options)
+
+    def fast_loads(self, data):
+        return self._orjson.loads(data)
+
+
+class MsgspecCodec(FastJsonCodec):
+    name = 'msgspec'
+
+    def __init__(self):
+        import msgspec
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+        self.fallback_exceptions = FastJsonCodec.fallback_exceptions + (msgspec.MsgspecError, )
+
+    def fast_dumps(self, obj):
+        return self._encoder.encode(obj)
+
+    def fast_loads(self, data):
+        return self._decoder.decode(data)
+
+
+class UjsonCodec(FastJsonCodec):
+    name = 'ujson'
+
+    def __init__(self):
+        import ujson
+        self._ujson = ujson
+
+    def fast_dumps(self, obj):
+        return self._ujson.dumps(obj).encode('utf-8')
+
+    def fast_loads(self, data):
+        return self._ujson.loads(data)
+
+
+CODEC_CLASSES_BY_PREFERENCE = (OrjsonCodec, MsgspecCodec, UjsonCodec, StdlibJsonCodec)
+_default_json_codec = None
+
+
+def get_available_json_codecs():
+    codecs = []
+    for codec_class in CODEC_CLASSES_BY_PREFERENCE:
+        try:
+            codecs.append(codec_class())
+        except ImportError:
+            pass
+    return codecs
+
+
+def get_default_json_codec():
+    # The fastest installed codec (orjson, msgspec, ujson), falling back to the stdlib json module.
+    global _default_json_codec
+    if _default_json_codec is None:
+        _default_json_codec = get_available_json_codecs()[0]
+    return _default_json_codec
@@ -1,12 +1,18 @@
 import requests
 
+from .concurrency import map_concurrently
 from .datastructures import Meta, NoContent, UnhandledResponse
+from .iterators import ListIterator
 from .utils import add_querystring_to_url
 
 
 class ListMixin(object):
     list_expected_status_code = 200
     list_url = None
+    list_prefetch_workers = None  # if set iter_all fetches pages concurrently when all page urls are known up front (DRF 'count')
+    list_prefetch_read_ahead = None  # max pages fetched ahead of the one being consumed (defaults to list_prefetch_workers)
+    list_stream_chunk_size = 64 * 1024  # bytes read from the socket at a time by iter_stream
+    list_iterator_class = ListIterator  # what iter_all returns
 
     @classmethod
     def get_list_url(cls):
@@ -14,10 +20,54 @@ class ListMixin(object):
             return cls.list_url.format(base_api_url=cls.get_base_api_url())
         return cls.get_base_api_url()
 
+    @classmethod
+    def build_list_url(cls, **kwargs):
+        params = cls.get_projection_query_params()
+        params.update(kwargs)
+        return add_querystring_to_url(cls.get_list_url(), **params)
+
     @classmethod
     def list(cls, **kwargs):
-        url = add_querystring_to_url(cls.get_list_url(), **kwargs)
-        response = cls.request(requests.get, url)
+        url = cls.build_list_url(**kwargs)
+        response = cls.cached_request(requests.get, url, 'list')
+        return cls.process_list_response(response)
+
+    @classmethod
+    def iter_all(cls, max_items=None, resume_from=None, **kwargs):
+        # Lazily yields every object of the collection following the pagination next links, one page in memory at a time.
+        # `resume_from` accepts the `.cursor` of a previous iterator (or a page url): kwargs are ignored in this case.
+        iterator_kwargs = {
+            'max_items': max_items,
+            'prefetch_workers': cls.list_prefetch_workers,
+            'prefetch_read_ahead': cls.list_prefetch_read_ahead,
+        }
+        if resume_from is None:
+            return cls.list_iterator_class(cls, cls.build_list_url(**kwargs), **iterator_kwargs)
+        if isinstance(resume_from, str):
+            return cls.list_iterator_class(cls, resume_from, **iterator_kwargs)
+        return cls.list_iterator_class(cls, resume_from.url, offset=resume_from.offset, **iterator_kwargs)
+
+    @classmethod
+    def iter_stream(cls, **kwargs):
+        # Lazily yields the objects of a single (huge) list response while it is downloaded, never holding the whole body.
+        url = cls.build_list_url(**kwargs)
+        response = cls.request(requests.get, url, stream=True)
+        if response.status_code != cls.list_expected_status_code:
+            response.close()  # Releases the (streamed) connection
+            yield UnhandledResponse(meta=Meta(response))
+            return
+
+        try:
+            chunks = response.iter_content(chunk_size=cls.list_stream_chunk_size)
+            for data in cls.pagination_class().get_results_stream(chunks):
+                with cls.instrument('init_existing_object', objects=1):  # The body is decoded as it is downloaded
+                    instance = cls.init_existing_object(**data)
+                yield instance
+        finally:
+            response.close()
+
+    @classmethod
+    def process_list_response(cls, response):
         if response.status_code != cls.list_expected_status_code:
             return UnhandledResponse(meta=Meta(response))
         return cls.prepare_response(response, cls, many=True)
@@ -27,6 +77,8 @@ class CreateMixin(object):
     create_payload_mode = 'data'  # 'data or 'json
     create_expected_status_code = 201
     create_url = None
+    bulk_create_url = None  # if set create_many sends bulk_chunk_size objects per request to this url (a list payload)
+    bulk_create_expected_status_code = 201
 
     @classmethod
     def get_create_url(cls):
@@ -38,6 +90,39 @@ class CreateMixin(object):
     def create(cls, **kwargs):
         outer_kwargs = {cls.create_payload_mode: kwargs}
         response = cls.request(requests.post, cls.get_create_url(), **outer_kwargs)
+        cls.invalidate_cache()
+        return cls.process_create_response(response)
+
+    @classmethod
+    def get_bulk_create_url(cls):
+        return cls.bulk_create_url.format(base_api_url=cls.get_base_api_url())
+
+    @classmethod
+    def get_bulk_create_payload(cls, objects):
+        return list(objects)
+
+    @classmethod
+    def bulk_create(cls, objects):
+        outer_kwargs = cls.get_bulk_payload_kwargs(cls.get_bulk_create_payload(objects))
+        response = cls.request(requests.post, cls.get_bulk_create_url(), **outer_kwargs)
+        cls.invalidate_cache()
+        return cls.process_bulk_create_response(response)
+
+    @classmethod
+    def create_many(cls, objects, max_concurrency=None, lazy=False):
+        # objects: iterable of dicts, each one being the kwargs of a create() call
+        if cls.bulk_create_url:
+            return cls.run_bulk_batch(cls.bulk_create, objects, max_concurrency=max_concurrency, lazy=lazy)
+        return cls.run_batch(lambda kwargs: cls.create(**kwargs), objects, max_concurrency=max_concurrency, lazy=lazy)
+
+    @classmethod
+    def process_bulk_create_response(cls, response):
+        if response.status_code != cls.bulk_create_expected_status_code:
+            return UnhandledResponse(meta=Meta(response))
+        return cls.prepare_response(response, cls, many=True, pagination_class=cls.bulk_pagination_class)
+
+    @classmethod
+    def process_create_response(cls, response):
         if response.status_code != cls.create_expected_status_code:
             return UnhandledResponse(meta=Meta(response))
         return cls.prepare_response(response, cls)
@@ -47,6 +132,10 @@ class CreateMixin(object):
             return self.create(**self._changed_data)
         return self.update(self.get_identifier(), **self._changed_data)
 
+    @classmethod
+    def save_all(cls, instances, max_concurrency=None, lazy=False):
+        return cls.run_batch(lambda instance: instance.save(), instances, max_concurrency=max_concurrency, lazy=lazy)
+
 
 class RetrieveMixin(object):
     retrieve_expected_status_code = 200
@@ -58,9 +147,29 @@ class RetrieveMixin(object):
             return cls.retrieve_url.format(base_api_url=cls.get_base_api_url(), identifier=identifier)
         return cls.get_instance_url(identifier)
 
+    @classmethod
+    def build_retrieve_url(cls, identifier):
+        params = cls.get_projection_query_params()
+        if params:
+            return add_querystring_to_url(cls.get_retrieve_url(identifier), **params)
+        return cls.get_retrieve_url(identifier)
+
     @classmethod
     def retrieve(cls, identifier):
-        response = cls.request(requests.get, cls.get_retrieve_url(identifier))
+        response = cls.cached_request(requests.get, cls.build_retrieve_url(identifier), 'object:{}'.format(identifier))
+        return cls.process_retrieve_response(response)
+
+    @classmethod
+    def retrieve_many(cls, identifiers, max_concurrency=None, as_completed=False):
+        # Failures do not abort the batch: whatever on_exception raises for an identifier is returned in its place.
+        # With as_completed=True (identifier, result) tuples are yielded as soon as each request finishes.
+        results = map_concurrently(cls.retrieve, identifiers, max_concurrency or cls.max_concurrency, ordered=not(as_completed))
+        if as_completed:
+            return results
+        return [result for _, result in results]
+
+    @classmethod
+    def process_retrieve_response(cls, response):
         if response.status_code != cls.retrieve_expected_status_code:
             return UnhandledResponse(meta=Meta(response))
         return cls.prepare_response(response, cls)
@@ -70,6 +179,8 @@ class UpdateMixin(object):
     update_payload_mode = 'data'  # 'data or 'json
     update_expected_status_code = 200
     update_url = None
+    bulk_update_url = None  # if set update_many sends bulk_chunk_size objects per request to this url (a list payload)
+    bulk_update_expected_status_code = 200
 
     @classmethod
     def get_update_url(cls, identifier):
@@ -81,6 +192,42 @@ class UpdateMixin(object):
     def update(cls, identifier, **kwargs):
         outer_kwargs = {cls.update_payload_mode: kwargs}
         response = cls.request(requests.patch, cls.get_update_url(identifier), **outer_kwargs)
+        cls.invalidate_cache(identifier)
+        return cls.process_update_response(response)
+
+    @classmethod
+    def get_bulk_update_url(cls):
+        return cls.bulk_update_url.format(base_api_url=cls.get_base_api_url())
+
+    @classmethod
+    def get_bulk_update_payload(cls, objects):
+        return [dict(data, **{cls.identifier_field: identifier}) for identifier, data in objects]
+
+    @classmethod
+    def bulk_update(cls, objects):
+        # objects: list of (identifier, dict) tuples
+        objects = list(objects)
+        outer_kwargs = cls.get_bulk_payload_kwargs(cls.get_bulk_update_payload(objects))
+        response = cls.request(requests.patch, cls.get_bulk_update_url(), **outer_kwargs)
+        for identifier, _ in objects:
+            cls.invalidate_cache(identifier)
+        return cls.process_bulk_update_response(response)
+
+    @classmethod
+    def update_many(cls, objects, max_concurrency=None, lazy=False):
+        # objects: iterable of (identifier, dict) tuples, the dict being the kwargs of an update() call
+        if cls.bulk_update_url:
+            return cls.run_bulk_batch(cls.bulk_update, objects, max_concurrency=max_concurrency, lazy=lazy)
+        return cls.run_batch(lambda item: cls.update(item[0], **item[1]), objects, max_concurrency=max_concurrency, lazy=lazy)
+
+    @classmethod
+    def process_bulk_update_response(cls, response):
+        if response.status_code != cls.bulk_update_expected_status_code:
+            return UnhandledResponse(meta=Meta(response))
+        return cls.prepare_response(response, cls, many=True, pagination_class=cls.bulk_pagination_class)
+
+    @classmethod
+    def process_update_response(cls, response):
         if response.status_code != cls.update_expected_status_code:
             return UnhandledResponse(meta=Meta(response))
         return cls.prepare_response(response, cls)
@@ -90,6 +237,10 @@ class UpdateMixin(object):
             return self.create(**self._changed_data)
         return self.update(self.get_identifier(), **self._changed_data)
 
+    @classmethod
+    def save_all(cls, instances, max_concurrency=None, lazy=False):
+        return cls.run_batch(lambda instance: instance.save(), instances, max_concurrency=max_concurrency, lazy=lazy)
+
 
 class DeleteMixin(object):
     delete_expected_status_code = 204
@@ -104,6 +255,15 @@ class DeleteMixin(object):
     @classmethod
     def delete(cls, identifier):
         response = cls.request(requests.delete, cls.get_delete_url(identifier))
+        cls.invalidate_cache(identifier)
+        return cls.process_delete_response(response)
+
+    @classmethod
+    def delete_many(cls, identifiers, max_concurrency=None, lazy=False):
+        return cls.run_batch(cls.delete, identifiers, max_concurrency=max_concurrency, lazy=lazy)
+
+    @classmethod
+    def process_delete_response(cls, response):
         if response.status_code != cls.delete_expected_status_code or (response.status_code != 204):
             return UnhandledResponse(meta=Meta(response))
         return NoContent(meta=Meta(response))
@@ -0,0 +1,130 @@
+import mmap
+import os
+import uuid
+
+from requests.utils import guess_filename
+
+from .utils import should_iterate
+
+
+def get_file_size(file):
+    # Bytes left to be read from the file (None if it can not be known without reading it)
+    try:
+        return os.fstat(file.fileno()).st_size - file.tell()
+    except (AttributeError, OSError, ValueError):
+        pass
+    try:
+        position = file.tell()
+        size = file.seek(0, os.SEEK_END) - position
+        file.seek(position)
+        return size
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def format_header_param(name, value):
+    # name="value" with \n, \r and " percent encoded (WHATWG HTML standard, as browsers, curl and urllib3 do)
+    value = value.decode('utf-8') if isinstance(value, bytes) else str(value)
+    return '{}="{}"'.format(name, value.translate({10: '%0A', 13: '%0D', 34: '%22'}))
+
+
+def to_bytes(value):
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode('utf-8')
+
+
+class MultipartEncoder(object):
+    # Streams a multipart/form-data body: form fields are encoded upfront (they are small), files are read `chunk_size`
+    # bytes at a time (memory-mapped when they are regular files), so memory usage does not depend on the files sizes.
+    # requests sends it with a Content-Length when len() is known, iter(encoder) is sent with Transfer-Encoding: chunked.
+    # The body is the very same requests would build from data=fields, files=files (None values are left out, too).
+    def __init__(self, fields=None, files=None, boundary=None, chunk_size=64 * 1024, progress_callback=None, use_mmap=True):
+        self.boundary = boundary or uuid.uuid4().hex
+        self.chunk_size = chunk_size
+        self.progress_callback = progress_callback  # callable(bytes_sent, total_bytes or None)
+        self.use_mmap = use_mmap
+        self.parts = []  # (headers bytes, value bytes or file, file size or None)
+
+        for name, value in (fields or {}).items():
+            for item in (value if should_iterate(value) else [value]):
+                if item is not None:
+                    self.parts.append((self.get_part_headers(name), to_bytes(item), None))
+
+        for name, file in (files or {}).items():
+            filename = guess_filename(file) or name
+            self.parts.append((self.get_part_headers(name, filename), file, get_file_size(file)))
+
+        self.closing = '--{}--\r\n'.format(self.boundary).encode('utf-8')
+        self.size = self.get_size()
+
+    @property
+    def content_type(self):
+        return 'multipart/form-data; boundary={}'.format(self.boundary)
+
+    def get_part_headers(self, name, filename=None):
+        headers = '--{}\r\nContent-Disposition: form-data; {}'.format(self.boundary, format_header_param('name', name))
+        if filename is not None:
+            headers += '; ' + format_header_param('filename', filename)
+        return (headers + '\r\n\r\n').encode('utf-8')
+
+    def get_size(self):
+        size = len(self.closing)
+        for headers, value, file_size in self.parts:
+            if isinstance(value, bytes):
+                file_size = len(value)
+            elif file_size is None:
+                return None
+            size += len(headers) + file_size + 2  # + '\r\n'
+        return size
+
+    def __len__(self):
+        if self.size is None:
+            raise TypeError('The size of (at least) one of the files is unknown: use iter(encoder) (chunked).')
+        return self.size
+
+    def iter_file(self, file):
+        try:
+            fileno = file.fileno()
+        except (AttributeError, OSError, ValueError):
+            fileno = None
+
+        if self.use_mmap and fileno is not None:
+            position = file.tell()
+            try:
+                mapped = mmap.mmap(fileno, 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):  # empty files, pipes, sockets...
+                mapped = None
+            if mapped is not None:
+                with mapped:
+                    size = len(mapped)
+                    for start in range(position, size, self.chunk_size):
+                        yield mapped[start:start + self.chunk_size]
+                file.seek(size)  # As if it was read
+                return
+
+        while True:
+            chunk = file.read(self.chunk_size)
+            if not(chunk):
+                return
+            yield to_bytes(chunk)
+
+    def iter_chunks(self):
+        for headers, value, _ in self.parts:
+            yield headers
+            if isinstance(value, bytes):
+                yield value
+            else:
+                yield from self.iter_file(value)
+            yield b'\r\n'
+        yield self.closing
+
+    def __iter__(self):
+        sent = 0
+        for chunk in self.iter_chunks():
+            if not(chunk):
+                continue
+            yield chunk
+            sent += len(chunk)
+            if self.progress_callback is not None:
+                self.progress_callback(sent, self.size)
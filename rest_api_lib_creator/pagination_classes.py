@@ -1,12 +1,66 @@
+from math import ceil
+from urllib.parse import parse_qsl, urlparse
+
+from .utils import add_querystring_to_url, iter_json_array
+
+
 class NoPagination(object):
     def get_results(self, json_response):
         return json_response
 
+    def get_results_stream(self, chunks):
+        return iter_json_array(chunks)
+
+    def get_next_url(self, json_response, url):
+        return None
+
+    def get_page_urls(self, json_response, url):
+        return None  # Remaining pages are not known up front
+
 
 class DRFPageNumberPagination(object):
+    next_url_key = 'next'
+    count_key = 'count'
+    page_query_param = 'page'
+
     def get_results(self, json_response):
         return json_response['results']
 
+    def get_results_stream(self, chunks):
+        return iter_json_array(chunks, key='results')
+
+    def get_next_url(self, json_response, url):
+        return json_response.get(self.next_url_key)
+
+    def get_page_urls(self, json_response, url):
+        next_url = self.get_next_url(json_response, url)
+        count = json_response.get(self.count_key)
+        if not next_url:
+            return []
+        if count is None:
+            return None
+
+        query = dict(parse_qsl(urlparse(next_url).query))
+        next_page = int(query.get(self.page_query_param, 2))
+        page_size = len(self.get_results(json_response))  # As there is a next page this one is a full page
+        last_page = int(ceil(count / page_size))
+        return [add_querystring_to_url(next_url, **{self.page_query_param: page}) for page in range(next_page, last_page + 1)]
+
 
 class DRFLimitOffsetPagination(DRFPageNumberPagination):
-    pass
+    limit_query_param = 'limit'
+    offset_query_param = 'offset'
+
+    def get_page_urls(self, json_response, url):
+        next_url = self.get_next_url(json_response, url)
+        count = json_response.get(self.count_key)
+        if not next_url:
+            return []
+        if count is None:
+            return None
+
+        query = dict(parse_qsl(urlparse(next_url).query))
+        limit = int(query.get(self.limit_query_param, len(self.get_results(json_response))))
+        next_offset = int(query.get(self.offset_query_param, limit))
+        offsets = range(next_offset, count, limit)
+        return [add_querystring_to_url(next_url, **{self.offset_query_param: offset}) for offset in offsets]
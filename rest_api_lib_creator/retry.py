@@ -0,0 +1,87 @@
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+from requests.exceptions import ConnectionError, Timeout
+
+from .sessions import get_method_name
+
+IDEMPOTENT_METHODS = frozenset(['get', 'head', 'options', 'put', 'delete'])
+
+
+def is_stream(data):
+    # Bodies which can be read only once (file objects, generators, streaming multipart encoders...) as requests sees them
+    return hasattr(data, '__iter__') and not(isinstance(data, (str, bytes, list, tuple, dict))) or hasattr(data, 'read')
+
+
+class RetryPolicy(object):
+    # Retries transient failures (given status codes / exceptions) of idempotent methods, waiting an exponential backoff
+    # with full jitter (random between 0 and backoff_factor * 2 ** (attempt - 1), capped at backoff_max) between attempts.
+    # Retry-After headers (seconds or http date) are honored up to max_retry_after seconds (otherwise no retry happens).
+    def __init__(self, max_attempts=3, status_codes=(429, 502, 503, 504), exceptions=(ConnectionError, Timeout),
+                 methods=IDEMPOTENT_METHODS, backoff_factor=0.5, backoff_max=30, jitter=True, max_retry_after=60):
+        self.max_attempts = max_attempts
+        self.status_codes = frozenset(status_codes)
+        self.exceptions = tuple(exceptions)
+        self.methods = None if methods is None else frozenset(methods)  # None means every method (even non idempotent ones)
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.max_retry_after = max_retry_after
+
+    def is_retryable_method(self, method_name):
+        return self.methods is None or method_name in self.methods
+
+    def get_backoff(self, attempt):
+        backoff = min(self.backoff_max, self.backoff_factor * (2 ** (attempt - 1)))
+        if self.jitter:
+            return random.uniform(0, backoff)
+        return backoff
+
+    def get_retry_after(self, response):
+        value = response.headers.get('Retry-After')
+        if not value:
+            return None
+        try:
+            return max(0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def get_delay(self, attempt, response=None):
+        # None means the request should not be retried
+        if response is not None:
+            retry_after = self.get_retry_after(response)
+            if retry_after is not None:
+                return retry_after if retry_after <= self.max_retry_after else None
+        return self.get_backoff(attempt)
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def call(self, func, method, url, **kwargs):
+        # Calls func(method, url, **kwargs) until it succeeds or the attempts are over. Returned responses get `_retries`.
+        retryable = self.is_retryable_method(get_method_name(method)) and not(kwargs.get('files')) and \
+            not(is_stream(kwargs.get('data')))
+        attempt = 1
+        while True:
+            try:
+                response = func(method, url, **kwargs)
+            except self.exceptions:
+                if not(retryable) or attempt >= self.max_attempts:
+                    raise
+                delay = self.get_backoff(attempt)
+            else:
+                delay = None
+                if retryable and attempt < self.max_attempts and response.status_code in self.status_codes:
+                    delay = self.get_delay(attempt, response)
+                if delay is None:
+                    response._retries = attempt - 1
+                    return response
+                response.close()  # Releases the connection back to the pool
+
+            self.sleep(delay)
+            attempt += 1
@@ -0,0 +1,74 @@
+import threading
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+
+REQUESTS_METHODS = {
+    requests.get: 'get',
+    requests.options: 'options',
+    requests.head: 'head',
+    requests.post: 'post',
+    requests.put: 'put',
+    requests.patch: 'patch',
+    requests.delete: 'delete',
+}
+
+
+def get_method_name(method):
+    if isinstance(method, str):
+        return method.lower()
+    try:
+        return REQUESTS_METHODS.get(method)
+    except TypeError:  # unhashable callables are never module-level requests functions
+        return None
+
+
+def create_session(pool_connections=10, pool_maxsize=10, pool_block=False, keep_alive=True, persist_cookies=False):
+    session = requests.Session()
+    if not persist_cookies:
+        # Sessions are shared by libs (and calls): cookies set by a response must not be sent on unrelated calls, as
+        # module-level requests functions never did (cookies passed to a call are still sent).
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, pool_block=pool_block)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    if not keep_alive:
+        session.headers['Connection'] = 'close'
+    return session
+
+
+class SessionPool(object):
+    def __init__(self):
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        return key in self._sessions
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get(self, key, factory=create_session, **factory_kwargs):
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None:
+                session = self._sessions[key] = factory(**factory_kwargs)
+            return session
+
+    def close(self, key=None):
+        with self._lock:
+            keys = list(self._sessions) if key is None else [key]
+            sessions = [self._sessions.pop(k) for k in keys if k in self._sessions]
+
+        for session in sessions:
+            session.close()
+
+
+session_pool = SessionPool()
@@ -0,0 +1,99 @@
+import threading
+import time
+
+
+class RateLimiter(object):
+    # Token bucket (`rate` requests per second, up to `burst` at once after an idle period) plus a max in flight semaphore.
+    # Waits are reserved under the lock and slept outside of it, so concurrent callers are spread evenly in time.
+    # With adaptive=True X-RateLimit-Remaining/X-RateLimit-Reset response headers set the rate to what is left of the
+    # server quota for the current window, never above the configured rate (and a 429 Retry-After pauses every caller).
+    def __init__(self, rate=None, burst=None, max_in_flight=None, adaptive=False):
+        self.rate = self.max_rate = rate
+        self.burst = self.max_burst = burst or max(1, rate or 1)
+        self.max_in_flight = max_in_flight
+        self.adaptive = adaptive
+        self._tokens = self.burst
+        self._updated_at = time.monotonic()
+        self._paused_until = 0
+        self._lock = threading.Lock()
+        self._semaphore = threading.BoundedSemaphore(max_in_flight) if max_in_flight else None
+
+    def reserve(self):
+        # Takes a token (possibly a future one) and returns how long to wait for it
+        with self._lock:
+            now = time.monotonic()
+            wait = max(0, self._paused_until - now)
+            if self.rate:
+                self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+                self._tokens -= 1
+                if self._tokens < 0:
+                    wait = max(wait, -self._tokens / self.rate)
+            self._updated_at = now
+            return wait
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def acquire(self):
+        if self._semaphore is not None:
+            self._semaphore.acquire()
+        wait = self.reserve()
+        if wait > 0:
+            self.sleep(wait)
+
+    def release(self, response=None):
+        if self._semaphore is not None:
+            self._semaphore.release()
+        if self.adaptive and response is not None:
+            self.update_from_response(response)
+
+    def update_from_response(self, response):
+        headers = response.headers
+        remaining = get_number(headers.get('X-RateLimit-Remaining'))
+        reset = get_number(headers.get('X-RateLimit-Reset'))
+        if reset is not None and reset > 1e9:  # an epoch timestamp instead of seconds to go
+            reset = reset - time.time()
+        retry_after = get_number(headers.get('Retry-After')) if response.status_code == 429 else None
+
+        with self._lock:
+            now = time.monotonic()
+            if retry_after is not None:
+                self._paused_until = max(self._paused_until, now + retry_after)
+            if remaining is None or reset is None or reset <= 0:
+                return
+            if remaining < 1:
+                self._paused_until = max(self._paused_until, now + reset)
+            else:
+                self._tokens = min(self._tokens, remaining)
+                self.rate = remaining / reset if self.max_rate is None else min(self.max_rate, remaining / reset)
+                self.burst = max(1, min(self.max_burst, remaining))
+
+
+def get_number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiterRegistry(object):
+    def __init__(self):
+        self._rate_limiters = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._rate_limiters)
+
+    def get(self, key, factory=RateLimiter, **factory_kwargs):
+        with self._lock:
+            rate_limiter = self._rate_limiters.get(key)
+            if rate_limiter is None:
+                rate_limiter = self._rate_limiters[key] = factory(**factory_kwargs)
+            return rate_limiter
+
+    def clear(self):
+        with self._lock:
+            self._rate_limiters.clear()
+
+
+rate_limiters = RateLimiterRegistry()
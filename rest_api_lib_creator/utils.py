@@ -1,4 +1,8 @@
+import codecs
+import json
 from collections import OrderedDict
+from collections.abc import Mapping
+from itertools import islice
 from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
 
 
@@ -13,3 +17,117 @@ def add_querystring_to_url(url, **params):
 
 def should_iterate(value):
     return isinstance(value, (list, tuple, set))
+
+
+def is_utf8_encoding(encoding):
+    try:
+        return codecs.lookup(encoding).name == 'utf-8'
+    except LookupError:
+        return False
+
+
+def get_identity(value):
+    # A repr-able stand-in for value, the same for equal values: mappings whatever their order, plain objects (auth
+    # objects, for instance) by their attributes rather than their default repr (which holds their address)
+    if isinstance(value, Mapping):
+        return sorted(((str(k), get_identity(v)) for k, v in value.items()), key=lambda item: item[0])
+    if isinstance(value, (list, tuple)):
+        return [get_identity(item) for item in value]
+    if type(value).__repr__ is object.__repr__ and hasattr(value, '__dict__'):
+        return type(value).__qualname__, get_identity(vars(value))
+    return repr(value)
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
+
+
+class _JsonStreamReader(object):
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.decoder = json.JSONDecoder()
+        self.text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buffer = ''
+        self.position = 0
+        self.eof = False
+
+    def fill(self):
+        if self.eof:
+            return False
+
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self.eof = True
+            chunk = self.text_decoder.decode(b'', final=True)
+        elif isinstance(chunk, bytes):
+            chunk = self.text_decoder.decode(chunk)
+
+        # Drop what was already consumed, so only the current element is kept in memory
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        return True
+
+    def peek(self):
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in ' \t\n\r':
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not(self.fill()):
+                raise ValueError('Unexpected end of JSON document')
+
+    def expect(self, *chars):
+        char = self.peek()
+        if char not in chars:
+            raise ValueError('Expected {} at JSON stream, got {!r}'.format(' or '.join(chars), char))
+        self.position += 1
+        return char
+
+    def decode_value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except ValueError:
+                if not(self.fill()):
+                    raise
+                continue
+
+            # Numbers may have been cut in the middle by the chunk boundary (e.g. '-1.' being the beginning of '-1.5e10')
+            cut = end == len(self.buffer) or self.buffer[end] in '.eE+-0123456789'
+            if isinstance(value, (int, float)) and cut and self.fill():
+                continue
+
+            self.position = end
+            return value
+
+
+def iter_json_array(chunks, key=None):
+    # Incrementally parses a JSON array from an iterable of chunks (bytes or str), yielding its items one by one.
+    # With `key`, the document is an object and the array is its `key` value (other values are parsed and discarded).
+    reader = _JsonStreamReader(chunks)
+
+    if key is not None:
+        reader.expect('{')
+        if reader.peek() == '}':
+            return
+        while True:
+            current_key = reader.decode_value()
+            reader.expect(':')
+            if current_key == key:
+                break
+            reader.decode_value()
+            if reader.expect(',', '}') == '}':
+                return
+
+    reader.expect('[')
+    if reader.peek() == ']':
+        return
+    while True:
+        yield reader.decode_value()
+        if reader.expect(',', ']') == ']':
+            return
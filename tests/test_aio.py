@@ -0,0 +1,288 @@
+import asyncio
+from unittest import TestCase
+
+import mock
+import requests
+from requests.exceptions import HTTPError
+
+from rest_api_lib_creator.aio import AsyncRestApiLib, AsyncTransport, AsyncViewsetRestApiLib, ExecutorTransport
+from rest_api_lib_creator.cache import InMemoryCache
+from rest_api_lib_creator.core import OnException, RestApiLib
+from rest_api_lib_creator.datastructures import BatchResult, NoContent, UnhandledResponse
+from rest_api_lib_creator.instrumentation import CallbackInstrumentation
+from rest_api_lib_creator.iterators import AsyncListIterator
+
+
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+class FakeTransport(AsyncTransport):
+    def __init__(self, response=None, side_effect=None):
+        self.response = response
+        self.side_effect = side_effect
+        self.calls = []
+
+    async def send(self, lib_class, method, url, **kwargs):
+        self.calls.append((method, url, kwargs))
+        if self.side_effect:
+            raise self.side_effect
+        return self.response
+
+
+class AsyncRestApiLibTestCase(TestCase):
+    def setUp(self):
+        super(AsyncRestApiLibTestCase, self).setUp()
+
+        class Owner(RestApiLib):
+            pass
+
+        class Pet(AsyncViewsetRestApiLib):
+            base_api_url = 'http://super.cool/api/pets'
+            nested_objects = {'owner': Owner}
+
+        self.Owner = Owner
+        self.Pet = Pet
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        super(AsyncRestApiLibTestCase, self).tearDown()
+        self.loop.close()
+
+    def set_transport(self, status_code=200, json=None, side_effect=None):
+        response = mock.Mock(status_code=status_code, json=mock.Mock(return_value=json))
+        self.Pet.async_transport = FakeTransport(response, side_effect=side_effect)
+        return self.Pet.async_transport
+
+    def test_list(self):
+        transport = self.set_transport(json={'results': [{'id': 'xx', 'owner': {'id': 'yy'}}, {'id': 'zz'}]})
+
+        pets = run(self.Pet.list(type='dog'))
+
+        self.assertEqual(transport.calls[0][:2], (requests.get, 'http://super.cool/api/pets?type=dog'))
+        self.assertEqual(len(pets), 2)
+        self.assertIsInstance(pets[0], self.Pet)
+        self.assertIsInstance(pets[0].owner, self.Owner)
+        self.assertTrue(pets[0]._existing_instance)
+
+    def test_iter_all(self):
+        pages = {
+            'http://super.cool/api/pets': {'next': 'http://super.cool/api/pets?page=2', 'results': [{'id': 1}, {'id': 2}]},
+            'http://super.cool/api/pets?page=2': {'next': None, 'results': [{'id': 3}]},
+        }
+
+        class PageTransport(FakeTransport):
+            async def send(self, lib_class, method, url, **kwargs):
+                self.calls.append((method, url, kwargs))
+                return mock.Mock(status_code=200, json=mock.Mock(return_value=pages[url]))
+
+        self.Pet.async_transport = transport = PageTransport()
+
+        async def collect(iterator):
+            return [pet.id async for pet in iterator]
+
+        iterator = self.Pet.iter_all()
+        self.assertIsInstance(iterator, AsyncListIterator)
+        self.assertRaises(TypeError, iter, iterator)
+        self.assertEqual(run(collect(iterator)), [1, 2, 3])
+        self.assertIsNone(iterator.cursor)
+
+        iterator = self.Pet.iter_all(max_items=2)
+        self.assertEqual(run(collect(iterator)), [1, 2])
+        self.assertEqual(len(transport.calls), 3)  # The second page is not needed
+        self.assertEqual(run(collect(self.Pet.iter_all(resume_from=iterator.cursor))), [3])
+
+    def test_projection_lazy_load_is_not_available(self):
+        class LazyPet(self.Pet):
+            projection_lazy_load = True
+
+        pet = LazyPet.only('name').init_existing_object(id='xx', name='Luna')
+        self.assertRaisesRegex(AttributeError, 'not available on async libs', getattr, pet, 'color')
+        self.assertFalse(hasattr(pet, 'color'))
+
+    def test_iter_stream_is_not_available(self):
+        self.assertRaises(NotImplementedError, self.Pet.iter_stream)
+
+    def test_downloads_are_not_available(self):
+        url = 'http://super.cool/api/pets/xx/photo'
+        self.assertRaises(NotImplementedError, self.Pet.download, requests.get, url, destination='photo.png')
+        self.assertRaises(NotImplementedError, run, self.Pet.call_endpoint(requests.get, url, stream=True))
+        self.assertRaises(NotImplementedError, run, self.Pet.call_endpoint(requests.get, url, destination='photo.png'))
+
+    def test_instrumentation(self):
+        events = []
+        self.Pet.instrumentation = CallbackInstrumentation(events.append)
+        self.set_transport(json={'id': 'xx'})
+
+        run(self.Pet.call_endpoint(requests.get, 'http://super.cool/api/pets/xx', instance_class=self.Pet))
+
+        self.assertEqual([event.name for event in events], [
+            'prepare_requests_call', 'request', 'decode_json', 'init_existing_object', 'prepare_response', 'call_endpoint',
+        ])
+        self.assertEqual(events[1].data['status_code'], 200)
+
+    def test_create(self):
+        transport = self.set_transport(status_code=201, json={'id': 'xx', 'name': 'Luna'})
+
+        pet = run(self.Pet.create(name='Luna'))
+
+        self.assertEqual(transport.calls[0][:2], (requests.post, 'http://super.cool/api/pets'))
+        self.assertEqual(transport.calls[0][2]['data'], {'name': 'Luna'})
+        self.assertEqual(pet.id, 'xx')
+
+    def test_retrieve(self):
+        transport = self.set_transport(json={'id': 'xx', 'name': 'Luna'})
+
+        pet = run(self.Pet.retrieve('xx'))
+
+        self.assertEqual(transport.calls[0][:2], (requests.get, 'http://super.cool/api/pets/xx'))
+        self.assertEqual(pet.name, 'Luna')
+
+    def test_retrieve_many(self):
+        error = HTTPError('Something is not good')
+
+        class PetTransport(AsyncTransport):
+            async def send(self, lib_class, method, url, **kwargs):
+                identifier = url.rsplit('/', 1)[-1]
+                if identifier == 'boom':
+                    raise error
+                return mock.Mock(status_code=200, json=mock.Mock(return_value={'id': identifier}))
+
+        self.Pet.async_transport = PetTransport()
+
+        results = run(self.Pet.retrieve_many(['xx', 'boom', 'yy'], max_concurrency=2))
+
+        self.assertEqual([results[0].id, results[2].id], ['xx', 'yy'])
+        self.assertIs(results[1], error)
+
+    def test_batches(self):
+        class PetTransport(AsyncTransport):
+            def __init__(self):
+                self.calls = []
+
+            async def send(self, lib_class, method, url, **kwargs):
+                self.calls.append((method, url, kwargs))
+                payload = kwargs.get('data') or kwargs.get('json')
+                if url.endswith('/bulk'):
+                    return mock.Mock(status_code=201, json=mock.Mock(return_value=[dict(obj, id=obj['name']) for obj in payload]))
+                if payload and payload.get('name') == 'boom':
+                    raise HTTPError('Something is not good')
+                status_code = {requests.post: 201, requests.delete: 204}.get(method, 200)
+                return mock.Mock(status_code=status_code, json=mock.Mock(return_value=dict(payload or {}, id='xx')))
+
+        self.Pet.async_transport = transport = PetTransport()
+
+        result = run(self.Pet.create_many(({'name': name} for name in ('Luna', 'boom', 'Estrela')), max_concurrency=2))
+        self.assertIsInstance(result, BatchResult)
+        self.assertEqual([item.input['name'] for item in result.succeeded], ['Luna', 'Estrela'])
+        self.assertIsInstance(result[1].result, HTTPError)
+
+        result = run(self.Pet.update_many([('xx', {'name': 'Luna'}), ('yy', {'name': 'Estrela'})]))
+        self.assertEqual([pet.name for pet in result.results], ['Luna', 'Estrela'])
+
+        result = run(self.Pet.delete_many(['xx', 'yy']))
+        self.assertTrue(all(isinstance(item.result, NoContent) for item in result))
+
+        result = run(self.Pet.save_all([self.Pet(name='Luna'), self.Pet.init_existing_object(id='xx')]))
+        self.assertEqual(len(result.succeeded), 2)
+        self.assertEqual(len(transport.calls), 9)
+
+        class BulkPet(self.Pet):
+            bulk_create_url = '{base_api_url}/bulk'
+            bulk_chunk_size = 2
+
+        result = run(BulkPet.create_many([{'name': 'Luna'}, {'name': 'Estrela'}, {'name': 'Lua'}]))
+        self.assertEqual([pet.id for pet in result.results], ['Luna', 'Estrela', 'Lua'])
+        self.assertEqual(len(transport.calls), 11)
+
+        BulkPet.bulk_payload_mode = 'data'
+        self.assertRaises(ValueError, run, BulkPet.create_many([{'name': 'Luna'}]))
+        self.assertEqual(len(transport.calls), 11)
+
+        self.assertRaises(NotImplementedError, run, self.Pet.delete_many(['xx'], lazy=True))
+
+    def test_update_and_save(self):
+        transport = self.set_transport(json={'id': 'xx', 'name': 'Luna'})
+
+        run(self.Pet.update('xx', name='Luna'))
+        self.assertEqual(transport.calls[0][:2], (requests.patch, 'http://super.cool/api/pets/xx'))
+
+        pet = self.Pet.init_existing_object(id='xx')
+        pet.name = 'Luna'
+        run(pet.save())
+        self.assertEqual(transport.calls[1][:2], (requests.patch, 'http://super.cool/api/pets/xx'))
+        self.assertEqual(transport.calls[1][2]['data'], {'name': 'Luna'})
+
+        transport = self.set_transport(status_code=201, json={'id': 'xx', 'name': 'Luna'})
+        run(self.Pet(name='Luna').save())
+        self.assertEqual(transport.calls[0][:2], (requests.post, 'http://super.cool/api/pets'))
+
+    def test_delete_and_destroy(self):
+        transport = self.set_transport(status_code=204)
+
+        self.assertIsInstance(run(self.Pet.delete('xx')), NoContent)
+        self.assertIsInstance(run(self.Pet.init_existing_object(id='xx').destroy()), NoContent)
+        self.assertEqual([call[:2] for call in transport.calls], [(requests.delete, 'http://super.cool/api/pets/xx')] * 2)
+
+    def test_cache(self):
+        self.Pet.cache_backend = InMemoryCache()
+        transport = self.set_transport(json={'id': 'xx', 'name': 'Luna'})
+
+        run(self.Pet.retrieve('xx'))
+        pet = run(self.Pet.retrieve('xx'))
+        self.assertEqual(pet.name, 'Luna')
+        self.assertEqual(len(transport.calls), 1)
+        self.assertEqual(self.Pet.get_cache_stats()['hits'], 1)
+
+        run(self.Pet.update('xx', name='Estrela'))
+        run(self.Pet.retrieve('xx'))
+        self.assertEqual(len(transport.calls), 3)
+
+        transport.response.status_code = 204
+        run(self.Pet.delete('xx'))
+        transport.response.status_code = 200
+        run(self.Pet.retrieve('xx'))
+        self.assertEqual(len(transport.calls), 5)
+
+        transport.response.json.return_value = {'results': []}
+        run(self.Pet.list())
+        run(self.Pet.list())
+        transport.response.status_code = 201
+        run(self.Pet.create(name='Luna'))
+        transport.response.status_code = 200
+        run(self.Pet.list())
+        self.assertEqual(len(transport.calls), 8)
+
+    def test_unhandled_response(self):
+        self.set_transport(status_code=202, json={})
+        self.assertIsInstance(run(self.Pet.retrieve('xx')), UnhandledResponse)
+
+    def test_on_exception(self):
+        error = HTTPError('', response=mock.Mock(content='Something is not good'))
+        self.set_transport(side_effect=error)
+        self.assertRaisesRegex(HTTPError, 'Something is not good', run, self.Pet.retrieve('xx'))
+
+        class ForgivingPet(self.Pet):
+            on_exception = OnException.return_response
+
+        self.assertIsInstance(run(ForgivingPet.retrieve('xx')), UnhandledResponse)
+
+
+class ExecutorTransportTestCase(TestCase):
+    def test_send_runs_sync_request_path(self):
+        class Pet(AsyncRestApiLib):
+            async_transport = ExecutorTransport(max_workers=2)
+
+        response_patched = mock.Mock()
+        loop = asyncio.new_event_loop()
+        try:
+            with mock.patch.object(Pet, 'send_request', return_value=response_patched) as send_patched:
+                response = loop.run_until_complete(Pet.request(requests.get, 'http://super.cool/api/pets'))
+        finally:
+            loop.close()
+            Pet.async_transport.close()
+
+        send_patched.assert_called_once_with(requests.get, 'http://super.cool/api/pets', timeout=None, auth=None, headers=None,
+                                             files=None)
+        self.assertEqual(response, response_patched)
@@ -0,0 +1,34 @@
+import io
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+from rest_api_lib_creator.bench import build_benchmarks, build_deep, main, run_benchmark
+
+
+class BenchTestCase(TestCase):
+    def test_benchmarks_run(self):
+        for name, func in build_benchmarks().items():
+            func()  # None of them touches the network
+
+    def test_shapes(self):
+        data = build_deep(depth=3)
+        self.assertEqual(data['child']['child']['child']['id'], 3)
+
+    def test_run_benchmark(self):
+        stats = run_benchmark(lambda: [0] * 1000, min_time=0.01)
+        self.assertGreater(stats['operations'], 0)
+        self.assertGreater(stats['ops_per_second'], 0)
+        self.assertGreaterEqual(stats['retained_bytes_per_op'], 8000)
+
+    def test_main(self):
+        output = io.StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            main(['-k', 'get_pretty_identifier[simple]', '--min-time', '0', '--json', '--profile', directory,
+                  '--tracemalloc', directory], file=output)
+            self.assertEqual(sorted(os.listdir(directory)), [
+                'get_pretty_identifier_simple.prof', 'get_pretty_identifier_simple.tracemalloc',
+            ])
+
+        self.assertEqual(list(json.loads(output.getvalue())), ['get_pretty_identifier[simple]'])
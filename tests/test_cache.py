@@ -0,0 +1,56 @@
+from unittest import TestCase
+
+import mock
+
+from rest_api_lib_creator.cache import CacheBackend, InMemoryCache
+
+
+class CacheBackendTestCase(TestCase):
+    def test_interface(self):
+        backend = CacheBackend()
+        self.assertRaises(NotImplementedError, backend.get, 'key')
+        self.assertRaises(NotImplementedError, backend.set, 'key', 'value')
+        self.assertRaises(NotImplementedError, backend.delete, 'key')
+        self.assertRaises(NotImplementedError, backend.clear)
+
+
+class InMemoryCacheTestCase(TestCase):
+    def test_common(self):
+        cache = InMemoryCache()
+        self.assertIsNone(cache.fetch('key'))
+        cache.set('key', 'value')
+        self.assertEqual(cache.fetch('key'), 'value')
+        self.assertEqual(cache.get_stats(), {'hits': 1, 'misses': 1, 'size': 1, 'evictions': 0})
+
+        cache.delete('key')
+        self.assertIsNone(cache.get('key'))
+
+        cache.set('key', 'value')
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+
+    def test_lru_eviction(self):
+        cache = InMemoryCache(max_size=2)
+        cache.set('key1', 1)
+        cache.set('key2', 2)
+        cache.get('key1')  # key2 is now the least recently used
+        cache.set('key3', 3)
+
+        self.assertEqual(cache.get('key1'), 1)
+        self.assertIsNone(cache.get('key2'))
+        self.assertEqual(cache.get('key3'), 3)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_ttl(self):
+        cache = InMemoryCache(ttl=10)
+
+        with mock.patch('rest_api_lib_creator.cache.time.monotonic', return_value=100):
+            cache.set('key1', 1)
+            cache.set('key2', 2, ttl=30)
+
+        with mock.patch('rest_api_lib_creator.cache.time.monotonic', return_value=115):
+            self.assertIsNone(cache.get('key1'))
+            self.assertEqual(cache.get('key2'), 2)
+
+        with mock.patch('rest_api_lib_creator.cache.time.monotonic', return_value=130):
+            self.assertIsNone(cache.get('key2'))
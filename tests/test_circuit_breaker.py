@@ -0,0 +1,73 @@
+from unittest import TestCase
+
+import mock
+from requests.exceptions import ConnectionError, InvalidURL
+
+from rest_api_lib_creator.circuit_breaker import CircuitBreaker, CircuitBreakerOpen, CircuitBreakerRegistry
+
+
+class CircuitBreakerTestCase(TestCase):
+    def setUp(self):
+        super(CircuitBreakerTestCase, self).setUp()
+        self.now = 1000.0
+        self._monotonic_patched = mock.patch('time.monotonic', side_effect=lambda: self.now)
+        self._monotonic_patched.start()
+        self.circuit_breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=30, name='pets')
+        self.ok = mock.Mock(return_value=mock.Mock(status_code=200))
+        self.ko = mock.Mock(return_value=mock.Mock(status_code=503))
+
+    def tearDown(self):
+        super(CircuitBreakerTestCase, self).tearDown()
+        self._monotonic_patched.stop()
+
+    def test_opens_after_consecutive_failures(self):
+        self.circuit_breaker.call(self.ko)
+        self.circuit_breaker.call(self.ok)  # Resets the count
+        self.circuit_breaker.call(self.ko)
+        self.assertEqual(self.circuit_breaker.state, 'closed')
+        self.assertRaises(ConnectionError, self.circuit_breaker.call, mock.Mock(side_effect=ConnectionError()))
+        self.assertEqual(self.circuit_breaker.state, 'open')
+
+        self.assertRaises(CircuitBreakerOpen, self.circuit_breaker.call, self.ok)
+        self.ok.assert_called_once_with()
+
+    def test_half_open(self):
+        self.circuit_breaker.call(self.ko)
+        self.circuit_breaker.call(self.ko)
+
+        self.now += 30
+        self.assertEqual(self.circuit_breaker.state, 'half-open')
+        self.circuit_breaker.call(self.ko)  # The trial call failed: open again
+        self.assertEqual(self.circuit_breaker.state, 'open')
+
+        self.now += 30
+        self.circuit_breaker.before_call()
+        self.assertRaises(CircuitBreakerOpen, self.circuit_breaker.before_call)  # A single trial call at a time
+        self.circuit_breaker.record_success()
+        self.assertEqual(self.circuit_breaker.state, 'closed')
+
+    def test_other_exceptions_are_not_failures(self):
+        for _ in range(3):
+            self.assertRaises(InvalidURL, self.circuit_breaker.call, mock.Mock(side_effect=InvalidURL()))
+        self.assertEqual(self.circuit_breaker.state, 'closed')
+
+    def test_metrics(self):
+        self.circuit_breaker.call(self.ok)
+        self.circuit_breaker.call(self.ko)
+        self.circuit_breaker.call(self.ko)
+        self.assertRaises(CircuitBreakerOpen, self.circuit_breaker.call, self.ok)
+
+        self.assertEqual(self.circuit_breaker.get_metrics(), {
+            'state': 'open', 'consecutive_failures': 2, 'calls': 3, 'successes': 1, 'failures': 2, 'rejected': 1, 'opened': 1,
+        })
+
+
+class CircuitBreakerRegistryTestCase(TestCase):
+    def test_common(self):
+        registry = CircuitBreakerRegistry()
+        circuit_breaker = registry.get('key', name='pets')
+        self.assertIs(registry.get('key', name='pets'), circuit_breaker)
+        self.assertEqual(len(registry), 1)
+        self.assertEqual(registry.get_metrics()['pets']['state'], 'closed')
+        registry.clear()
+        self.assertEqual(len(registry), 0)
@@ -0,0 +1,111 @@
+from unittest import TestCase
+
+import mock
+
+from rest_api_lib_creator.compact import CompactMixin
+from rest_api_lib_creator.core import RestApiLib
+from rest_api_lib_creator.mixins import RetrieveMixin
+
+
+class CompactMixinTestCase(TestCase):
+    def setUp(self):
+        super(CompactMixinTestCase, self).setUp()
+
+        class Owner(CompactMixin, RestApiLib):
+            fields = ('id', 'name')
+
+        class Pet(CompactMixin, RestApiLib):
+            fields = ('id', 'name', 'owner')
+            pretty_identifier = '{name} ({id})'
+            nested_objects = {'owner': Owner}
+
+        self.Owner = Owner
+        self.Pet = Pet
+
+    def test_values_are_stored_once(self):
+        pet = self.Pet.init_existing_object(id='xx', name='Luna', color='black')
+
+        self.assertEqual(pet.id, 'xx')
+        self.assertEqual(pet.name, 'Luna')
+        self.assertEqual(pet.color, 'black')
+        self.assertNotIn('id', vars(pet))
+        self.assertNotIn('color', vars(pet))
+        self.assertRaises(AttributeError, getattr, pet, 'owner')
+        self.assertRaises(AttributeError, getattr, pet, 'unknown')
+        self.assertEqual(pet._instance_data, {'id': 'xx', 'name': 'Luna', 'color': 'black'})
+
+    def test_nested_objects(self):
+        pet = self.Pet.init_existing_object(id='xx', owner={'id': 'yy', 'name': 'Filipe'})
+        self.assertIsInstance(pet.owner, self.Owner)
+        self.assertEqual(pet.owner.name, 'Filipe')
+
+    def test_changed_data_existing_instance(self):
+        pet = self.Pet.init_existing_object(id='xx', name='Luna')
+        self.assertEqual(pet._changed_data, {})
+        self.assertIsNone(pet._compact_changed_data)  # nothing allocated before the first write
+
+        pet.name = 'Estrela'
+        pet.color = 'black'
+        self.assertEqual(pet._changed_data, {'name': 'Estrela', 'color': 'black'})
+        self.assertEqual(pet.name, 'Estrela')
+        self.assertEqual(pet.color, 'black')
+
+    def test_changed_data_new_instance(self):
+        pet = self.Pet(id='xx', name='Luna')
+        self.assertEqual(pet._changed_data, {'id': 'xx', 'name': 'Luna'})
+
+        pet.color = 'black'
+        self.assertEqual(pet._changed_data, {'id': 'xx', 'name': 'Luna', 'color': 'black'})
+
+    def test_identifiers(self):
+        pet = self.Pet(id='xx', name='Luna')
+        self.assertEqual(pet.get_identifier(), 'xx')
+        self.assertEqual(str(pet), '<Pet: Luna (xx)>')
+        self.assertEqual(repr(pet), '<Pet: xx>')
+
+    def test_schema_is_compiled_per_class(self):
+        class BiggerPet(self.Pet):
+            fields = ('id', 'name', 'owner', 'size')
+
+        pet = BiggerPet(id='xx', size='L')
+        self.assertEqual(pet.size, 'L')
+        self.assertEqual(BiggerPet.get_field_schema()['size'], 3)
+        self.assertNotIn('size', self.Pet.get_field_schema())
+
+    def test_fields_are_required(self):
+        class Pet(CompactMixin, RestApiLib):
+            pass
+
+        self.assertRaises(ValueError, Pet, id='xx')
+
+    def test_lazy_nested_objects(self):
+        class LazyPet(self.Pet):
+            lazy_nested_objects = True
+
+        pet = LazyPet.init_existing_object(id='xx', name='Luna', owner={'id': 'yy', 'name': 'Filipe'})
+        self.assertIn('owner', pet._lazy_nested_data)  # not cast yet
+        self.assertEqual(pet._instance_data['owner'], {'id': 'yy', 'name': 'Filipe'})
+
+        self.assertIsInstance(pet.owner, self.Owner)
+        self.assertIs(pet.owner, pet.owner)
+        self.assertEqual(pet._changed_data, {})
+        self.assertEqual(str(pet), '<LazyPet: Luna (xx)>')
+
+    def test_projection_lazy_load(self):
+        class CPet(CompactMixin, RetrieveMixin, RestApiLib):
+            base_api_url = 'http://super.cool/api/pets'
+            fields = ('id', 'name', 'bio')
+            projection_lazy_load = True
+
+        json = {'id': 'xx', 'name': 'Luna', 'bio': 'A very long text', 'color': 'black'}
+        response = mock.Mock(status_code=200, json=mock.Mock(return_value=json))
+
+        with mock.patch.object(RestApiLib, 'request', return_value=response) as request_patched:
+            pet = CPet.only('id').retrieve('xx')
+            self.assertEqual(pet._instance_data, {'id': 'xx'})
+            self.assertEqual(pet.name, 'Luna')  # A declared field
+            self.assertEqual(pet.color, 'black')  # An undeclared one
+            self.assertEqual(pet.bio, 'A very long text')
+            self.assertEqual(pet._changed_data, {})
+            self.assertRaises(AttributeError, getattr, pet, 'unknown')
+            self.assertEqual(request_patched.call_count, 2)  # only loaded once
@@ -0,0 +1,51 @@
+from unittest import TestCase
+
+import mock
+
+from rest_api_lib_creator import compression
+from rest_api_lib_creator.compression import (
+    BrotliCodec, CompressionCodec, GzipCodec, ZstdCodec, get_accept_encoding, get_available_compression_codecs,
+    get_compression_codec
+)
+
+
+class CompressionCodecTestCase(TestCase):
+    def test_interface(self):
+        self.assertRaises(NotImplementedError, CompressionCodec().compress, b'')
+        self.assertRaises(NotImplementedError, CompressionCodec().decompress, b'')
+
+    def test_available_codecs_roundtrip(self):
+        payload = b'{"id": 1, "name": "Luna", "tags": ["cat", "black"]}' * 100
+
+        for codec in get_available_compression_codecs():
+            for level in (None, 1):
+                compressed = codec.compress(payload, level)
+                self.assertLess(len(compressed), len(payload))
+                self.assertEqual(codec.decompress(compressed), payload)
+
+    def test_gzip_is_always_available(self):
+        self.assertIsInstance(get_available_compression_codecs()[-1], GzipCodec)
+
+    def test_optional_codecs(self):
+        with mock.patch.object(compression, '_available_compression_codecs', None):
+            with mock.patch.dict('sys.modules', {'brotli': None, 'zstandard': None}):
+                self.assertEqual([codec.name for codec in get_available_compression_codecs()], ['gzip'])
+                self.assertRaisesRegex(ValueError, 'brotli and zstd need', get_compression_codec, 'br')
+
+        with mock.patch.object(compression, '_available_compression_codecs', None):
+            with mock.patch.dict('sys.modules', {'brotli': mock.Mock(), 'zstandard': mock.Mock()}):
+                codecs = get_available_compression_codecs()
+                self.assertEqual([type(codec) for codec in codecs], [ZstdCodec, BrotliCodec, GzipCodec])
+
+    def test_get_compression_codec(self):
+        codec = GzipCodec()
+        self.assertIs(get_compression_codec(codec), codec)
+        self.assertIsInstance(get_compression_codec('gzip'), GzipCodec)
+        self.assertRaises(ValueError, get_compression_codec, 'lzma')
+
+    def test_get_accept_encoding(self):
+        with mock.patch.object(compression, '_available_compression_codecs', [ZstdCodec.__new__(ZstdCodec), GzipCodec()]):
+            with mock.patch.object(compression, 'ACCEPT_ENCODING', 'gzip,deflate,zstd'):
+                self.assertEqual(get_accept_encoding(), 'zstd, gzip, deflate')
+            with mock.patch.object(compression, 'ACCEPT_ENCODING', 'gzip,deflate'):  # urllib3 could not decode zstd
+                self.assertEqual(get_accept_encoding(), 'gzip, deflate')
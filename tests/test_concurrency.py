@@ -0,0 +1,77 @@
+import time
+from unittest import TestCase
+
+from rest_api_lib_creator.concurrency import iter_concurrently, map_concurrently
+
+
+class IterConcurrentlyTestCase(TestCase):
+    def test_ordered(self):
+        def func(item):
+            time.sleep(0.01 * (5 - item))  # first items are the slowest ones
+            return item * 2
+
+        results = [(position, item, future.result()) for position, item, future in iter_concurrently(func, range(5), 5)]
+        self.assertEqual(results, [(i, i, i * 2) for i in range(5)])
+
+    def test_unordered(self):
+        def func(item):
+            time.sleep(0.02 * (3 - item))
+            return item
+
+        results = [future.result() for _, _, future in iter_concurrently(func, range(3), 3, ordered=False)]
+        self.assertEqual(sorted(results), [0, 1, 2])
+        self.assertEqual(results[0], 2)
+
+    def test_exceptions_are_kept_in_futures(self):
+        def func(item):
+            if item == 1:
+                raise ValueError('bad item')
+            return item
+
+        futures = [future for _, _, future in iter_concurrently(func, range(3), 2)]
+        self.assertEqual(futures[0].result(), 0)
+        self.assertIsInstance(futures[1].exception(), ValueError)
+        self.assertEqual(futures[2].result(), 2)
+
+    def test_read_ahead_gives_backpressure(self):
+        consumed = []
+
+        def items():
+            for i in range(20):
+                consumed.append(i)
+                yield i
+
+        def func(item):
+            return item
+
+        for position, item, future in iter_concurrently(func, items(), 2, read_ahead=3):
+            future.result()
+            self.assertLessEqual(len(consumed) - position, 3)
+
+        self.assertEqual(len(consumed), 20)
+
+    def test_early_stop(self):
+        calls = []
+
+        def func(item):
+            calls.append(item)
+            return item
+
+        results = iter_concurrently(func, range(1000), 2, read_ahead=2)
+        next(results)
+        results.close()
+        self.assertLess(len(calls), 10)
+
+
+class MapConcurrentlyTestCase(TestCase):
+    def test_common(self):
+        def func(item):
+            if item == 1:
+                raise ValueError('bad item')
+            return item * 2
+
+        results = list(map_concurrently(func, range(3), 2))
+        self.assertEqual([item for item, _ in results], [0, 1, 2])
+        self.assertEqual(results[0][1], 0)
+        self.assertIsInstance(results[1][1], ValueError)
+        self.assertEqual(results[2][1], 4)
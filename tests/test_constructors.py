@@ -0,0 +1,100 @@
+from unittest import TestCase
+
+import mock
+
+from rest_api_lib_creator.core import RestApiLib
+from rest_api_lib_creator.datastructures import Meta
+
+
+class CompiledConstructorTestCase(TestCase):
+    def setUp(self):
+        super(CompiledConstructorTestCase, self).setUp()
+
+        class Owner(RestApiLib):
+            fields = ('id', 'name')
+
+        class Pet(RestApiLib):
+            fields = ('id', 'name', 'owner', 'friends')
+            nested_objects = {'owner': Owner, 'friends': Owner}
+
+        class RegularPet(Pet):
+            compile_constructors = False
+
+        self.Owner = Owner
+        self.Pet = Pet
+        self.RegularPet = RegularPet
+        self.data = {'id': 'xx', 'name': 'Luna', 'owner': {'id': 1}, 'friends': [{'id': 2}, {'id': 3}], 'color': 'black'}
+
+    def test_same_instances_as_regular_init(self):
+        pet = self.Pet.init_existing_object(**self.data)
+        regular_pet = self.RegularPet.init_existing_object(**self.data)
+
+        self.assertIsNotNone(self.Pet.get_compiled_constructor())
+        self.assertIsNone(self.RegularPet.get_compiled_constructor())
+        self.assertEqual(list(vars(pet)), list(vars(regular_pet)))  # Same order, so instances keep sharing keys
+        self.assertTrue(pet._existing_instance)
+        self.assertEqual(pet._changed_data, {})
+        self.assertEqual(pet.color, 'black')  # Undeclared fields are kept as well
+        self.assertIsInstance(pet.owner, self.Owner)
+        self.assertEqual([friend.id for friend in pet.friends], [2, 3])
+        self.assertIs(pet._instance_data['owner'], pet.owner)
+
+        pet.name = 'Estrela'
+        self.assertEqual(pet._changed_data, {'name': 'Estrela'})
+        self.assertEqual(pet._instance_data['name'], 'Estrela')
+
+    def test_payload_is_not_modified(self):
+        response = mock.Mock(status_code=200, json=mock.Mock(return_value={'results': [self.data]}))
+        pets = self.Pet.prepare_response(response, self.Pet, many=True)
+
+        self.assertIsInstance(pets[0].owner, self.Owner)
+        self.assertEqual(self.data['owner'], {'id': 1})
+        self.assertIsInstance(pets._meta, Meta)
+
+        pet = self.Pet.prepare_response(response, self.Pet)
+        self.assertIsInstance(pet._meta, Meta)
+
+    def test_data_descriptors_go_through_setattr(self):
+        class Pet(self.Pet):
+            @property
+            def name(self):
+                return self.__dict__['raw_name'].upper()
+
+            @name.setter
+            def name(self, value):
+                self.__dict__['raw_name'] = value
+
+        self.assertEqual(Pet.init_existing_object(id='xx', name='Luna').name, 'LUNA')
+        self.assertEqual(Pet.init_existing_object(id='xx').id, 'xx')
+
+    def test_fallback_to_regular_init(self):
+        class CustomPet(self.Pet):
+            def __init__(self, **kwargs):
+                super(CustomPet, self).__init__(**kwargs)
+                self._custom = True
+
+        class LazyPet(self.Pet):
+            lazy_nested_objects = True
+
+        class UndeclaredPet(RestApiLib):
+            pass
+
+        self.assertIsNone(CustomPet.get_compiled_constructor())
+        self.assertTrue(CustomPet.init_existing_object(**self.data)._custom)
+        self.assertIsNone(LazyPet.get_compiled_constructor())
+        self.assertIn('owner', LazyPet.init_existing_object(**self.data)._lazy_nested_data)
+        self.assertIsNone(UndeclaredPet.get_compiled_constructor())
+        self.assertIsNone(self.Pet.only('name').get_compiled_constructor())
+
+    def test_overridden_init_existing_object_is_called(self):
+        class CustomPet(self.Pet):
+            @classmethod
+            def init_existing_object(cls, **kwargs):
+                instance = super(CustomPet, cls).init_existing_object(**kwargs)
+                instance._custom = True
+                return instance
+
+        response = mock.Mock(json=mock.Mock(return_value={'results': [self.data]}))
+        pets = RestApiLib.prepare_response(response, CustomPet, many=True)
+        self.assertTrue(pets[0]._custom)
+        self.assertIsInstance(pets[0].owner, self.Owner)
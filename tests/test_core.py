@@ -1,11 +1,27 @@
+import gzip
+import io
+import json
 import os
+import threading
 from unittest import TestCase
 
 import mock
+import requests
 from requests.exceptions import HTTPError
 
+from rest_api_lib_creator.cache import InMemoryCache
+from rest_api_lib_creator.circuit_breaker import CircuitBreakerOpen, circuit_breakers
+from rest_api_lib_creator.compression import get_accept_encoding
 from rest_api_lib_creator.core import OnException, RestApiLib, ViewsetRestApiLib
+from rest_api_lib_creator.datastructures import UnhandledResponse
+from rest_api_lib_creator.downloads import Download
+from rest_api_lib_creator.instrumentation import CallbackInstrumentation
+from rest_api_lib_creator.json_codecs import JsonCodec, StdlibJsonCodec, get_available_json_codecs
 from rest_api_lib_creator.mixins import CreateMixin, DeleteMixin, ListMixin, RetrieveMixin, UpdateMixin
+from rest_api_lib_creator.multipart import MultipartEncoder
+from rest_api_lib_creator.retry import RetryPolicy
+from rest_api_lib_creator.sessions import session_pool
+from rest_api_lib_creator.throttling import rate_limiters
 
 
 class RestApiLibTestCase(TestCase):
@@ -132,6 +148,55 @@ class RestApiLibTestCase(TestCase):
             self.assertEqual(resource_lib2.lib1[0].name, 'Lib1 data')
 
 
+class RestApiLibLazyNestedObjectsTestCase(TestCase):
+    def setUp(self):
+        super(RestApiLibLazyNestedObjectsTestCase, self).setUp()
+
+        class Owner(RestApiLib):
+            pretty_identifier = '{name}'
+
+        class Pet(RestApiLib):
+            lazy_nested_objects = True
+            nested_objects = {'owner': Owner, 'friends': Owner}
+            pretty_identifier = '{name} from {owner}'
+
+        self.Owner = Owner
+        self.Pet = Pet
+
+    def test_nested_objects_are_cast_on_first_access(self):
+        with mock.patch.object(self.Pet, 'cast_nested_object', wraps=self.Pet.cast_nested_object) as cast_patched:
+            pet = self.Pet.init_existing_object(id='xx', owner={'id': 'yy', 'name': 'Filipe'}, friends=[{'id': 'zz'}])
+            self.assertFalse(cast_patched.called)
+            self.assertEqual(pet._instance_data['owner'], {'id': 'yy', 'name': 'Filipe'})
+
+            self.assertIsInstance(pet.owner, self.Owner)
+            self.assertIs(pet.owner, pet.owner)  # cached after the first access
+            self.assertEqual(cast_patched.call_count, 1)
+            self.assertIs(pet._instance_data['owner'], pet.owner)
+
+            self.assertIsInstance(pet.friends, list)
+            self.assertIsInstance(pet.friends[0], self.Owner)
+
+        self.assertEqual(pet._changed_data, {})
+        self.assertRaises(AttributeError, getattr, pet, 'unknown')
+
+    def test_pretty_identifier(self):
+        pet = self.Pet.init_existing_object(id='xx', name='Luna', owner={'id': 'yy', 'name': 'Filipe'})
+        self.assertEqual(pet.get_pretty_identifier(), 'Luna from <Owner: Filipe>')
+
+    def test_set_before_access(self):
+        pet = self.Pet.init_existing_object(id='xx', owner={'id': 'yy'})
+        pet.owner = 'zz'
+        self.assertEqual(pet.owner, 'zz')
+        self.assertEqual(pet._changed_data, {'owner': 'zz'})
+        self.assertEqual(pet._instance_data['owner'], 'zz')
+
+    def test_new_instances_are_eager(self):
+        pet = self.Pet(owner={'id': 'yy'})
+        self.assertIsInstance(pet.__dict__['owner'], self.Owner)
+        self.assertIsInstance(pet._changed_data['owner'], self.Owner)
+
+
 class RestApiLibRequestTestCase(TestCase):
     def setUp(self):
         class MyLib1(RestApiLib):
@@ -220,6 +285,21 @@ class RestApiLibRequestTestCase(TestCase):
             self.assertEqual(response, response_patched)
             self.assertTrue(response.raise_for_status.called)
 
+    def test_final_request_signature_bulk_payload(self):
+        requests = mock.Mock()
+        data = [
+            {'key1': 'value1', 'mylib1': self.MyLib1(id='<mylib1.id>')},
+            {'key1': 'value2', 'mylib1': self.MyLib1(id='<other.id>')},
+        ]
+
+        self.MyLib2.request(requests.post, 'http://super.cool/api', json=data)
+
+        requests.post.assert_called_once_with(
+            'http://super.cool/api', timeout=10, auth=('username', 'password'),
+            headers={'Authorization': 'Token <TOKEN>'}, files=None,
+            json=[{'key1': 'value1', 'mylib1': '<mylib1.id>'}, {'key1': 'value2', 'mylib1': '<other.id>'}],
+        )
+
     def test_final_request_signature_move_file_objects_from_payload_to_files_param(self):
         response_patched = mock.Mock()
         requests = mock.Mock()
@@ -242,6 +322,25 @@ class RestApiLibRequestTestCase(TestCase):
                 self.assertEqual(response, response_patched)
                 self.assertTrue(response.raise_for_status.called)
 
+    def test_final_request_signature_streaming_uploads(self):
+        requests = mock.Mock()
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sample_file.txt')
+
+        for chunked in (False, True):
+            with mock.patch.multiple(self.MyLib2, streaming_uploads=True, streaming_uploads_chunked=chunked), open(path) as f:
+                requests.reset_mock()
+                self.MyLib2.request(requests.post, 'http://super.cool/api', data={'key1': 'value1', 'f': f})
+
+                _, kwargs = requests.post.call_args
+                self.assertIsNone(kwargs['files'])
+                self.assertTrue(kwargs['headers']['Content-Type'].startswith('multipart/form-data; boundary='))
+                self.assertEqual(kwargs['headers']['Authorization'], 'Token <TOKEN>')
+                if chunked:
+                    self.assertNotIsInstance(kwargs['data'], MultipartEncoder)
+                else:
+                    self.assertIsInstance(kwargs['data'], MultipartEncoder)
+                    self.assertEqual(len(kwargs['data']), len(b''.join(kwargs['data'])))
+
     def test_request_exception(self):
         requests = mock.Mock(get=mock.Mock(side_effect=HTTPError('', response=mock.Mock(content='Something is not good'))))
         self.assertRaisesRegexp(HTTPError, 'Something is not good', self.MyLib1.request, requests.get, 'http://super.cool/api')
@@ -254,6 +353,672 @@ class RestApiLibRequestTestCase(TestCase):
         self.assertRaisesRegexp(MemoryError, 'Wow, how did it happen?', self.MyLib3.request, requests.get, 'http://super.cool/api')
 
 
+class RestApiLibSessionTestCase(TestCase):
+    def setUp(self):
+        super(RestApiLibSessionTestCase, self).setUp()
+
+        class MyLib1(RestApiLib):
+            base_api_url = 'http://super.cool/api/users'
+
+        class MyLib2(RestApiLib):
+            base_api_url = 'http://super.cool/api/pets'
+
+        class MyLib3(RestApiLib):
+            base_api_url = 'http://super.cool/api/users'
+            use_session = False
+
+        self.MyLib1 = MyLib1
+        self.MyLib2 = MyLib2
+        self.MyLib3 = MyLib3
+
+    def tearDown(self):
+        super(RestApiLibSessionTestCase, self).tearDown()
+        session_pool.close()
+
+    def test_session_is_shared_per_base_api_url(self):
+        class MyLib1Copy(RestApiLib):
+            base_api_url = 'http://super.cool/api/users'
+
+        self.assertIs(self.MyLib1.get_session(), MyLib1Copy.get_session())
+        self.assertIsNot(self.MyLib1.get_session(), self.MyLib2.get_session())
+
+    def test_session_is_shared_per_host(self):
+        class MyLib1PerHost(self.MyLib1):
+            session_pool_key = 'host'
+
+        class MyLib2PerHost(self.MyLib2):
+            session_pool_key = 'host'
+
+        self.assertIs(MyLib1PerHost.get_session(), MyLib2PerHost.get_session())
+
+    def test_session_per_class(self):
+        class MyLib1PerClass(self.MyLib1):
+            session_pool_key = 'class'
+
+        self.assertIsNot(MyLib1PerClass.get_session(), self.MyLib1.get_session())
+        self.assertIs(MyLib1PerClass.get_session(), MyLib1PerClass.get_session())
+
+    def test_requests_functions_are_routed_through_session(self):
+        response_patched = mock.Mock()
+        session = self.MyLib1.get_session()
+
+        with mock.patch.object(session, 'get', return_value=response_patched) as get_patched:
+            response = self.MyLib1.request(requests.get, 'http://super.cool/api/users')
+
+        get_patched.assert_called_once_with('http://super.cool/api/users', timeout=None, auth=None, headers=None, files=None)
+        self.assertEqual(response, response_patched)
+
+    def test_use_session_false(self):
+        response_patched = mock.Mock()
+
+        with mock.patch('requests.api.request', return_value=response_patched) as request_patched:
+            response = self.MyLib3.request(requests.get, 'http://super.cool/api/users')
+
+        self.assertTrue(request_patched.called)
+        self.assertEqual(response, response_patched)
+
+    def test_close_session(self):
+        session = self.MyLib1.get_session()
+        self.MyLib1.close_session()
+        self.assertIsNot(self.MyLib1.get_session(), session)
+
+    def test_managed_session(self):
+        with self.MyLib1.managed_session() as session:
+            self.assertIs(self.MyLib1.get_session(), session)
+        self.assertNotIn(self.MyLib1.get_session_key(), session_pool)
+
+
+class RestApiLibConditionalRequestsTestCase(TestCase):
+    def setUp(self):
+        super(RestApiLibConditionalRequestsTestCase, self).setUp()
+
+        class Pet(RetrieveMixin, RestApiLib):
+            base_api_url = 'http://super.cool/api/pets'
+            conditional_requests = True
+            conditional_requests_backend = InMemoryCache()
+
+        self.Pet = Pet
+        self.method = mock.Mock()
+        self._get_request_method_patched = mock.patch.object(RestApiLib, 'get_request_method', return_value=self.method)
+        self._get_request_method_patched.start()
+
+    def tearDown(self):
+        super(RestApiLibConditionalRequestsTestCase, self).tearDown()
+        self._get_request_method_patched.stop()
+
+    def build_response(self, status_code, headers, json=None):
+        return mock.Mock(status_code=status_code, headers=headers, json=mock.Mock(return_value=json))
+
+    def test_not_modified(self):
+        headers = {'ETag': '"v1"', 'Last-Modified': 'Wed, 21 Oct 2015 07:28:00 GMT'}
+        self.method.return_value = self.build_response(200, headers, json={'id': 'xx', 'name': 'Luna'})
+        pet = self.Pet.retrieve('xx')
+        self.assertFalse(pet._meta.revalidated)
+        self.assertEqual(pet._meta.etag, '"v1"')
+
+        self.method.return_value = self.build_response(304, {'ETag': '"v1"'})
+        pet = self.Pet.retrieve('xx')
+
+        self.assertEqual(self.method.call_args[1]['headers'], {
+            'If-None-Match': '"v1"', 'If-Modified-Since': 'Wed, 21 Oct 2015 07:28:00 GMT',
+        })
+        self.assertIsInstance(pet, self.Pet)
+        self.assertEqual(pet.name, 'Luna')
+        self.assertTrue(pet._meta.revalidated)
+        self.assertEqual(pet._meta.last_modified, 'Wed, 21 Oct 2015 07:28:00 GMT')
+
+    def test_modified(self):
+        self.method.return_value = self.build_response(200, {'ETag': '"v1"'}, json={'id': 'xx', 'name': 'Luna'})
+        self.Pet.retrieve('xx')
+
+        self.method.return_value = self.build_response(200, {'ETag': '"v2"'}, json={'id': 'xx', 'name': 'Estrela'})
+        self.assertEqual(self.Pet.retrieve('xx').name, 'Estrela')
+
+        self.Pet.retrieve('xx')
+        self.assertEqual(self.method.call_args[1]['headers'], {'If-None-Match': '"v2"'})
+
+    def test_representations_are_revalidated_separately(self):
+        url = 'http://super.cool/api/pets/xx'
+        self.method.return_value = self.build_response(200, {'ETag': '"json"', 'Vary': 'Accept'})
+        self.Pet.request(requests.get, url, _request_kwargs={'headers': {'Accept': 'application/json'}})
+
+        self.method.return_value = self.build_response(200, {'ETag': '"csv"', 'Vary': 'Accept'})
+        self.Pet.request(requests.get, url, _request_kwargs={'headers': {'Accept': 'text/csv'}})
+        self.assertEqual(self.method.call_args[1]['headers'], {'Accept': 'text/csv'})
+
+        self.Pet.request(requests.get, url, _request_kwargs={'headers': {'Accept': 'application/json'}, 'timeout': 1})
+        self.assertEqual(self.method.call_args[1]['headers'], {'Accept': 'application/json', 'If-None-Match': '"json"'})
+
+    def test_responses_without_validators_are_not_stored(self):
+        self.method.return_value = self.build_response(200, {}, json={'id': 'xx'})
+        self.Pet.retrieve('xx')
+        self.Pet.retrieve('xx')
+        self.assertIsNone(self.method.call_args[1]['headers'])
+
+    def test_disabled(self):
+        class NonConditionalPet(self.Pet):
+            conditional_requests = False
+
+        self.method.return_value = self.build_response(200, {'ETag': '"v1"'}, json={'id': 'xx'})
+        NonConditionalPet.retrieve('xx')
+        NonConditionalPet.retrieve('xx')
+        self.assertIsNone(self.method.call_args[1]['headers'])
+        self.assertEqual(len(self.Pet.conditional_requests_backend), 0)
+
+
+class RestApiLibCoalescingTestCase(TestCase):
+    def test_concurrent_identical_gets_share_a_request(self):
+        class Pet(RetrieveMixin, RestApiLib):
+            base_api_url = 'http://super.cool/api/pets'
+            coalesce_requests = True
+
+        release = threading.Event()
+        json_patched = mock.Mock(return_value={'id': 'xx', 'name': 'Luna'})
+
+        def method(url, **kwargs):
+            release.wait(1)
+            return mock.Mock(status_code=200, json=json_patched)
+
+        method = mock.Mock(side_effect=method)
+        pets = []
+
+        with mock.patch.object(RestApiLib, 'get_request_method', return_value=method):
+            threads = [threading.Thread(target=lambda: pets.append(Pet.retrieve('xx'))) for _ in range(5)]
+            for thread in threads:
+                thread.start()
+            threading.Timer(0.1, release.set).start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(method.call_count, 1)
+        self.assertEqual(json_patched.call_count, 1)
+        self.assertEqual(len(set(id(pet) for pet in pets)), 5)
+
+        pets[0].name = 'Estrela'
+        self.assertEqual(pets[0]._changed_data, {'name': 'Estrela'})
+        self.assertEqual(pets[1]._changed_data, {})
+        self.assertEqual(pets[1].name, 'Luna')
+
+    def test_different_requests_are_not_shared(self):
+        class Pet(RetrieveMixin, RestApiLib):
+            base_api_url = 'http://super.cool/api/pets'
+            coalesce_requests = True
+
+        keys = []
+
+        def do(key, func):
+            keys.append(key)
+            return func()
+
+        with mock.patch.object(RestApiLib, 'get_request_method', return_value=mock.Mock(return_value=mock.Mock(status_code=200))):
+            with mock.patch.object(Pet.coalescing_group, 'do', side_effect=do):
+                Pet.request(requests.get, 'http://super.cool/api/pets/xx')
+                Pet.request(requests.get, 'http://super.cool/api/pets/xx')
+                Pet.request(requests.get, 'http://super.cool/api/pets/xx', _request_kwargs={'headers': {'Accept': 'text/csv'}})
+                Pet.request(requests.get, 'http://super.cool/api/pets/xx', params={'expand': 'owner'})
+                Pet.request(requests.get, 'http://super.cool/api/pets/xx', _request_kwargs={'timeout': 1})
+
+        self.assertEqual(keys[0], keys[1])
+        self.assertEqual(len(set(keys)), 4)
+
+    def test_shared_response_instances_are_isolated(self):
+        class Owner(RestApiLib):
+            pass
+
+        class Pet(RestApiLib):
+            lazy_nested_objects = True
+            nested_objects = {'owner': Owner}
+
+        response = mock.Mock(status_code=200, json=mock.Mock(return_value={'id': 'xx', 'tags': ['cat'], 'owner': {'id': 'yy'}}))
+        response._coalesced = True
+        pets = [RestApiLib.prepare_response(response, Pet) for _ in range(2)]
+
+        pets[0].tags.append('black')
+        pets[0]._lazy_nested_data['owner']['id'] = 'zz'
+        self.assertEqual(pets[1].tags, ['cat'])
+        self.assertEqual(pets[1].owner.id, 'yy')
+        self.assertEqual(response.json.call_count, 1)
+
+    def test_disabled_by_default(self):
+        method = mock.Mock(return_value=mock.Mock(status_code=200))
+
+        with mock.patch.object(RestApiLib, 'get_request_method', return_value=method):
+            RestApiLib.request(requests.get, 'http://super.cool/api/pets/xx')
+            RestApiLib.request(requests.get, 'http://super.cool/api/pets/xx')
+
+        self.assertEqual(method.call_count, 2)
+
+
+class RestApiLibJsonCodecTestCase(TestCase):
+    def setUp(self):
+        super(RestApiLibJsonCodecTestCase, self).setUp()
+
+        class UpperCodec(JsonCodec):
+            def dumps(self, obj):
+                return b'ENCODED'
+
+            def loads(self, data):
+                return {'id': 'decoded'}
+
+        class MyLib(RestApiLib):
+            json_codec = UpperCodec()
+
+        self.MyLib = MyLib
+
+    def test_json_payload_is_encoded_with_the_codec(self):
+        method = mock.Mock()
+
+        with mock.patch.object(RestApiLib, 'get_request_method', return_value=method):
+            self.MyLib.request(requests.post, 'http://super.cool/api', json={'key1': 'value1'})
+
+        method.assert_called_once_with(
+            'http://super.cool/api', data=b'ENCODED', headers={'Content-Type': 'application/json'}, timeout=None, auth=None,
+            files=None,
+        )
+
+    def test_stdlib_codec_leaves_encoding_to_requests(self):
+        class StdlibLib(RestApiLib):
+            json_codec = StdlibJsonCodec()
+
+        method = mock.Mock()
+
+        with mock.patch.object(RestApiLib, 'get_request_method', return_value=method):
+            StdlibLib.request(requests.post, 'http://super.cool/api', json={'key1': 'value1'})
+
+        method.assert_called_once_with('http://super.cool/api', json={'key1': 'value1'}, headers=None, timeout=None, auth=None,
+                                       files=None)
+
+    def test_custom_callables_are_left_untouched(self):
+        method = mock.Mock()
+        self.MyLib.request(method, 'http://super.cool/api', json={'key1': 'value1'})
+        method.assert_called_once_with('http://super.cool/api', json={'key1': 'value1'}, headers=None, timeout=None, auth=None,
+                                       files=None)
+
+    def test_response_is_decoded_with_the_codec(self):
+        response = requests.Response()
+        response._content = b'{"id": "xx"}'
+        response.request = mock.Mock()
+
+        self.assertEqual(self.MyLib.prepare_response(response, self.MyLib).id, 'decoded')
+        self.assertEqual(RestApiLib.prepare_response(response, RestApiLib).id, 'xx')
+
+    def test_declared_charset_is_honored(self):
+        response = requests.Response()
+        response._content = '{"name": "Jo\u00e3o"}'.encode('iso-8859-1')
+        response.encoding = 'ISO-8859-1'
+        response.request = mock.Mock()
+
+        for json_codec in get_available_json_codecs():
+            with mock.patch.object(RestApiLib, 'json_codec', json_codec):
+                self.assertEqual(RestApiLib.prepare_response(response, RestApiLib).name, 'Jo\u00e3o')
+
+
+class RestApiLibRetryTestCase(TestCase):
+    def setUp(self):
+        super(RestApiLibRetryTestCase, self).setUp()
+
+        class Pet(RetrieveMixin, CreateMixin, RestApiLib):
+            base_api_url = 'http://super.cool/api/pets'
+            retry_policy = RetryPolicy(max_attempts=3)
+
+        self.Pet = Pet
+        self.method = mock.Mock()
+        self._get_request_method_patched = mock.patch.object(RestApiLib, 'get_request_method', return_value=self.method)
+        self._get_request_method_patched.start()
+        self._sleep_patched = mock.patch.object(RetryPolicy, 'sleep')
+        self._sleep_patched.start()
+
+    def tearDown(self):
+        super(RestApiLibRetryTestCase, self).tearDown()
+        self._get_request_method_patched.stop()
+        self._sleep_patched.stop()
+
+    def test_retries_are_visible_through_meta(self):
+        self.method.side_effect = [
+            requests.exceptions.ConnectionError(),
+            mock.Mock(status_code=503, headers={}),
+            mock.Mock(status_code=200, headers={}, json=mock.Mock(return_value={'id': 'xx'})),
+        ]
+        pet = self.Pet.retrieve('xx')
+        self.assertEqual(pet.id, 'xx')
+        self.assertEqual(pet._meta.retries, 2)
+        self.assertEqual(self.method.call_count, 3)
+
+    def test_failures_still_go_to_on_exception(self):
+        self.method.side_effect = requests.exceptions.ConnectionError()
+        with mock.patch.object(self.Pet, 'on_exception') as on_exception_patched:
+            self.Pet.retrieve('xx')
+        self.assertEqual(self.method.call_count, 3)
+        self.assertIsInstance(on_exception_patched.call_args[0][0], requests.exceptions.ConnectionError)
+
+    def test_creation_is_not_retried(self):
+        self.method.return_value = mock.Mock(status_code=503, headers={})
+        self.Pet.create(name='Luna')
+        self.assertEqual(self.method.call_count, 1)
+
+    def test_disabled_by_default(self):
+        self.method.return_value = mock.Mock(status_code=503)
+        RestApiLib.request(requests.get, 'http://super.cool/api/pets/xx')
+        self.assertEqual(self.method.call_count, 1)
+
+
+class RestApiLibRateLimitTestCase(TestCase):
+    def setUp(self):
+        super(RestApiLibRateLimitTestCase, self).setUp()
+        rate_limiters.clear()
+        self.method = mock.Mock(return_value=mock.Mock(status_code=200, headers={}))
+        self._get_request_method_patched = mock.patch.object(RestApiLib, 'get_request_method', return_value=self.method)
+        self._get_request_method_patched.start()
+
+    def tearDown(self):
+        super(RestApiLibRateLimitTestCase, self).tearDown()
+        self._get_request_method_patched.stop()
+        rate_limiters.clear()
+
+    def test_every_attempt_goes_through_the_limiter(self):
+        class Pet(RestApiLib):
+            base_api_url = 'http://super.cool/api/pets'
+            rate_limit = 5
+            max_in_flight_requests = 2
+            retry_policy = RetryPolicy(max_attempts=2)
+
+        rate_limiter = Pet.get_rate_limiter()
+        self.method.side_effect = [mock.Mock(status_code=503, headers={}), mock.Mock(status_code=200, headers={})]
+
+        with mock.patch.object(rate_limiter, 'acquire') as acquire_patched, \
+                mock.patch.object(rate_limiter, 'release') as release_patched, mock.patch.object(RetryPolicy, 'sleep'):
+            Pet.request(requests.get, 'http://super.cool/api/pets/xx')
+
+        self.assertEqual(acquire_patched.call_count, 2)
+        self.assertEqual(release_patched.call_count, 2)
+        self.assertEqual(rate_limiter.rate, 5)
+        self.assertEqual(rate_limiter.max_in_flight, 2)
+
+    def test_released_on_exceptions(self):
+        class Pet(RestApiLib):
+            base_api_url = 'http://super.cool/api/pets'
+            max_in_flight_requests = 1
+
+        self.method.side_effect = requests.exceptions.ConnectionError()
+        self.assertRaises(requests.exceptions.ConnectionError, Pet.request, requests.get, 'http://super.cool/api/pets/xx')
+        self.assertRaises(requests.exceptions.ConnectionError, Pet.request, requests.get, 'http://super.cool/api/pets/xx')
+
+    def test_shared_limiters(self):
+        class Pet(RestApiLib):
+            base_api_url = 'http://super.cool/api/pets'
+            rate_limit = 5
+
+        class Owner(Pet):
+            base_api_url = 'http://super.cool/api/owners'
+
+        class SamePet(Pet):
+            pass
+
+        class HostPet(Pet):
+            rate_limiter_key = 'host'
+
+        class HostOwner(Owner):
+            rate_limiter_key = 'host'
+
+        self.assertIs(Pet.get_rate_limiter(), SamePet.get_rate_limiter())
+        self.assertIsNot(Pet.get_rate_limiter(), Owner.get_rate_limiter())
+        self.assertIs(HostPet.get_rate_limiter(), HostOwner.get_rate_limiter())
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(RestApiLib.get_rate_limiter())
+        RestApiLib.request(requests.get, 'http://super.cool/api/pets/xx')
+        self.assertEqual(len(rate_limiters), 0)
+
+
+class RestApiLibCircuitBreakerTestCase(TestCase):
+    def setUp(self):
+        super(RestApiLibCircuitBreakerTestCase, self).setUp()
+        circuit_breakers.clear()
+
+        class Pet(RetrieveMixin, RestApiLib):
+            base_api_url = 'http://super.cool/api/pets'
+            circuit_breaker_failure_threshold = 2
+
+        self.Pet = Pet
+        self.method = mock.Mock(side_effect=requests.exceptions.ConnectTimeout())
+        self._get_request_method_patched = mock.patch.object(RestApiLib, 'get_request_method', return_value=self.method)
+        self._get_request_method_patched.start()
+
+    def tearDown(self):
+        super(RestApiLibCircuitBreakerTestCase, self).tearDown()
+        self._get_request_method_patched.stop()
+        circuit_breakers.clear()
+
+    def test_fails_fast_through_on_exception_once_open(self):
+        self.assertRaises(requests.exceptions.ConnectTimeout, self.Pet.retrieve, 'xx')
+        self.assertRaises(requests.exceptions.ConnectTimeout, self.Pet.retrieve, 'xx')
+        self.assertEqual(self.Pet.get_circuit_breaker().state, 'open')
+
+        with mock.patch.object(self.Pet, 'on_exception') as on_exception_patched:
+            self.Pet.retrieve('xx')
+        self.assertIsInstance(on_exception_patched.call_args[0][0], CircuitBreakerOpen)
+        self.assertEqual(self.method.call_count, 2)
+
+    def test_shared_by_base_api_url(self):
+        class SamePet(self.Pet):
+            pass
+
+        class Owner(self.Pet):
+            base_api_url = 'http://super.cool/api/owners'
+
+        self.assertIs(self.Pet.get_circuit_breaker(), SamePet.get_circuit_breaker())
+        self.assertIsNot(self.Pet.get_circuit_breaker(), Owner.get_circuit_breaker())
+        self.assertEqual(sorted(circuit_breakers.get_metrics()), ['http://super.cool/api/owners', 'http://super.cool/api/pets'])
+
+    def test_disabled_by_default(self):
+        self.assertIsNone(RestApiLib.get_circuit_breaker())
+
+
+class RestApiLibInstrumentationTestCase(TestCase):
+    def setUp(self):
+        super(RestApiLibInstrumentationTestCase, self).setUp()
+        self.events = []
+
+        class Pet(ListMixin, RetrieveMixin, RestApiLib):
+            base_api_url = 'http://super.cool/api/pets'
+            instrumentation = CallbackInstrumentation(self.events.append)
+
+        self.Pet = Pet
+
+    def build_response(self, content):
+        response = requests.Response()
+        response.status_code = 200
+        response._content = content
+        response._content_consumed = True  # As requests does for non streamed responses
+        response.request = mock.Mock()
+        return response
+
+    def test_phases(self):
+        method = mock.Mock(return_value=self.build_response(b'{"results": [{"id": "xx"}, {"id": "yy"}]}'))
+        with mock.patch.object(RestApiLib, 'get_request_method', return_value=method):
+            self.Pet.list()
+
+        events = {event.name: event for event in self.events}
+        self.assertEqual([event.name for event in self.events], [
+            'prepare_requests_call', 'send', 'request', 'decode_json', 'init_existing_object', 'prepare_response',
+        ])
+        self.assertTrue(all(event.lib_class is self.Pet for event in self.events))
+        self.assertEqual(events['request'].data, {
+            'method': 'get', 'url': 'http://super.cool/api/pets', 'status_code': 200, 'response_bytes': 41,
+        })
+        self.assertEqual(events['decode_json'].data, {'response_bytes': 41})
+        self.assertEqual(events['init_existing_object'].data, {'objects': 2})
+        self.assertEqual(events['prepare_response'].data, {'many': True, 'objects': 2})
+
+    def test_iter_all(self):
+        method = mock.Mock(return_value=self.build_response(b'{"results": [{"id": "xx"}, {"id": "yy"}]}'))
+        with mock.patch.object(RestApiLib, 'get_request_method', return_value=method):
+            list(self.Pet.iter_all())
+
+        self.assertEqual([event.name for event in self.events], [
+            'prepare_requests_call', 'send', 'request', 'decode_json', 'init_existing_object', 'init_existing_object',
+        ])
+        self.assertEqual(self.events[3].data, {'response_bytes': 41})
+        self.assertEqual(self.events[-1].data, {'objects': 1})
+
+    def test_iter_stream(self):
+        response = requests.Response()
+        response.status_code = 200
+        response.raw = io.BytesIO(b'{"results": [{"id": "xx"}, {"id": "yy"}]}')
+        with mock.patch.object(RestApiLib, 'get_request_method', return_value=mock.Mock(return_value=response)):
+            list(self.Pet.iter_stream())
+
+        self.assertEqual([event.name for event in self.events], [
+            'prepare_requests_call', 'send', 'request', 'init_existing_object', 'init_existing_object',
+        ])
+
+    def test_call_endpoint(self):
+        method = mock.Mock(return_value=self.build_response(b'{"id": "xx"}'))
+        self.Pet.call_endpoint(method, 'http://super.cool/api/pets/xx/feed', instance_class=self.Pet)
+        self.assertEqual(self.events[-1].name, 'call_endpoint')
+        self.assertEqual(self.events[-2].data, {'many': False, 'objects': 1})
+
+    def test_errors(self):
+        method = mock.Mock(side_effect=requests.exceptions.ConnectionError())
+        with mock.patch.object(RestApiLib, 'get_request_method', return_value=method):
+            self.assertRaises(requests.exceptions.ConnectionError, self.Pet.retrieve, 'xx')
+
+        self.assertEqual([(event.name, event.data.get('error')) for event in self.events], [
+            ('prepare_requests_call', None), ('send', 'ConnectionError'), ('request', 'ConnectionError'),
+        ])
+
+    def test_disabled_by_default(self):
+        with RestApiLib.instrument('request') as span:
+            self.assertIsNone(span)
+
+
+class RestApiLibDownloadTestCase(TestCase):
+    def setUp(self):
+        super(RestApiLibDownloadTestCase, self).setUp()
+
+        class Report(RestApiLib):
+            base_api_url = 'http://super.cool/api/reports'
+            request_headers = {'Authorization': 'Token <TOKEN>'}
+            download_chunk_size = 4
+
+        self.Report = Report
+
+    def build_response(self, body, status_code=200, headers=None):
+        response = requests.Response()
+        response.status_code = status_code
+        response.raw = io.BytesIO(body)
+        response.headers.update(headers or {})
+        response.request = mock.Mock()
+        return response
+
+    def test_stream(self):
+        method = mock.Mock(return_value=self.build_response(b'0123456789', headers={'Content-Type': 'text/csv'}))
+        download = self.Report.call_endpoint(method, 'http://super.cool/api/reports/1/export', stream=True)
+
+        self.assertIsInstance(download, Download)
+        self.assertEqual(download._meta.response.headers['Content-Type'], 'text/csv')
+        self.assertEqual(list(download), [b'0123', b'4567', b'89'])
+        method.assert_called_once_with(
+            'http://super.cool/api/reports/1/export', timeout=None, auth=None, files=None, stream=True,
+            headers={'Authorization': 'Token <TOKEN>'},
+        )
+
+    def test_byte_range(self):
+        method = mock.Mock(return_value=self.build_response(b'45', 206, {'Content-Range': 'bytes 4-5/10'}))
+        download = self.Report.call_endpoint(method, 'http://super.cool/api/reports/1/export', stream=True, byte_range=(4, 5))
+
+        self.assertEqual((download.offset, download.total_size, b''.join(download)), (4, 10, b'45'))
+        self.assertEqual(method.call_args[1]['headers'], {
+            'Authorization': 'Token <TOKEN>', 'Range': 'bytes=4-5', 'Accept-Encoding': 'identity',
+        })
+
+    def test_destination_resume(self):
+        method = mock.Mock(return_value=self.build_response(b'456789', 206, {'Content-Range': 'bytes 4-9/10'}))
+        destination = io.BytesIO(b'0123')
+        download = self.Report.call_endpoint(method, 'http://super.cool/api/reports/1/export', destination=destination, resume=True)
+
+        self.assertEqual(destination.getvalue(), b'0123456789')
+        self.assertEqual(download.bytes_read, 6)
+        self.assertEqual(method.call_args[1]['headers']['Range'], 'bytes=4-')
+
+    def test_resume_already_downloaded(self):
+        headers = {'Content-Range': 'bytes */10'}
+        destination = io.BytesIO(b'0123456789')
+
+        for on_exception in (OnException.reraise, OnException.return_response):
+            method = mock.Mock(return_value=self.build_response(b'Range Not Satisfiable', 416, headers))
+            with mock.patch.object(self.Report, 'on_exception', on_exception):
+                download = self.Report.call_endpoint(method, 'http://super.cool/api/reports/1/export', destination=destination,
+                                                     resume=True)
+
+            self.assertEqual(destination.getvalue(), b'0123456789')
+            self.assertEqual((download.offset, download.total_size, download.bytes_read), (10, 10, 0))
+
+        destination = io.BytesIO(b'01234')  # Not the whole resource: a real error
+        method = mock.Mock(return_value=self.build_response(b'', 416, headers))
+        self.assertRaises(HTTPError, self.Report.call_endpoint, method, 'http://super.cool/api/reports/1/export',
+                          destination=destination, resume=True)
+
+    def test_unexpected_status_code(self):
+        method = mock.Mock(return_value=self.build_response(b'', 204))
+        response = self.Report.call_endpoint(method, 'http://super.cool/api/reports/1/export', stream=True)
+        self.assertIsInstance(response, UnhandledResponse)
+
+
+class RestApiLibCompressionTestCase(TestCase):
+    def setUp(self):
+        super(RestApiLibCompressionTestCase, self).setUp()
+        self.events = []
+
+        class Pet(RestApiLib):
+            base_api_url = 'http://super.cool/api/pets'
+            request_headers = {'Authorization': 'Token <TOKEN>'}
+            request_compression = 'gzip'
+            request_compression_threshold = 100
+            instrumentation = CallbackInstrumentation(self.events.append)
+
+        self.Pet = Pet
+
+    def test_json(self):
+        payload = {'name': 'Luna', 'description': 'A black cat. ' * 20}
+        kwargs = self.Pet.prepare_requests_call(json=payload)
+
+        self.assertNotIn('json', kwargs)
+        self.assertEqual(json.loads(gzip.decompress(kwargs['data'])), payload)
+        self.assertEqual(kwargs['headers']['Content-Encoding'], 'gzip')
+        self.assertEqual(kwargs['headers']['Content-Type'], 'application/json')
+        self.assertEqual(kwargs['headers']['Accept-Encoding'], get_accept_encoding())
+        self.assertEqual(kwargs['headers']['Authorization'], 'Token <TOKEN>')
+        self.assertEqual(self.Pet.request_headers, {'Authorization': 'Token <TOKEN>'})  # Not changed in place
+
+        event = self.events[-1]
+        self.assertEqual(event.name, 'compress_request')
+        request_bytes = len(self.Pet.get_json_codec().dumps(payload))
+        self.assertEqual(event.data, {'codec': 'gzip', 'request_bytes': request_bytes, 'compressed_bytes': len(kwargs['data'])})
+
+    def test_data(self):
+        kwargs = self.Pet.prepare_requests_call(data={'name': 'Luna', 'tags': ['cat'] * 50})
+        self.assertEqual(gzip.decompress(kwargs['data']), ('name=Luna' + '&tags=cat' * 50).encode('utf-8'))
+        self.assertEqual(kwargs['headers']['Content-Type'], 'application/x-www-form-urlencoded')
+
+        data = {'name': 'Luna', 'owner': None, 'tags': ['cat', None, 'black'] * 50, 'description': 'A black cat'}
+        kwargs = self.Pet.prepare_requests_call(data=dict(data))
+        request = requests.Request('POST', 'http://super.cool/api/pets', data=data).prepare()
+        self.assertEqual(gzip.decompress(kwargs['data']), request.body.encode('utf-8'))
+
+    def test_small_bodies_are_not_compressed(self):
+        kwargs = self.Pet.prepare_requests_call(json={'name': 'Luna'})
+        self.assertEqual(kwargs['json'], {'name': 'Luna'})
+        self.assertNotIn('Content-Encoding', kwargs['headers'])
+        self.assertIn('Accept-Encoding', kwargs['headers'])
+        self.assertEqual(self.events, [])
+
+    def test_disabled_by_default(self):
+        kwargs = RestApiLib.prepare_requests_call(json={'description': 'A black cat. ' * 200})
+        self.assertEqual(kwargs['headers'], None)
+        self.assertIn('json', kwargs)
+
+
 class ViewsetRestApiLibTestCase(TestCase):
     def test_basic_resource_mixins_inheritance(self):
         lib = ViewsetRestApiLib()
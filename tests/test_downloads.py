@@ -0,0 +1,93 @@
+import io
+import os
+import tempfile
+from unittest import TestCase
+
+import mock
+import requests
+
+from rest_api_lib_creator.downloads import (
+    Download, get_destination_size, get_range_header, is_already_downloaded, parse_content_range
+)
+
+
+def build_response(body, status_code=200, headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response.raw = io.BytesIO(body)
+    response.headers.update(headers or {'Content-Length': str(len(body))})
+    response.request = requests.Request('GET', 'http://super.cool/api/reports/1/export').prepare()
+    return response
+
+
+class DownloadsUtilsTestCase(TestCase):
+    def test_get_range_header(self):
+        self.assertEqual(get_range_header(), 'bytes=0-')
+        self.assertEqual(get_range_header(100), 'bytes=100-')
+        self.assertEqual(get_range_header(100, 199), 'bytes=100-199')
+
+    def test_parse_content_range(self):
+        self.assertEqual(parse_content_range('bytes 100-199/1000'), (100, 199, 1000))
+        self.assertEqual(parse_content_range('bytes 100-199/*'), (100, 199, None))
+        self.assertEqual(parse_content_range('bytes */1000'), (None, None, 1000))
+        self.assertEqual(parse_content_range('nonsense'), (None, None, None))
+        self.assertEqual(parse_content_range(None), (None, None, None))
+
+    def test_get_destination_size(self):
+        self.assertEqual(get_destination_size(io.BytesIO(b'x' * 10)), 10)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'export.csv')
+            self.assertEqual(get_destination_size(path), 0)
+            with open(path, 'wb') as f:
+                f.write(b'x' * 10)
+            self.assertEqual(get_destination_size(path), 10)
+
+
+class DownloadTestCase(TestCase):
+    def test_iter(self):
+        response = build_response(b'x' * 2500)
+        response.close = mock.Mock()
+        download = Download(response, chunk_size=1000)
+
+        self.assertEqual(download._meta.response.status_code, 200)
+        self.assertEqual((download.offset, download.total_size, download.partial), (0, 2500, False))
+        self.assertEqual([len(chunk) for chunk in download], [1000, 1000, 500])
+        self.assertEqual(download.bytes_read, 2500)
+        self.assertTrue(response.close.called)  # Connection released once exhausted
+
+    def test_partial(self):
+        download = Download(build_response(b'x' * 100, 206, {'Content-Range': 'bytes 900-999/1000'}))
+        self.assertEqual((download.offset, download.total_size, download.partial), (900, 1000, True))
+
+    def test_range_not_satisfiable(self):
+        response = build_response(b'Range Not Satisfiable', 416, {'Content-Range': 'bytes */10'})
+        response.close = mock.Mock()
+        download = Download(response)
+
+        self.assertEqual((download.offset, download.total_size, download.partial), (10, 10, False))
+        self.assertEqual(list(download), [])
+        self.assertTrue(response.close.called)
+        self.assertTrue(is_already_downloaded(response, 10))
+        self.assertFalse(is_already_downloaded(response, 5))
+        self.assertFalse(is_already_downloaded(build_response(b''), 0))
+
+    def test_write_to_file(self):
+        destination = io.BytesIO(b'old content')
+        self.assertEqual(Download(build_response(b'new')).write_to(destination), 3)
+        self.assertEqual(destination.getvalue(), b'new')
+
+        destination = io.BytesIO(b'0123')
+        Download(build_response(b'456789', 206, {'Content-Range': 'bytes 4-9/10'})).write_to(destination)
+        self.assertEqual(destination.getvalue(), b'0123456789')
+
+    def test_write_to_path(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'export.csv')
+            Download(build_response(b'0123')).write_to(path)
+            Download(build_response(b'456789', 206, {'Content-Range': 'bytes 4-9/10'})).write_to(path)
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), b'0123456789')
+
+            Download(build_response(b'whole body')).write_to(path)  # Range ignored by the server
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), b'whole body')
@@ -0,0 +1,95 @@
+from unittest import TestCase
+
+import mock
+
+from rest_api_lib_creator.instrumentation import (
+    NO_SPAN, CallbackInstrumentation, Event, Histogram, HistogramCollector, Instrumentation, MultiInstrumentation, Span
+)
+
+
+class Pet(object):
+    pass
+
+
+class HistogramTestCase(TestCase):
+    def test_common(self):
+        histogram = Histogram(buckets=(0.001, 0.01, 0.1))
+        for duration in (0.0005, 0.005, 0.005, 0.05, 0.5):
+            histogram.add(Event('request', Pet, duration, {'status_code': 200, 'response_bytes': 10, 'method': 'get'}))
+        histogram.add(Event('request', Pet, 0.005, {'error': 'ConnectionError', 'response_bytes': None, 'many': True}))
+
+        stats = histogram.get_stats()
+        self.assertEqual(stats['count'], 6)
+        self.assertAlmostEqual(stats['total'], 0.5655)
+        self.assertEqual(stats['min'], 0.0005)
+        self.assertEqual(stats['max'], 0.5)
+        self.assertEqual(stats['p50'], 0.01)
+        self.assertEqual(stats['p90'], 0.5)
+        self.assertEqual(stats['response_bytes'], 50)
+        self.assertEqual(stats['status_codes'], {200: 5})
+        self.assertEqual(stats['errors'], {'ConnectionError': 1})
+        self.assertNotIn('many', stats)
+
+    def test_empty(self):
+        self.assertEqual(Histogram().get_stats()['p50'], None)
+
+
+class HistogramCollectorTestCase(TestCase):
+    def test_common(self):
+        collector = HistogramCollector()
+        collector.emit(Event('request', Pet, 0.1, {}))
+        collector.emit(Event('request', Pet, 0.3, {}))
+        collector.emit(Event('prepare_response', Pet, 0.01, {'objects': 20}))
+
+        stats = collector.get_stats()
+        self.assertEqual(sorted(stats), ['prepare_response', 'request'])
+        self.assertEqual(stats['request']['count'], 2)
+        self.assertAlmostEqual(stats['request']['mean'], 0.2)
+        self.assertEqual(stats['prepare_response']['objects'], 20)
+
+        collector.clear()
+        self.assertEqual(collector.get_stats(), {})
+
+    def test_group_by_class(self):
+        collector = HistogramCollector(group_by_class=True)
+        collector.emit(Event('request', Pet, 0.1, {}))
+        self.assertEqual(list(collector.get_stats()), ['Pet.request'])
+
+
+class AdaptersTestCase(TestCase):
+    def test_interface(self):
+        self.assertRaises(NotImplementedError, Instrumentation().emit, Event('request', Pet, 0.1, {}))
+
+    def test_callback_and_multi(self):
+        callback = mock.Mock()
+        collector = HistogramCollector()
+        event = Event('request', Pet, 0.1, {})
+
+        MultiInstrumentation(CallbackInstrumentation(callback), collector).emit(event)
+
+        callback.assert_called_once_with(event)
+        self.assertEqual(collector.get_stats()['request']['count'], 1)
+
+
+class SpanTestCase(TestCase):
+    def test_common(self):
+        instrumentation = mock.Mock()
+        with Span(instrumentation, 'request', Pet, {'url': 'http://super.cool'}) as span:
+            span.data['status_code'] = 200
+
+        event = instrumentation.emit.call_args[0][0]
+        self.assertEqual(event.name, 'request')
+        self.assertIs(event.lib_class, Pet)
+        self.assertGreaterEqual(event.duration, 0)
+        self.assertEqual(event.data, {'url': 'http://super.cool', 'status_code': 200})
+
+    def test_error(self):
+        instrumentation = mock.Mock()
+        with self.assertRaises(ValueError):
+            with Span(instrumentation, 'request', Pet, {}):
+                raise ValueError()
+        self.assertEqual(instrumentation.emit.call_args[0][0].data, {'error': 'ValueError'})
+
+    def test_no_span(self):
+        with NO_SPAN as span:
+            self.assertIsNone(span)
@@ -0,0 +1,141 @@
+from unittest import TestCase
+
+import mock
+import requests
+
+from rest_api_lib_creator.core import RestApiLib
+from rest_api_lib_creator.datastructures import UnhandledResponse
+from rest_api_lib_creator.iterators import ListCursor, ListIterator
+from rest_api_lib_creator.mixins import ListMixin
+from rest_api_lib_creator.pagination_classes import NoPagination
+
+
+class ListIteratorTestCase(TestCase):
+    def setUp(self):
+        super(ListIteratorTestCase, self).setUp()
+
+        class Pet(ListMixin, RestApiLib):
+            base_api_url = 'http://super.cool/api/pets'
+
+        self.pages = {
+            'http://super.cool/api/pets?type=dog': {
+                'count': 5, 'next': 'http://super.cool/api/pets?page=2&type=dog', 'previous': None,
+                'results': [{'id': 1}, {'id': 2}],
+            },
+            'http://super.cool/api/pets?page=2&type=dog': {
+                'count': 5, 'next': 'http://super.cool/api/pets?page=3&type=dog', 'previous': 'http://super.cool/api/pets?type=dog',
+                'results': [{'id': 3}, {'id': 4}],
+            },
+            'http://super.cool/api/pets?page=3&type=dog': {
+                'count': 5, 'next': None, 'previous': 'http://super.cool/api/pets?page=2&type=dog',
+                'results': [{'id': 5}],
+            },
+        }
+
+        self.Pet = Pet
+        self._request_patched = mock.patch.object(RestApiLib, 'request', side_effect=self.fake_request)
+        self.request_patched = self._request_patched.start()
+
+    def tearDown(self):
+        super(ListIteratorTestCase, self).tearDown()
+        self._request_patched.stop()
+
+    def fake_request(self, method, url):
+        return mock.Mock(status_code=200, json=mock.Mock(return_value=self.pages[url]))
+
+    def test_common(self):
+        iterator = self.Pet.iter_all(type='dog')
+        self.assertIsInstance(iterator, ListIterator)
+        self.assertFalse(self.request_patched.called)  # nothing is fetched before iterating
+
+        pets = list(iterator)
+
+        self.assertEqual([pet.id for pet in pets], [1, 2, 3, 4, 5])
+        self.assertTrue(all(isinstance(pet, self.Pet) and pet._existing_instance for pet in pets))
+        self.assertEqual([call[0] for call in self.request_patched.call_args_list], [
+            (requests.get, 'http://super.cool/api/pets?type=dog'),
+            (requests.get, 'http://super.cool/api/pets?page=2&type=dog'),
+            (requests.get, 'http://super.cool/api/pets?page=3&type=dog'),
+        ])
+        self.assertIsNone(iterator.cursor)
+
+    def test_pages_are_fetched_lazily(self):
+        iterator = self.Pet.iter_all(type='dog')
+        next(iterator)
+        next(iterator)
+        self.assertEqual(self.request_patched.call_count, 1)
+        next(iterator)
+        self.assertEqual(self.request_patched.call_count, 2)
+
+    def test_max_items(self):
+        pets = list(self.Pet.iter_all(max_items=3, type='dog'))
+        self.assertEqual([pet.id for pet in pets], [1, 2, 3])
+        self.assertEqual(self.request_patched.call_count, 2)
+
+    def test_max_items_at_a_page_boundary(self):
+        iterator = self.Pet.iter_all(max_items=2, type='dog')
+        self.assertEqual([pet.id for pet in iterator], [1, 2])
+        self.assertEqual(self.request_patched.call_count, 1)
+
+        pets = list(self.Pet.iter_all(resume_from=iterator.cursor))
+        self.assertEqual([pet.id for pet in pets], [3, 4, 5])
+
+    def test_resume_from_cursor(self):
+        iterator = self.Pet.iter_all(type='dog')
+        self.assertEqual([next(iterator).id for _ in range(3)], [1, 2, 3])
+        iterator.close()
+        self.assertEqual(iterator.cursor, ListCursor('http://super.cool/api/pets?page=2&type=dog', 1))
+
+        pets = list(self.Pet.iter_all(resume_from=iterator.cursor))
+        self.assertEqual([pet.id for pet in pets], [4, 5])
+
+        pets = list(self.Pet.iter_all(resume_from='http://super.cool/api/pets?page=3&type=dog'))
+        self.assertEqual([pet.id for pet in pets], [5])
+
+    def test_no_pagination(self):
+        class PetNoPagination(self.Pet):
+            pagination_class = NoPagination
+
+        self.request_patched.side_effect = None
+        self.request_patched.return_value = mock.Mock(status_code=200, json=mock.Mock(return_value=[{'id': 1}, {'id': 2}]))
+
+        self.assertEqual([pet.id for pet in PetNoPagination.iter_all()], [1, 2])
+        self.assertEqual(self.request_patched.call_count, 1)
+
+    def test_unhandled_response(self):
+        self.request_patched.side_effect = None
+        self.request_patched.return_value = mock.Mock(status_code=500)
+
+        results = list(self.Pet.iter_all())
+        self.assertEqual(len(results), 1)
+        self.assertIsInstance(results[0], UnhandledResponse)
+
+
+class ListIteratorPrefetchTestCase(ListIteratorTestCase):
+    def setUp(self):
+        super(ListIteratorPrefetchTestCase, self).setUp()
+
+        class PrefetchPet(self.Pet):
+            list_prefetch_workers = 2
+
+        self.Pet = PrefetchPet
+
+    def test_pages_are_fetched_lazily(self):
+        iterator = self.Pet.iter_all(type='dog')
+        next(iterator)
+        self.assertEqual(self.request_patched.call_count, 1)
+        self.assertEqual([pet.id for pet in iterator], [2, 3, 4, 5])
+        self.assertEqual(self.request_patched.call_count, 3)
+
+    def test_max_items(self):
+        pets = list(self.Pet.iter_all(max_items=3, type='dog'))
+        self.assertEqual([pet.id for pet in pets], [1, 2, 3])
+        self.assertEqual(self.request_patched.call_count, 2)  # page 3 is not prefetched
+
+    def test_page_urls_come_from_count(self):
+        list(self.Pet.iter_all(type='dog'))
+        self.assertEqual(sorted(call[0][1] for call in self.request_patched.call_args_list), [
+            'http://super.cool/api/pets?page=2&type=dog',
+            'http://super.cool/api/pets?page=3&type=dog',
+            'http://super.cool/api/pets?type=dog',
+        ])
@@ -0,0 +1,54 @@
+from unittest import TestCase, skipIf
+
+import mock
+
+from rest_api_lib_creator import json_codecs
+from rest_api_lib_creator.json_codecs import (
+    JsonCodec, OrjsonCodec, StdlibJsonCodec, get_available_json_codecs, get_default_json_codec
+)
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+class JsonCodecTestCase(TestCase):
+    def test_interface(self):
+        self.assertRaises(NotImplementedError, JsonCodec().dumps, {})
+        self.assertRaises(NotImplementedError, JsonCodec().loads, b'{}')
+
+    def test_available_codecs_roundtrip(self):
+        payload = {'id': 1, 'name': 'Luna', 'tags': ['cat', 'black'], 'owner': None, 'score': 1.5, 'unicode': 'ação'}
+
+        for codec in get_available_json_codecs():
+            encoded = codec.dumps(payload)
+            self.assertIsInstance(encoded, bytes)
+            self.assertEqual(codec.loads(encoded), payload)
+            self.assertEqual(codec.loads(encoded.decode('utf-8')), payload)
+
+    def test_stdlib_is_always_available(self):
+        self.assertIsInstance(get_available_json_codecs()[-1], StdlibJsonCodec)
+
+    def test_default_codec_fallback(self):
+        with mock.patch.object(json_codecs, '_default_json_codec', None):
+            with mock.patch.object(json_codecs, 'CODEC_CLASSES_BY_PREFERENCE', (OrjsonCodec, StdlibJsonCodec)):
+                with mock.patch.dict('sys.modules', {'orjson': None}):
+                    self.assertIsInstance(get_default_json_codec(), StdlibJsonCodec)
+
+    @skipIf(orjson is None, 'orjson is not installed')
+    def test_default_codec_prefers_faster_ones(self):
+        with mock.patch.object(json_codecs, '_default_json_codec', None):
+            self.assertIsInstance(get_default_json_codec(), OrjsonCodec)
+
+    def test_fast_codecs_match_stdlib(self):
+        stdlib_codec = StdlibJsonCodec()
+        payloads = [{1: 2, 'a': 1}, {'big': 2 ** 70}, {'nan': float('nan'), 'none': None}, {'inf': [float('inf')]}]
+        bodies = [b'{"id": 123456789012345678901234567890}', b'{"a": NaN}', '{"a": "ação"}'.encode('utf-16'), '{"a": 1}']
+
+        for codec in get_available_json_codecs():
+            for payload in payloads:
+                encoded, expected = codec.dumps(payload), stdlib_codec.dumps(payload)
+                self.assertEqual(repr(stdlib_codec.loads(encoded)), repr(stdlib_codec.loads(expected)), (codec.name, payload))
+            for body in bodies:
+                self.assertEqual(repr(codec.loads(body)), repr(stdlib_codec.loads(body)), (codec.name, body))
@@ -1,10 +1,13 @@
+import json
 from unittest import TestCase
 
 import mock
 import requests
+from requests.exceptions import HTTPError
 
+from rest_api_lib_creator.cache import InMemoryCache
 from rest_api_lib_creator.core import RestApiLib
-from rest_api_lib_creator.datastructures import NoContent, UnhandledResponse
+from rest_api_lib_creator.datastructures import BatchResult, NoContent, UnhandledResponse
 from rest_api_lib_creator.mixins import CreateMixin, DeleteMixin, ListMixin, RetrieveMixin, UpdateMixin
 from rest_api_lib_creator.pagination_classes import NoPagination
 
@@ -104,6 +107,39 @@ class ListMixinTestCase(TestCase):
         self.assertIsNotNone(response._meta.request)
         self.assertIsNotNone(response._meta.response)
 
+    def test_iter_stream(self):
+        body = json.dumps(self.response_json).encode()
+        response = self.request_patched.return_value
+        response.iter_content.return_value = [body[i:i + 5] for i in range(0, len(body), 5)]
+
+        pets = self.Pet.iter_stream(type='dog')
+        self.request_patched.assert_not_called()  # Lazy
+
+        pets = list(pets)
+        self.request_patched.assert_called_once_with(requests.get, 'http://super.cool/api/pets?type=dog', stream=True)
+        response.iter_content.assert_called_once_with(chunk_size=64 * 1024)
+        response.close.assert_called_once_with()
+        response.json.assert_not_called()
+
+        self.assertEqual(len(pets), 2)
+        self.assertIsInstance(pets[0], self.Pet)
+        self.assertTrue(pets[0]._existing_instance)
+        self.assertEqual(pets[0].name, 'Luna')
+        self.assertEqual(pets[1].name, 'Estrela')
+
+    def test_iter_stream_no_pagination(self):
+        class PetNoPagination(self.Pet):
+            pagination_class = NoPagination
+
+        self.request_patched.return_value.iter_content.return_value = [b'[{"id": "xx"}, ', b'{"id": "yy"}]']
+        self.assertEqual([pet.id for pet in PetNoPagination.iter_stream()], ['xx', 'yy'])
+
+    def test_iter_stream_unhandled_response(self):
+        self.request_patched.return_value.status_code = 401
+        response, = self.Pet.iter_stream()
+        self.assertIsInstance(response, UnhandledResponse)
+        self.assertTrue(self.request_patched.return_value.close.called)
+
 
 class CreateMixinTestCase(TestCase):
     def setUp(self):
@@ -181,6 +217,93 @@ class CreateMixinTestCase(TestCase):
 
         self.request_patched.assert_called_once_with(requests.post, 'http://super.cool/api/pets/create', json={'name': 'Luna'})
 
+    def test_create_many(self):
+        def fake_request(method, url, data):
+            if data['name'] == 'boom':
+                raise HTTPError('Something is not good')
+            status_code = 400 if data['name'] == 'bad' else 201
+            return mock.Mock(status_code=status_code, json=mock.Mock(return_value=dict(data, id='xx')))
+
+        self.request_patched.side_effect = fake_request
+        objects = ({'name': name} for name in ('Luna', 'boom', 'bad', 'Estrela'))
+
+        result = self.Pet.create_many(objects, max_concurrency=2)
+
+        self.assertIsInstance(result, BatchResult)
+        self.assertEqual([item.input['name'] for item in result], ['Luna', 'boom', 'bad', 'Estrela'])
+        self.assertEqual(result[0].result.name, 'Luna')
+        self.assertIsInstance(result[1].result, HTTPError)
+        self.assertIsInstance(result[2].result, UnhandledResponse)
+        self.assertEqual(result[3].result.name, 'Estrela')
+        self.assertEqual([item.input['name'] for item in result.succeeded], ['Luna', 'Estrela'])
+        self.assertEqual([item.input['name'] for item in result.failed], ['boom', 'bad'])
+
+    def test_create_many_bulk(self):
+        class BulkPet(self.Pet):
+            bulk_create_url = '{base_api_url}/bulk'
+            bulk_chunk_size = 2
+
+        def fake_request(method, url, json):
+            if json[0]['name'] == 'bad':
+                return mock.Mock(status_code=400)
+            return mock.Mock(status_code=201, json=mock.Mock(return_value=[dict(obj, id=obj['name']) for obj in json]))
+
+        self.request_patched.side_effect = fake_request
+        objects = [{'name': name} for name in ('Luna', 'Estrela', 'bad', 'Lua', 'Sol')]
+
+        result = BulkPet.create_many(iter(objects), max_concurrency=1)
+
+        self.assertEqual(self.request_patched.call_args_list, [
+            mock.call(requests.post, 'http://super.cool/api/pets/bulk', json=objects[0:2]),
+            mock.call(requests.post, 'http://super.cool/api/pets/bulk', json=objects[2:4]),
+            mock.call(requests.post, 'http://super.cool/api/pets/bulk', json=objects[4:5]),
+        ])
+        self.assertEqual([item.input for item in result], objects)
+        self.assertEqual([pet.id for pet in result.results[0:2]], ['Luna', 'Estrela'])
+        self.assertTrue(all(pet._existing_instance for pet in result.results[0:2]))
+        self.assertIsInstance(result[2].result, UnhandledResponse)
+        self.assertIs(result[2].result, result[3].result)
+        self.assertEqual(result[4].result.id, 'Sol')
+
+    def test_create_many_bulk_count_mismatch(self):
+        class BulkPet(self.Pet):
+            bulk_create_url = '{base_api_url}/bulk'
+
+        self.request_patched.return_value.json.return_value = [{'id': 1}]
+        result = BulkPet.create_many([{'name': 'Luna'}, {'name': 'Estrela'}])
+
+        self.assertEqual(result.succeeded, [])
+        self.assertTrue(all(isinstance(pet, UnhandledResponse) for pet in result.results))
+        self.assertIs(result[0].result._meta.response, self.request_patched.return_value)
+
+    def test_bulk_payload_mode_must_be_json(self):
+        class BulkPet(self.Pet):
+            bulk_create_url = '{base_api_url}/bulk'
+            bulk_payload_mode = 'data'
+
+        self.assertRaisesRegex(ValueError, "bulk_payload_mode must be 'json'", BulkPet.create_many, [{'name': 'Luna'}])
+        self.assertRaisesRegex(ValueError, "bulk_payload_mode must be 'json'", BulkPet.bulk_create, [{'name': 'Luna'}])
+        self.assertFalse(self.request_patched.called)
+
+    def test_create_many_lazy(self):
+        result = self.Pet.create_many([{'name': 'Luna'}], lazy=True)
+        self.assertNotIsInstance(result, list)
+        self.assertEqual([item.result.id for item in result], ['xx'])
+
+    def test_save_all(self):
+        class CreateUpdatePet(CreateMixin, UpdateMixin, RestApiLib):
+            base_api_url = 'http://super.cool/api/pets'
+
+        new_pet = CreateUpdatePet(name='Luna')
+        existing_pet = CreateUpdatePet.init_existing_object(id='yy')
+        existing_pet.name = 'Estrela'
+
+        result = CreateUpdatePet.save_all([new_pet, existing_pet])
+
+        self.assertEqual([item.input for item in result], [new_pet, existing_pet])
+        calls = sorted((call[0][1], call[0][0]) for call in self.request_patched.call_args_list)
+        self.assertEqual(calls, [('http://super.cool/api/pets', requests.post), ('http://super.cool/api/pets/yy', requests.patch)])
+
     def test_unhandled_response(self):
         self.request_patched.return_value.status_code = 400
         response = self.Pet.create(name='Luna')
@@ -231,6 +354,34 @@ class RetrieveMixinTestCase(TestCase):
 
         self.request_patched.assert_called_once_with(requests.get, 'http://super.cool/api/pets/get/xx')
 
+    def test_retrieve_many(self):
+        def fake_request(method, url):
+            identifier = url.rsplit('/', 1)[-1]
+            if identifier == 'boom':
+                raise HTTPError('Something is not good')
+            return mock.Mock(status_code=404 if identifier == 'missing' else 200, json=mock.Mock(return_value={'id': identifier}))
+
+        self.request_patched.side_effect = fake_request
+
+        results = self.Pet.retrieve_many(['xx', 'boom', 'yy', 'missing'], max_concurrency=2)
+
+        self.assertEqual(len(results), 4)
+        self.assertIsInstance(results[0], self.Pet)
+        self.assertEqual(results[0].id, 'xx')
+        self.assertIsInstance(results[1], HTTPError)
+        self.assertEqual(results[2].id, 'yy')
+        self.assertIsInstance(results[3], UnhandledResponse)
+
+    def test_retrieve_many_as_completed(self):
+        self.request_patched.side_effect = lambda method, url: mock.Mock(
+            status_code=200, json=mock.Mock(return_value={'id': url.rsplit('/', 1)[-1]})
+        )
+
+        results = dict(self.Pet.retrieve_many(iter(['xx', 'yy', 'zz']), as_completed=True))
+
+        self.assertEqual(sorted(results), ['xx', 'yy', 'zz'])
+        self.assertEqual(results['yy'].id, 'yy')
+
     def test_unhandled_response(self):
         self.request_patched.return_value.status_code = 404
         response = self.Pet.retrieve('xx')
@@ -302,6 +453,31 @@ class UpdateMixinTestCase(TestCase):
 
         self.request_patched.assert_called_once_with(requests.patch, 'http://super.cool/api/pets/update/xx', json={'name': 'Luna'})
 
+    def test_update_many_bulk(self):
+        class BulkPet(self.Pet):
+            bulk_update_url = '{base_api_url}/bulk'
+
+        self.request_patched.return_value = mock.Mock(
+            status_code=200, json=mock.Mock(return_value=[{'id': 'xx', 'name': 'Luna'}, {'id': 'yy', 'name': 'Estrela'}])
+        )
+
+        result = BulkPet.update_many([('xx', {'name': 'Luna'}), ('yy', {'name': 'Estrela'})])
+
+        self.request_patched.assert_called_once_with(
+            requests.patch, 'http://super.cool/api/pets/bulk', json=[{'id': 'xx', 'name': 'Luna'}, {'id': 'yy', 'name': 'Estrela'}]
+        )
+        self.assertEqual([pet.name for pet in result.results], ['Luna', 'Estrela'])
+
+    def test_update_many(self):
+        result = self.Pet.update_many(iter([('xx', {'name': 'Luna'}), ('yy', {'name': 'Estrela'})]))
+
+        self.assertEqual([item.input for item in result], [('xx', {'name': 'Luna'}), ('yy', {'name': 'Estrela'})])
+        self.assertTrue(all(isinstance(pet, self.Pet) for pet in result.results))
+        self.assertEqual(sorted(self.request_patched.call_args_list, key=str), [
+            mock.call(requests.patch, 'http://super.cool/api/pets/xx', data={'name': 'Luna'}),
+            mock.call(requests.patch, 'http://super.cool/api/pets/yy', data={'name': 'Estrela'}),
+        ])
+
     def test_unhandled_response(self):
         self.request_patched.return_value.status_code = 400
         response = self.Pet.update('xx', name='Luna')
@@ -352,9 +528,182 @@ class DeleteMixinTestCase(TestCase):
 
         self.request_patched.assert_called_once_with(requests.delete, 'http://super.cool/api/pets/delete/xx')
 
+    def test_delete_many(self):
+        result = self.Pet.delete_many(['xx', 'yy'])
+
+        self.assertEqual([item.input for item in result], ['xx', 'yy'])
+        self.assertTrue(all(isinstance(response, NoContent) for response in result.results))
+        self.assertEqual(len(result.succeeded), 2)
+
     def test_unhandled_response(self):
         self.request_patched.return_value.status_code = 405
         response = self.Pet.delete('xx')
         self.assertIsInstance(response, UnhandledResponse)
         self.assertIsNotNone(response._meta.request)
         self.assertIsNotNone(response._meta.response)
+
+
+class CacheTestCase(TestCase):
+    def setUp(self):
+        super(CacheTestCase, self).setUp()
+
+        class Pet(ListMixin, CreateMixin, RetrieveMixin, UpdateMixin, DeleteMixin, RestApiLib):
+            base_api_url = 'http://super.cool/api/pets'
+            cache_backend = InMemoryCache()
+
+        self.Pet = Pet
+        self._request_patched = mock.patch.object(RestApiLib, 'request', side_effect=self.fake_request)
+        self.request_patched = self._request_patched.start()
+
+    def tearDown(self):
+        super(CacheTestCase, self).tearDown()
+        self._request_patched.stop()
+
+    def fake_request(self, method, url, **kwargs):
+        status_code = {requests.post: 201, requests.delete: 204}.get(method, 200)
+        if url.endswith('/missing'):
+            status_code = 404
+        json = {'results': [{'id': 'xx'}]} if url.endswith('/pets') else {'id': url.rsplit('/', 1)[-1]}
+        return mock.Mock(status_code=status_code, json=mock.Mock(return_value=json))
+
+    def test_retrieve_and_list_are_cached(self):
+        pet1 = self.Pet.retrieve('xx')
+        pet2 = self.Pet.retrieve('xx')
+        self.Pet.retrieve('yy')
+        self.Pet.list()
+        self.Pet.list()
+
+        self.assertEqual(self.request_patched.call_count, 3)
+        self.assertIsNot(pet1, pet2)  # every call builds its own instance
+        self.assertEqual(pet2.id, 'xx')
+        self.assertEqual(self.Pet.get_cache_stats()['hits'], 2)
+
+    def test_unsuccessful_responses_are_not_cached(self):
+        self.Pet.retrieve('missing')
+        self.Pet.retrieve('missing')
+        self.assertEqual(self.request_patched.call_count, 2)
+
+    def test_auth_identity_is_part_of_the_key(self):
+        class OtherUserPet(self.Pet):
+            request_headers = {'Authorization': 'Token <OTHER>'}
+
+        self.Pet.retrieve('xx')
+        OtherUserPet.retrieve('xx')
+        self.assertEqual(self.request_patched.call_count, 2)
+
+    def test_invalidation(self):
+        self.Pet.retrieve('xx')
+        self.Pet.retrieve('yy')
+        self.Pet.list()
+        self.request_patched.reset_mock()
+
+        self.Pet.update('xx', name='Luna')
+        self.Pet.retrieve('xx')
+        self.Pet.retrieve('yy')
+        self.Pet.list()
+        self.assertEqual([call[0][1] for call in self.request_patched.call_args_list], [
+            'http://super.cool/api/pets/xx', 'http://super.cool/api/pets/xx', 'http://super.cool/api/pets',
+        ])
+
+        self.request_patched.reset_mock()
+        self.Pet.init_existing_object(id='yy').destroy()
+        self.Pet.retrieve('yy')
+        self.assertEqual(self.request_patched.call_count, 2)
+
+        self.request_patched.reset_mock()
+        self.Pet(name='Luna').save()
+        self.Pet.list()
+        self.Pet.retrieve('xx')
+        self.assertEqual(self.request_patched.call_count, 2)
+
+    def test_lost_generations_never_revive_stale_entries(self):
+        class ExpiringPet(self.Pet):
+            cache_backend = InMemoryCache(ttl=100)
+
+        ExpiringPet.retrieve('xx')
+        ExpiringPet.update('xx', name='Luna')
+        ExpiringPet.retrieve('xx')
+        self.request_patched.reset_mock()
+
+        for key in [key for key in ExpiringPet.cache_backend._entries if key.startswith('generation:')]:
+            ExpiringPet.cache_backend.delete(key)  # As if they expired or were evicted
+        ExpiringPet.retrieve('xx')
+        self.assertEqual(self.request_patched.call_count, 1)
+
+    def test_no_cache_backend(self):
+        class NoCachePet(self.Pet):
+            cache_backend = None
+
+        NoCachePet.retrieve('xx')
+        NoCachePet.retrieve('xx')
+        self.assertEqual(self.request_patched.call_count, 2)
+        self.assertIsNone(NoCachePet.get_cache_stats())
+
+
+class ProjectionTestCase(TestCase):
+    def setUp(self):
+        super(ProjectionTestCase, self).setUp()
+
+        class Pet(ListMixin, RetrieveMixin, RestApiLib):
+            base_api_url = 'http://super.cool/api/pets'
+
+        self.Pet = Pet
+        self.full_json = {'id': 'xx', 'name': 'Luna', 'color': 'black', 'bio': 'A very long text'}
+        self._request_patched = mock.patch.object(RestApiLib, 'request', side_effect=self.fake_request)
+        self.request_patched = self._request_patched.start()
+
+    def tearDown(self):
+        super(ProjectionTestCase, self).tearDown()
+        self._request_patched.stop()
+
+    def fake_request(self, method, url):
+        json = self.full_json  # The API may ignore the projection parameters: instances are projected anyway
+        if '/pets?' in url or url.endswith('/pets'):
+            json = {'results': [json]}
+        return mock.Mock(status_code=200, json=mock.Mock(return_value=json))
+
+    def test_only(self):
+        pets = self.Pet.only('name', 'color').list(type='cat')
+
+        self.request_patched.assert_called_once_with(requests.get, 'http://super.cool/api/pets?fields=id%2Cname%2Ccolor&type=cat')
+        self.assertIsInstance(pets[0], self.Pet)
+        self.assertEqual(pets[0]._instance_data, {'id': 'xx', 'name': 'Luna', 'color': 'black'})
+        self.assertRaises(AttributeError, getattr, pets[0], 'bio')
+
+    def test_defer(self):
+        pet = self.Pet.defer('bio').retrieve('xx')
+
+        self.request_patched.assert_called_once_with(requests.get, 'http://super.cool/api/pets/xx?omit=bio')
+        self.assertEqual(pet._instance_data, {'id': 'xx', 'name': 'Luna', 'color': 'black'})
+
+    def test_chaining_and_class_caching(self):
+        projected_class = self.Pet.only('name').defer('color')
+        self.assertIs(projected_class, self.Pet.only('name').defer('color'))
+        self.assertEqual(projected_class.__name__, 'Pet')
+        self.assertIs(projected_class.projection_base_class, self.Pet)
+        self.assertEqual(projected_class.get_projection_query_params(), {'fields': 'id,name', 'omit': 'color'})
+        self.assertEqual(self.Pet.get_projection_query_params(), {})
+
+    def test_custom_query_params(self):
+        class CustomPet(self.Pet):
+            only_query_param = 'only'
+            defer_query_param = 'exclude'
+
+        CustomPet.only('name').defer('bio').retrieve('xx')
+        self.request_patched.assert_called_once_with(requests.get, 'http://super.cool/api/pets/xx?exclude=bio&only=id%2Cname')
+
+    def test_lazy_load(self):
+        class LazyPet(self.Pet):
+            projection_lazy_load = True
+
+        pet = LazyPet.defer('bio').retrieve('xx')
+        self.assertEqual(pet.name, 'Luna')
+        self.assertEqual(self.request_patched.call_count, 1)
+
+        self.assertEqual(pet.bio, 'A very long text')
+        self.assertEqual(self.request_patched.call_count, 2)
+        self.request_patched.assert_called_with(requests.get, 'http://super.cool/api/pets/xx')
+        self.assertEqual(pet._changed_data, {})
+
+        self.assertRaises(AttributeError, getattr, pet, 'unknown')
+        self.assertEqual(self.request_patched.call_count, 2)  # only loaded once
@@ -0,0 +1,105 @@
+import io
+import os
+import tempfile
+from email.parser import BytesParser
+from unittest import TestCase
+
+import mock
+import requests
+
+from rest_api_lib_creator.multipart import MultipartEncoder, get_file_size
+
+
+def parse(encoder):
+    body = b''.join(encoder)
+    message = BytesParser().parsebytes(b'Content-Type: ' + encoder.content_type.encode() + b'\r\n\r\n' + body)
+    return body, {part.get_param('name', header='content-disposition'): part for part in message.get_payload()}
+
+
+class MultipartEncoderTestCase(TestCase):
+    def setUp(self):
+        super(MultipartEncoderTestCase, self).setUp()
+        self.file = tempfile.NamedTemporaryFile(suffix='.png')
+        self.file.write(b'\x89PNG' + os.urandom(200000))
+        self.file.flush()
+        self.file.seek(0)
+
+    def tearDown(self):
+        super(MultipartEncoderTestCase, self).tearDown()
+        self.file.close()
+
+    def test_common(self):
+        with open(self.file.name, 'rb') as f:
+            encoder = MultipartEncoder({'name': 'Luna', 'tags': ['black', 'cat']}, {'photo': f}, chunk_size=1000)
+            body, parts = parse(encoder)
+
+        self.assertEqual(len(encoder), len(body))
+        self.assertEqual(parts['name'].get_payload(decode=True), b'Luna')
+        self.assertEqual(parts['photo'].get_filename(), os.path.basename(self.file.name))
+        self.assertEqual(parts['photo'].get_payload(decode=True), self.file.read())
+        self.assertEqual(body.count(b'name="tags"'), 2)
+
+    def test_same_body_as_requests(self):
+        fields = {'name': 'Luna', 'owner': None, 'tags': ['black', None, 'cat'], 'a "quoted"\r\nname': 42}
+        with open(self.file.name, 'rb') as f, open(self.file.name, 'rb') as requests_f:
+            files = {'photo': f, 'document': io.BytesIO(b'some content')}
+            encoder = MultipartEncoder(fields, files)
+            with mock.patch('urllib3.filepost.choose_boundary', return_value=encoder.boundary):
+                requests_files = {'photo': requests_f, 'document': io.BytesIO(b'some content')}
+                request = requests.Request('POST', 'http://super.cool/api', data=fields, files=requests_files).prepare()
+
+            self.assertEqual(b''.join(encoder), request.body)
+        self.assertEqual(encoder.content_type, request.headers['Content-Type'])
+        self.assertIn(b'name="a %22quoted%22%0D%0Aname"', request.body)
+
+    def test_files_are_read_in_chunks(self):
+        with open(self.file.name, 'rb') as f:
+            chunks = list(MultipartEncoder(files={'photo': f}, chunk_size=1000))
+            self.assertEqual(f.tell(), 200004)
+        self.assertLessEqual(max(len(chunk) for chunk in chunks), 1000)
+
+        with open(self.file.name, 'rb') as f:
+            chunks = list(MultipartEncoder(files={'photo': f}, chunk_size=1000, use_mmap=False))
+        self.assertLessEqual(max(len(chunk) for chunk in chunks), 1000)
+
+    def test_in_memory_files(self):
+        encoder = MultipartEncoder(files={'document': io.BytesIO(b'some content')})
+        body, parts = parse(encoder)
+        self.assertEqual(len(encoder), len(body))
+        self.assertEqual(parts['document'].get_payload(decode=True), b'some content')
+        self.assertEqual(parts['document'].get_filename(), 'document')
+
+    def test_partially_read_files(self):
+        with open(self.file.name, 'rb') as f:
+            f.read(4)
+            encoder = MultipartEncoder(files={'photo': f})
+            body, parts = parse(encoder)
+        self.assertEqual(len(encoder), len(body))
+        self.assertEqual(parts['photo'].get_payload(decode=True), self.file.read()[4:])
+
+    def test_unknown_size(self):
+        stream = mock.Mock(spec=['read'], read=mock.Mock(side_effect=[b'some ', b'content', b'']))
+        self.assertIsNone(get_file_size(stream))
+
+        encoder = MultipartEncoder(files={'document': stream})
+        self.assertIsNone(encoder.size)
+        self.assertRaises(TypeError, len, encoder)
+        self.assertEqual(parse(encoder)[1]['document'].get_payload(decode=True), b'some content')
+
+    def test_progress_callback(self):
+        callback = mock.Mock()
+        files = {'document': io.BytesIO(b'x' * 2500)}
+        encoder = MultipartEncoder({'name': 'Luna'}, files, chunk_size=1000, progress_callback=callback)
+        list(encoder)
+
+        self.assertEqual(callback.call_args, mock.call(len(encoder), len(encoder)))
+        sent = [call[0][0] for call in callback.call_args_list]
+        self.assertEqual(sent, sorted(sent))
+
+    def test_requests_content_length_or_chunked(self):
+        encoder = MultipartEncoder(files={'document': io.BytesIO(b'some content')})
+        request = requests.Request('POST', 'http://super.cool/api', data=encoder).prepare()
+        self.assertEqual(request.headers['Content-Length'], str(len(encoder)))
+
+        request = requests.Request('POST', 'http://super.cool/api', data=iter(encoder)).prepare()
+        self.assertEqual(request.headers['Transfer-Encoding'], 'chunked')
@@ -0,0 +1,50 @@
+from unittest import TestCase
+
+from rest_api_lib_creator.pagination_classes import DRFLimitOffsetPagination, DRFPageNumberPagination, NoPagination
+
+
+class NoPaginationTestCase(TestCase):
+    def test_common(self):
+        pagination = NoPagination()
+        self.assertEqual(pagination.get_results([{'id': 1}]), [{'id': 1}])
+        self.assertIsNone(pagination.get_next_url([{'id': 1}], 'http://super.cool/api/pets'))
+        self.assertIsNone(pagination.get_page_urls([{'id': 1}], 'http://super.cool/api/pets'))
+        self.assertEqual(list(pagination.get_results_stream([b'[{"id": 1}', b']'])), [{'id': 1}])
+
+
+class DRFPageNumberPaginationTestCase(TestCase):
+    def test_common(self):
+        pagination = DRFPageNumberPagination()
+        json_response = {'count': 7, 'next': 'http://super.cool/api/pets?page=2&type=dog', 'results': [{'id': 1}, {'id': 2}]}
+
+        self.assertEqual(pagination.get_results(json_response), [{'id': 1}, {'id': 2}])
+        self.assertEqual(list(pagination.get_results_stream([b'{"count": 7, "results": [{"id": 1}', b']}'])), [{'id': 1}])
+        self.assertEqual(pagination.get_next_url(json_response, 'http://super.cool/api/pets'), json_response['next'])
+        self.assertEqual(pagination.get_page_urls(json_response, 'http://super.cool/api/pets?type=dog'), [
+            'http://super.cool/api/pets?page=2&type=dog',
+            'http://super.cool/api/pets?page=3&type=dog',
+            'http://super.cool/api/pets?page=4&type=dog',
+        ])
+
+    def test_last_page(self):
+        json_response = {'count': 7, 'next': None, 'results': [{'id': 7}]}
+        self.assertEqual(DRFPageNumberPagination().get_page_urls(json_response, 'http://super.cool/api/pets?page=4'), [])
+
+    def test_unknown_count(self):
+        json_response = {'next': 'http://super.cool/api/pets?page=2', 'results': [{'id': 1}]}
+        self.assertIsNone(DRFPageNumberPagination().get_page_urls(json_response, 'http://super.cool/api/pets'))
+
+
+class DRFLimitOffsetPaginationTestCase(TestCase):
+    def test_common(self):
+        pagination = DRFLimitOffsetPagination()
+        json_response = {'count': 7, 'next': 'http://super.cool/api/pets?limit=3&offset=3', 'results': [{'id': 1}] * 3}
+
+        self.assertEqual(pagination.get_page_urls(json_response, 'http://super.cool/api/pets?limit=3'), [
+            'http://super.cool/api/pets?limit=3&offset=3',
+            'http://super.cool/api/pets?limit=3&offset=6',
+        ])
+
+    def test_last_page(self):
+        json_response = {'count': 7, 'next': None, 'results': [{'id': 7}]}
+        self.assertEqual(DRFLimitOffsetPagination().get_page_urls(json_response, 'http://super.cool/api/pets?offset=6'), [])
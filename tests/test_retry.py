@@ -0,0 +1,80 @@
+from unittest import TestCase
+
+import mock
+import requests
+from requests.exceptions import ConnectionError, HTTPError, ReadTimeout
+
+from rest_api_lib_creator.retry import RetryPolicy
+
+
+class RetryPolicyTestCase(TestCase):
+    def setUp(self):
+        super(RetryPolicyTestCase, self).setUp()
+        self.policy = RetryPolicy(max_attempts=3, jitter=False)
+        self._sleep_patched = mock.patch.object(RetryPolicy, 'sleep')
+        self.sleep_patched = self._sleep_patched.start()
+
+    def tearDown(self):
+        super(RetryPolicyTestCase, self).tearDown()
+        self._sleep_patched.stop()
+
+    def build_response(self, status_code, headers=None):
+        return mock.Mock(status_code=status_code, headers=headers or {})
+
+    def test_retries_status_codes(self):
+        func = mock.Mock(side_effect=[self.build_response(503), self.build_response(502), self.build_response(200)])
+
+        response = self.policy.call(func, requests.get, 'http://super.cool/api/pets', timeout=1)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response._retries, 2)
+        self.assertEqual(func.call_args_list, [mock.call(requests.get, 'http://super.cool/api/pets', timeout=1)] * 3)
+        self.assertEqual(self.sleep_patched.call_args_list, [mock.call(0.5), mock.call(1.0)])
+
+    def test_gives_up_after_max_attempts(self):
+        func = mock.Mock(return_value=self.build_response(503))
+        response = self.policy.call(func, requests.get, 'http://super.cool/api/pets')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response._retries, 2)
+        self.assertEqual(func.call_count, 3)
+
+        func = mock.Mock(side_effect=ConnectionError('Connection reset by peer'))
+        self.assertRaises(ConnectionError, self.policy.call, func, requests.get, 'http://super.cool/api/pets')
+        self.assertEqual(func.call_count, 3)
+
+    def test_retries_exceptions(self):
+        func = mock.Mock(side_effect=[ReadTimeout(), self.build_response(200)])
+        self.assertEqual(self.policy.call(func, requests.get, 'http://super.cool/api/pets')._retries, 1)
+
+        func = mock.Mock(side_effect=HTTPError())
+        self.assertRaises(HTTPError, self.policy.call, func, requests.get, 'http://super.cool/api/pets')
+        self.assertEqual(func.call_count, 1)
+
+    def test_non_idempotent_methods_are_not_retried(self):
+        func = mock.Mock(return_value=self.build_response(503))
+        self.assertEqual(self.policy.call(func, requests.post, 'http://super.cool/api/pets')._retries, 0)
+        self.assertEqual(self.policy.call(func, requests.patch, 'http://super.cool/api/pets')._retries, 0)
+        self.assertEqual(self.policy.call(func, requests.put, 'http://super.cool/api/pets', files={'a': 'b'})._retries, 0)
+
+        func = mock.Mock(side_effect=[self.build_response(503), self.build_response(201)])
+        self.assertEqual(RetryPolicy(methods=None).call(func, requests.post, 'http://super.cool/api/pets')._retries, 1)
+
+    def test_retry_after(self):
+        func = mock.Mock(side_effect=[self.build_response(429, {'Retry-After': '7'}), self.build_response(200)])
+        self.policy.call(func, requests.get, 'http://super.cool/api/pets')
+        self.sleep_patched.assert_called_once_with(7.0)
+
+        func = mock.Mock(return_value=self.build_response(429, {'Retry-After': '3600'}))
+        self.assertEqual(self.policy.call(func, requests.get, 'http://super.cool/api/pets')._retries, 0)
+
+        response = self.build_response(503, {'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'})
+        self.assertEqual(self.policy.get_delay(1, response), 0)
+        self.assertEqual(self.policy.get_delay(1, self.build_response(503, {'Retry-After': 'soon'})), 0.5)
+
+    def test_backoff(self):
+        self.assertEqual([self.policy.get_backoff(attempt) for attempt in range(1, 5)], [0.5, 1, 2, 4])
+        self.assertEqual(RetryPolicy(jitter=False, backoff_max=3).get_backoff(10), 3)
+
+        with mock.patch('random.uniform', return_value=0.3) as uniform_patched:
+            self.assertEqual(RetryPolicy().get_backoff(3), 0.3)
+        uniform_patched.assert_called_once_with(0, 2)
@@ -0,0 +1,80 @@
+from http.client import HTTPMessage
+from unittest import TestCase
+
+import mock
+import requests
+from requests.cookies import MockRequest, MockResponse
+
+from rest_api_lib_creator.sessions import SessionPool, create_session, get_method_name
+
+
+class GetMethodNameTestCase(TestCase):
+    def test_common(self):
+        self.assertEqual(get_method_name(requests.get), 'get')
+        self.assertEqual(get_method_name(requests.patch), 'patch')
+        self.assertEqual(get_method_name('DELETE'), 'delete')
+        self.assertIsNone(get_method_name(mock.Mock()))
+        self.assertIsNone(get_method_name(lambda url: url))
+
+
+class CreateSessionTestCase(TestCase):
+    def test_common(self):
+        session = create_session(pool_connections=3, pool_maxsize=7, pool_block=True)
+        adapter = session.get_adapter('https://super.cool')
+        self.assertEqual(adapter._pool_connections, 3)
+        self.assertEqual(adapter._pool_maxsize, 7)
+        self.assertTrue(adapter._pool_block)
+        self.assertEqual(session.headers['Connection'], 'keep-alive')
+
+    def test_no_keep_alive(self):
+        session = create_session(keep_alive=False)
+        self.assertEqual(session.headers['Connection'], 'close')
+
+    def test_cookies_are_not_persisted_by_default(self):
+        headers = HTTPMessage()
+        headers['Set-Cookie'] = 'sessionid=xx; Path=/'
+        request = requests.Request('GET', 'https://super.cool/api/pets').prepare()
+
+        for persist_cookies, expected_cookies in ((False, {}), (True, {'sessionid': 'xx'})):
+            session = create_session(persist_cookies=persist_cookies)
+            session.cookies.extract_cookies(MockResponse(headers), MockRequest(request))  # As requests does for responses
+            self.assertEqual(session.cookies.get_dict(), expected_cookies)
+
+        explicit_request = session.prepare_request(requests.Request('GET', 'https://super.cool/api', cookies={'explicit': 'yy'}))
+        self.assertIn('explicit=yy', explicit_request.headers['Cookie'])
+        session = create_session()
+        explicit_request = session.prepare_request(requests.Request('GET', 'https://super.cool/api', cookies={'explicit': 'yy'}))
+        self.assertEqual(explicit_request.headers['Cookie'], 'explicit=yy')
+
+
+class SessionPoolTestCase(TestCase):
+    def test_sessions_are_reused_per_key(self):
+        pool = SessionPool()
+        session1 = pool.get('key1')
+        self.assertIs(pool.get('key1'), session1)
+        self.assertIsNot(pool.get('key2'), session1)
+        self.assertEqual(len(pool), 2)
+
+    def test_close(self):
+        pool = SessionPool()
+        session1 = pool.get('key1')
+        session2 = pool.get('key2')
+
+        with mock.patch.object(session1, 'close') as close1, mock.patch.object(session2, 'close') as close2:
+            pool.close('key1')
+            self.assertTrue(close1.called)
+            self.assertFalse(close2.called)
+            self.assertNotIn('key1', pool)
+            self.assertIn('key2', pool)
+
+            pool.close()
+            self.assertTrue(close2.called)
+            self.assertEqual(len(pool), 0)
+
+    def test_context_manager(self):
+        with SessionPool() as pool:
+            session = pool.get('key1')
+            close_patched = mock.patch.object(session, 'close').start()
+        self.assertTrue(close_patched.called)
+        self.assertEqual(len(pool), 0)
+        mock.patch.stopall()
@@ -0,0 +1,58 @@
+import threading
+from unittest import TestCase
+
+from rest_api_lib_creator.singleflight import SingleFlight
+
+
+class SingleFlightTestCase(TestCase):
+    def run_concurrently(self, group, key, func, count):
+        results = [None] * count
+
+        def target(position):
+            try:
+                results[position] = group.do(key, func)
+            except Exception as e:
+                results[position] = e
+
+        threads = [threading.Thread(target=target, args=(position, )) for position in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_concurrent_calls_are_shared(self):
+        group = SingleFlight()
+        release = threading.Event()
+        calls = []
+
+        def func():
+            calls.append(1)
+            release.wait(1)
+            return object()
+
+        threading.Timer(0.1, release.set).start()
+        results = self.run_concurrently(group, 'key', func, 5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(result is results[0] for result in results))
+        self.assertEqual(len(group), 0)
+
+    def test_exceptions_are_shared(self):
+        group = SingleFlight()
+        release = threading.Event()
+
+        def func():
+            release.wait(1)
+            raise ValueError('boom')
+
+        threading.Timer(0.1, release.set).start()
+        results = self.run_concurrently(group, 'key', func, 3)
+
+        self.assertTrue(all(isinstance(result, ValueError) for result in results))
+        self.assertEqual(len(group), 0)
+
+    def test_sequential_calls_are_not_shared(self):
+        group = SingleFlight()
+        self.assertEqual(group.do('key', lambda: 1), 1)
+        self.assertEqual(group.do('key', lambda: 2), 2)
@@ -0,0 +1,113 @@
+import threading
+import time
+from unittest import TestCase
+
+import mock
+
+from rest_api_lib_creator.throttling import RateLimiter, RateLimiterRegistry
+
+
+class RateLimiterTestCase(TestCase):
+    def setUp(self):
+        super(RateLimiterTestCase, self).setUp()
+        self.now = 1000.0
+        self._monotonic_patched = mock.patch('time.monotonic', side_effect=lambda: self.now)
+        self._monotonic_patched.start()
+
+    def tearDown(self):
+        super(RateLimiterTestCase, self).tearDown()
+        self._monotonic_patched.stop()
+
+    def test_token_bucket(self):
+        rate_limiter = RateLimiter(rate=10, burst=2)
+        self.assertEqual(rate_limiter.reserve(), 0)
+        self.assertEqual(rate_limiter.reserve(), 0)
+        self.assertAlmostEqual(rate_limiter.reserve(), 0.1)
+        self.assertAlmostEqual(rate_limiter.reserve(), 0.2)  # Waits are reserved: callers are spread in time
+
+        self.now += 10  # Idle: the bucket is refilled up to the burst
+        self.assertEqual(rate_limiter.reserve(), 0)
+        self.assertEqual(rate_limiter.reserve(), 0)
+        self.assertAlmostEqual(rate_limiter.reserve(), 0.1)
+
+    def test_acquire_sleeps_the_reserved_wait(self):
+        rate_limiter = RateLimiter(rate=2, burst=1)
+        with mock.patch.object(rate_limiter, 'sleep') as sleep_patched:
+            rate_limiter.acquire()
+            rate_limiter.acquire()
+            rate_limiter.acquire()
+        self.assertEqual(sleep_patched.call_args_list, [mock.call(0.5), mock.call(1.0)])
+
+    def test_unlimited_rate(self):
+        rate_limiter = RateLimiter(max_in_flight=2)
+        self.assertEqual([rate_limiter.reserve() for _ in range(100)], [0] * 100)
+
+    def test_adaptive(self):
+        rate_limiter = RateLimiter(rate=100, burst=10, adaptive=True)
+        response = mock.Mock(status_code=200, headers={'X-RateLimit-Remaining': '20', 'X-RateLimit-Reset': '10'})
+        rate_limiter.release(response)
+        self.assertEqual(rate_limiter.rate, 2)
+
+        response = mock.Mock(status_code=200, headers={'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': str(time.time() + 30)})
+        rate_limiter.release(response)
+        self.assertAlmostEqual(rate_limiter.reserve(), 30, places=0)
+
+    def test_adaptive_never_exceeds_the_configured_rate(self):
+        rate_limiter = RateLimiter(rate=10, adaptive=True)
+        rate_limiter.release(mock.Mock(status_code=200, headers={'X-RateLimit-Remaining': '5000', 'X-RateLimit-Reset': '10'}))
+        self.assertEqual(rate_limiter.rate, 10)
+
+        rate_limiter = RateLimiter(adaptive=True)  # No configured rate: the server quota is the only limit
+        rate_limiter.release(mock.Mock(status_code=200, headers={'X-RateLimit-Remaining': '5000', 'X-RateLimit-Reset': '10'}))
+        self.assertEqual(rate_limiter.rate, 500)
+
+    def test_adaptive_retry_after(self):
+        rate_limiter = RateLimiter(adaptive=True)
+        rate_limiter.release(mock.Mock(status_code=429, headers={'Retry-After': '5'}))
+        self.assertEqual(rate_limiter.reserve(), 5)
+        self.now += 5
+        self.assertEqual(rate_limiter.reserve(), 0)
+
+    def test_not_adaptive(self):
+        rate_limiter = RateLimiter(rate=100)
+        rate_limiter.release(mock.Mock(status_code=429, headers={'Retry-After': '5', 'X-RateLimit-Remaining': '1'}))
+        self.assertEqual(rate_limiter.rate, 100)
+        self.assertEqual(rate_limiter.reserve(), 0)
+
+
+class RateLimiterConcurrencyTestCase(TestCase):
+    def test_max_in_flight(self):
+        rate_limiter = RateLimiter(max_in_flight=2)
+        lock = threading.Lock()
+        in_flight = []
+        max_in_flight = []
+
+        def call():
+            rate_limiter.acquire()
+            with lock:
+                in_flight.append(1)
+                max_in_flight.append(len(in_flight))
+            time.sleep(0.01)
+            with lock:
+                in_flight.pop()
+            rate_limiter.release()
+
+        threads = [threading.Thread(target=call) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(max_in_flight), 8)
+        self.assertLessEqual(max(max_in_flight), 2)
+
+
+class RateLimiterRegistryTestCase(TestCase):
+    def test_common(self):
+        registry = RateLimiterRegistry()
+        rate_limiter = registry.get('key', rate=5)
+        self.assertIs(registry.get('key', rate=5), rate_limiter)
+        self.assertIsNot(registry.get('another-key', rate=5), rate_limiter)
+        self.assertEqual(len(registry), 2)
+        registry.clear()
+        self.assertEqual(len(registry), 0)
@@ -1,6 +1,9 @@
+import json
 from unittest import TestCase
 
-from rest_api_lib_creator.utils import add_querystring_to_url, should_iterate
+from requests.auth import HTTPBasicAuth
+
+from rest_api_lib_creator.utils import add_querystring_to_url, chunked, get_identity, iter_json_array, should_iterate
 
 
 class AddQuerystringToUrlTestCase(TestCase):
@@ -43,3 +46,53 @@ class ShouldIterateTestCase(TestCase):
         self.assertFalse(should_iterate({'a': 1, 'b': 2}))
         self.assertFalse(should_iterate(42))
         self.assertFalse(should_iterate('test'))
+
+
+class ChunkedTestCase(TestCase):
+    def test_common(self):
+        self.assertEqual(list(chunked([], 2)), [])
+        self.assertEqual(list(chunked([1, 2, 3, 4], 2)), [[1, 2], [3, 4]])
+        self.assertEqual(list(chunked(iter(range(5)), 2)), [[0, 1], [2, 3], [4]])
+
+
+class GetIdentityTestCase(TestCase):
+    def test_common(self):
+        self.assertEqual(get_identity({'a': 1, 'b': [1, 2]}), get_identity({'b': (1, 2), 'a': 1}))
+        self.assertNotEqual(get_identity({'a': 1}), get_identity({'a': '1'}))
+        self.assertEqual(get_identity(HTTPBasicAuth('user', 'pass')), get_identity(HTTPBasicAuth('user', 'pass')))
+        self.assertNotEqual(get_identity(HTTPBasicAuth('user', 'pass')), get_identity(HTTPBasicAuth('user', 'other')))
+
+
+class IterJsonArrayTestCase(TestCase):
+    def test_common(self):
+        document = json.dumps([{'id': 1, 'name': 'Luna', 'tags': ['a', 'b']}, 12345, 'Estrela', None, True, -1.5e10]).encode()
+        for size in (1, 3, 10, len(document)):
+            chunks = (document[i:i + size] for i in range(0, len(document), size))
+            self.assertEqual(list(iter_json_array(chunks)), json.loads(document.decode()))
+
+    def test_key(self):
+        document = json.dumps({'count': 2, 'next': None, 'extra': {'results': [0]}, 'results': [{'id': 1}, {'id': 2}]})
+        self.assertEqual(list(iter_json_array([document], key='results')), [{'id': 1}, {'id': 2}])
+        self.assertEqual(list(iter_json_array([document], key='missing')), [])
+
+    def test_multibyte_characters_split_among_chunks(self):
+        document = json.dumps(['ação'], ensure_ascii=False).encode()
+        chunks = [document[i:i + 1] for i in range(len(document))]
+        self.assertEqual(list(iter_json_array(chunks)), ['ação'])
+
+    def test_empty(self):
+        self.assertEqual(list(iter_json_array([b'[', b' ]'])), [])
+        self.assertEqual(list(iter_json_array([b'{}'], key='results')), [])
+
+    def test_lazy(self):
+        items = iter_json_array(iter([b'[1, 2, ', b'3, ', b'4]']))
+        self.assertEqual(next(items), 1)
+        self.assertEqual(next(items), 2)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            list(iter_json_array([b'{"id": 1}']))
+        with self.assertRaises(ValueError):
+            list(iter_json_array([b'[1, 2']))
+        with self.assertRaises(ValueError):
+            list(iter_json_array([b'[1 2]']))